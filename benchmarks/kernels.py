@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+'''Write synthetic kernels for the benchmarks.
+
+The SPK and CK files are written with the CSPICE writer routines, the text
+kernels from templates. Nothing has to be downloaded and the size of the
+binary kernels is configurable, so the benchmarks are reproducible.
+'''
+
+import os
+
+import numpy
+
+import spiceminer._spicewrapper as spice
+
+
+### Constants ###
+SPACECRAFT = -999
+BUS = -999000
+# Type 1 SCLK with two fields, 2**16 ticks per second
+TICKS_PER_SECOND = 65536.0
+
+SPK_TYPES = (9, 13)
+
+LEAPSECONDS = [
+    (10, '1972-JAN-1'), (11, '1972-JUL-1'), (12, '1973-JAN-1'),
+    (13, '1974-JAN-1'), (14, '1975-JAN-1'), (15, '1976-JAN-1'),
+    (16, '1977-JAN-1'), (17, '1978-JAN-1'), (18, '1979-JAN-1'),
+    (19, '1980-JAN-1'), (20, '1981-JUL-1'), (21, '1982-JUL-1'),
+    (22, '1983-JUL-1'), (23, '1985-JUL-1'), (24, '1988-JAN-1'),
+    (25, '1990-JAN-1'), (26, '1991-JAN-1'), (27, '1992-JUL-1'),
+    (28, '1993-JUL-1'), (29, '1994-JUL-1'), (30, '1996-JAN-1'),
+    (31, '1997-JUL-1'), (32, '1999-JAN-1'), (33, '2006-JAN-1'),
+    (34, '2009-JAN-1'), (35, '2012-JUL-1'), (36, '2015-JUL-1'),
+    (37, '2017-JAN-1')
+]
+
+LSK = '''KPL/LSK
+
+Synthetic leapseconds kernel for the spiceminer benchmarks.
+
+\\begindata
+
+DELTET/DELTA_T_A = 32.184
+DELTET/K = 1.657D-3
+DELTET/EB = 1.671D-2
+DELTET/M = ( 6.239996D0 1.99096871D-7 )
+DELTET/DELTA_AT = ( {} )
+
+\\begintext
+'''
+
+FK = '''KPL/FK
+
+Synthetic frames kernel for the spiceminer benchmarks.
+
+\\begindata
+
+NAIF_BODY_NAME += ( 'BENCH_SC' 'BENCH_SC_BUS' )
+NAIF_BODY_CODE += ( {sc} {bus} )
+
+FRAME_BENCH_SC_BUS = {bus}
+FRAME_{bus}_NAME = 'BENCH_SC_BUS'
+FRAME_{bus}_CLASS = 3
+FRAME_{bus}_CLASS_ID = {bus}
+FRAME_{bus}_CENTER = {sc}
+CK_{bus}_SCLK = {sc}
+CK_{bus}_SPK = {sc}
+
+\\begintext
+'''
+
+SCLK = '''KPL/SCLK
+
+Synthetic spacecraft clock kernel for the spiceminer benchmarks, ticks are
+TDB seconds since J2000 times {ticks}.
+
+\\begindata
+
+SCLK_KERNEL_ID = ( @2000-01-01/00:00:00 )
+SCLK_DATA_TYPE_{id} = ( 1 )
+SCLK01_TIME_SYSTEM_{id} = ( 1 )
+SCLK01_N_FIELDS_{id} = ( 2 )
+SCLK01_MODULI_{id} = ( 4294967296 {ticks} )
+SCLK01_OFFSETS_{id} = ( 0 0 )
+SCLK01_OUTPUT_DELIM_{id} = ( 1 )
+SCLK_PARTITION_START_{id} = ( 0.0 )
+SCLK_PARTITION_END_{id} = ( 2.81474976710656E+14 )
+SCLK01_COEFFICIENTS_{id} = ( 0.0 0.0 1.0 )
+
+\\begintext
+'''
+
+# (body, center, radius in km, period in sec)
+ORBITS = [
+    (10, 0, 1e6, 374335776.0),
+    (399, 10, 1.496e8, 31557600.0),
+    (SPACECRAFT, 399, 26600.0, 43200.0)
+]
+
+
+### Text kernels ###
+def write_lsk(path):
+    values = '\n    '.join('{}, @{}'.format(*item) for item in LEAPSECONDS)
+    with open(path, 'w') as f:
+        f.write(LSK.format(values))
+    return path
+
+def write_fk(path):
+    with open(path, 'w') as f:
+        f.write(FK.format(sc=SPACECRAFT, bus=BUS))
+    return path
+
+def write_sclk(path):
+    with open(path, 'w') as f:
+        f.write(SCLK.format(id=-SPACECRAFT, ticks=int(TICKS_PER_SECOND)))
+    return path
+
+
+### Binary kernels ###
+def _remove(path):
+    # The CSPICE writers refuse to overwrite files
+    if os.path.exists(path):
+        os.remove(path)
+
+def epochs(records, step, start=0.0):
+    '''Ephemeris times of the records in the binary kernels.'''
+    return start + numpy.arange(records) * float(step)
+
+def circle(ets, radius, period):
+    '''States (n x 6) of a circular orbit in the x-y-plane.'''
+    omega = 2 * numpy.pi / period
+    angle = omega * ets
+    cos, sin = numpy.cos(angle), numpy.sin(angle)
+    zeros = numpy.zeros_like(ets)
+    return numpy.array([radius * cos, radius * sin, zeros,
+        -radius * omega * sin, radius * omega * cos, zeros]).T
+
+def write_spk(path, records, step=600.0, type_=9, degree=7):
+    '''Write the orbits of the sun, the earth and the spacecraft, each as a
+    single segment of `records` states.'''
+    if type_ not in SPK_TYPES:
+        raise ValueError('SPK type must be one of {}'.format(SPK_TYPES))
+    writer = spice.spkw09 if type_ == 9 else spice.spkw13
+    ets = epochs(records, step)
+    _remove(path)
+    handle = spice.spkopn(path, 'BENCHMARK', 0)
+    try:
+        for body, center, radius, period in ORBITS:
+            writer(handle, body, center, 'J2000', ets[0], ets[-1],
+                'BENCH {}'.format(body), degree, circle(ets, radius, period),
+                ets)
+    finally:
+        spice.spkcls(handle)
+    return path
+
+def write_ck(path, records, step=600.0, period=3600.0):
+    '''Write a spinning spacecraft bus as a single type 3 segment.'''
+    ets = epochs(records, step)
+    ticks = ets * TICKS_PER_SECOND
+    omega = 2 * numpy.pi / period
+    angle = omega * ets
+    quats = numpy.zeros((records, 4))
+    quats[:, 0] = numpy.cos(angle / 2)
+    quats[:, 3] = numpy.sin(angle / 2)
+    avvs = numpy.zeros((records, 3))
+    avvs[:, 2] = omega
+    _remove(path)
+    handle = spice.ckopn(path, 'BENCHMARK', 0)
+    try:
+        spice.ckw03(handle, ticks[0], ticks[-1], BUS, 'J2000', 'BENCH BUS',
+            ticks, quats, avvs)
+    finally:
+        spice.ckcls(handle)
+    return path
+
+def write_all(directory, records, step=600.0, spk_type=9):
+    '''Write a complete set of kernels into `directory`.
+
+    Returns
+    -------
+    paths: list of str
+        The written files.
+    '''
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    join = lambda name: os.path.join(directory, name)
+    return [
+        write_lsk(join('bench.tls')),
+        write_sclk(join('bench.tsc')),
+        write_fk(join('bench.tf')),
+        write_spk(join('bench.bsp'), records, step, spk_type),
+        write_ck(join('bench.bc'), records, step)
+    ]
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+'''Run the benchmarks on synthetic kernels and compare with earlier runs.
+
+Every run is appended to a JSON history file together with the git commit,
+so results of different revisions can be compared. Compares against the
+previous run by default and exits with 1 if any benchmark got slower than
+the threshold allows.
+
+Examples
+--------
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 100 10000 --filter body.
+    python benchmarks/run.py --baseline 3a2b1c0 --threshold 1.5
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import timeit
+import argparse
+import platform
+import tempfile
+import subprocess
+import collections
+
+import numpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+import spiceminer as sm
+import spiceminer.util as util
+import spiceminer.time_ as time_
+import spiceminer.extensions.carrington as carrington
+import spiceminer.extensions.skymap as skymap
+
+import kernels
+
+
+### Constants ###
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'history.json')
+# Records in the kernels used by all benchmarks except kernel.load
+RECORDS = 20000
+STEP = 600.0
+
+
+### Benchmark registry ###
+# name -> function(env, size) returning the callable to time
+BENCHMARKS = collections.OrderedDict()
+# Benchmarks that don't depend on the input size, they run once per size 1
+UNSIZED = set()
+
+def benchmark(name, sized=True):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        if not sized:
+            UNSIZED.add(name)
+        return func
+    return decorator
+
+def _times(size):
+    '''UNIX timestamps spread over the kernel coverage.'''
+    ets = numpy.linspace(STEP, (RECORDS - 2) * STEP, size)
+    return time_.et2posix(ets)
+
+@benchmark('import', sized=False)
+def _import(env, size):
+    # A fresh interpreter each time, so this includes its start up
+    command = [sys.executable, '-c', 'import spiceminer']
+    return lambda: subprocess.check_call(command, cwd=ROOT)
+
+@benchmark('kernel.load')
+def _kernel_load(env, size):
+    directory = os.path.join(env['tmp'], 'load{}'.format(size))
+    if not os.path.isdir(directory):
+        kernels.write_all(directory, size, STEP)
+    def run():
+        sm.load(directory)
+        sm.unload(directory)
+    return run
+
+@benchmark('body.state')
+def _body_state(env, size):
+    times = _times(size)
+    return lambda: sm.Body(kernels.SPACECRAFT).state(times, observer='SUN')
+
+@benchmark('body.state.numpy')
+def _body_state_numpy(env, size):
+    times = _times(size)
+    return lambda: sm.Body(kernels.SPACECRAFT).state(times, observer='SUN',
+        backend='numpy')
+
+@benchmark('body.position')
+def _body_position(env, size):
+    times = _times(size)
+    return lambda: sm.Body(kernels.SPACECRAFT).position(times,
+        observer='EARTH')
+
+@benchmark('body.rotation')
+def _body_rotation(env, size):
+    times = _times(size)
+    return lambda: sm.Body(kernels.BUS).rotation(times, 'J2000')
+
+@benchmark('body.rotation.numpy')
+def _body_rotation_numpy(env, size):
+    times = _times(size)
+    return lambda: sm.Body(kernels.BUS).rotation(times, 'J2000',
+        backend='numpy')
+
+@benchmark('time.posix2et')
+def _time_posix2et(env, size):
+    times = _times(size)
+    return lambda: time_.posix2et(times)
+
+@benchmark('time.et2posix')
+def _time_et2posix(env, size):
+    ets = numpy.linspace(0, 1e9, size)
+    return lambda: time_.et2posix(ets)
+
+@benchmark('time.Time.fromposix')
+def _time_fromposix(env, size):
+    times = _times(size)
+    return lambda: [sm.Time.fromposix(t) for t in times]
+
+@benchmark('timewindows.fromarray')
+def _timewindows_fromarray(env, size):
+    starts = numpy.sort(numpy.random.RandomState(0).uniform(0, 1e9, size))
+    array = numpy.array([starts, starts + 1e9 / size]).T
+    return lambda: util.TimeWindows.fromarray(array)
+
+@benchmark('timewindows.add')
+def _timewindows_add(env, size):
+    starts = numpy.arange(size) * 10.0
+    first = util.TimeWindows.fromarray(numpy.array([starts, starts + 3]).T)
+    second = util.TimeWindows.fromarray(numpy.array([starts + 5,
+        starts + 8]).T)
+    return lambda: first + second
+
+@benchmark('extensions.carrington')
+def _extensions_carrington(env, size):
+    times = _times(size)
+    return lambda: carrington.carr_nums(times)
+
+@benchmark('extensions.skymap')
+def _extensions_skymap(env, size):
+    times = _times(size)
+    mapper = skymap.SkyMapper.ellipse(kernels.BUS, (0.2, 0.1),
+        resolution=(90, 45))
+    return lambda: mapper.fixed(times, frame='J2000')
+
+
+### Running ###
+def measure(func, repeat):
+    '''Best time of `repeat` runs, the first run is a warm up.'''
+    func()
+    return min(timeit.Timer(func).repeat(repeat, 1))
+
+def run(names, sizes, repeat, log=sys.stdout):
+    env = {'tmp': tempfile.mkdtemp(prefix='spiceminer-bench-')}
+    directory = os.path.join(env['tmp'], 'main')
+    kernels.write_all(directory, RECORDS, STEP)
+    sm.load(directory)
+    results = collections.OrderedDict()
+    try:
+        for name in names:
+            results[name] = collections.OrderedDict()
+            for size in ([1] if name in UNSIZED else sizes):
+                seconds = measure(BENCHMARKS[name](env, size), repeat)
+                results[name][str(size)] = seconds
+                log.write('{:<28} {:>8} {:>12.6f}s\n'.format(name, size,
+                    seconds))
+    finally:
+        sm.unload(directory)
+        shutil.rmtree(env['tmp'])
+    return results
+
+
+### History ###
+def _commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short',
+            'HEAD'], cwd=ROOT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_history(path, history):
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=1)
+
+def make_entry(results):
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'machine': platform.node(),
+        'results': results
+    }
+
+def find_baseline(history, ref=None):
+    '''The latest entry with commit `ref`, or the latest entry.'''
+    for entry in reversed(history):
+        if ref is None or (entry['commit'] or '').startswith(ref):
+            return entry
+    return None
+
+def compare(baseline, results, threshold):
+    '''Ratios of new to old times.
+
+    Returns
+    -------
+    rows: list of tuple
+        (name, size, old, new, ratio) for all benchmarks in both runs.
+    regressions: list of tuple
+        The rows with a ratio above `threshold`.
+    '''
+    rows = []
+    for name, sizes in results.items():
+        for size, new in sizes.items():
+            old = baseline['results'].get(name, {}).get(size)
+            if old:
+                rows.append((name, size, old, new, new / old))
+    return rows, [row for row in rows if row[-1] > threshold]
+
+
+### Command line ###
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the spiceminer '
+        'benchmarks on synthetic kernels.')
+    parser.add_argument('-s', '--sizes', nargs='+', type=int,
+        default=DEFAULT_SIZES, help='Input sizes. DEFAULT: {}'.format(
+        DEFAULT_SIZES))
+    parser.add_argument('-f', '--filter', type=str, default='',
+        help='Only run benchmarks whose name starts with this prefix.')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+        help='Runs per benchmark, the best one counts. DEFAULT: 5')
+    parser.add_argument('--history', type=str, default=DEFAULT_HISTORY,
+        help='JSON file with earlier results.')
+    parser.add_argument('--baseline', type=str, default=None,
+        help='Commit to compare with. DEFAULT: the previous run')
+    parser.add_argument('--threshold', type=float, default=1.25,
+        help='Allowed slowdown factor. DEFAULT: 1.25')
+    parser.add_argument('--no-save', action='store_true',
+        help="Don't add the results to the history.")
+    ns = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    names = [name for name in BENCHMARKS if name.startswith(ns.filter)]
+    results = run(names, ns.sizes, ns.repeat)
+    history = load_history(ns.history)
+    baseline = find_baseline(history, ns.baseline)
+    if not ns.no_save:
+        history.append(make_entry(results))
+        save_history(ns.history, history)
+    if baseline is None:
+        return 0
+    rows, regressions = compare(baseline, results, ns.threshold)
+    print('\nCompared with {} ({}):'.format(baseline['commit'],
+        baseline['time']))
+    for name, size, old, new, ratio in rows:
+        flag = ' <- slower' if ratio > ns.threshold else ''
+        print('{:<28} {:>8} {:>12.6f}s {:>12.6f}s {:>6.2f}x{}'.format(name,
+            size, old, new, ratio, flag))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,14 +7,42 @@
 #define ERROR_LEN 26
 
 
-/* Every function MUST return the error message */
+/* Every function MUST return the error message or NULL */
+
+/* Messages are written to static buffers instead of being allocated per
+ * failure. This is safe, because the python side serializes all calls and
+ * ctypes copies the message before the next call. */
+extern char ERROR_MESSAGE[STR_LEN_MAX];
+extern char BATCH_MESSAGE[ERROR_LEN];
+extern int BATCH_FAILED;
 
 #define CHECK_EXCEPTION {\
     if(failed_c()) {\
-        char* message = malloc(sizeof(char) * STR_LEN_MAX);\
-        getmsg_c("LONG", STR_LEN_MAX, message);\
+        getmsg_c("LONG", STR_LEN_MAX, ERROR_MESSAGE);\
         reset_c();\
-        return message;\
+        return ERROR_MESSAGE;\
+    }\
+}
+
+/* Status codes of batch items */
+#define STATUS_ERROR -1
+#define STATUS_NODATA 0
+#define STATUS_OK 1
+
+int batch_status(void);
+
+/* Batch functions store a status code per item instead of returning the
+ * message, only the short message of one failure is kept */
+#define BEGIN_BATCH {\
+    BATCH_MESSAGE[0] = '\0';\
+    BATCH_FAILED = 0;\
+}
+
+#define CHECK_EXCEPTION_ITEM(flag) {\
+    if(failed_c()) {\
+        flag = batch_status();\
+    } else {\
+        flag = STATUS_OK;\
     }\
 }
 
@@ -1,5 +1,40 @@
+#include <string.h>
 #include "CustomSpice.h"
 
+char ERROR_MESSAGE[STR_LEN_MAX];
+char BATCH_MESSAGE[ERROR_LEN];
+int BATCH_FAILED;
+
+/* Classify and reset the current error of a batch item. Missing data is
+ * expected for times outside of the kernel coverage, everything else is
+ * reported as an error. The message of the first error is kept, otherwise
+ * the one of the last item without data. */
+int batch_status(void) {
+    char message[ERROR_LEN];
+    int status = STATUS_ERROR;
+    getmsg_c("SHORT", ERROR_LEN, message);
+    reset_c();
+    if(strcmp(message, "SPICE(SPKINSUFFDATA)") == 0 ||
+            strcmp(message, "SPICE(NOFRAMECONNECT)") == 0 ||
+            strcmp(message, "SPICE(FRAMEDATANOTFOUND)") == 0 ||
+            strcmp(message, "SPICE(VALUEOUTOFRANGE)") == 0) {
+        status = STATUS_NODATA;
+    }
+    if(!BATCH_FAILED) {
+        strcpy(BATCH_MESSAGE, message);
+        BATCH_FAILED = status == STATUS_ERROR;
+    }
+    return status;
+}
+
+/* Short message of a failed item of the last batch call, or NULL */
+char* batch_error_custom(void) {
+    if(BATCH_MESSAGE[0] == '\0') {
+        return NULL;
+    }
+    return BATCH_MESSAGE;
+}
+
 /* Get/set action to perform on error */
 char* erract_custom(char* op, char* action) {
     erract_c(op, STR_LEN_MAX, action);
@@ -21,44 +21,13 @@ char* unload_custom(char* path) {
     FINALIZE
 }
 
-/* Find all IDs in a spk file */
-char* spkobj_custom(char* path, SpiceCell* ids) {
-    spkobj_c(path, ids);
-    CHECK_EXCEPTION
-    FINALIZE
-}
-
-/* Get coverage window for an object in a spk file */
-char* spkcov_custom(char* path, int idcode, SpiceCell* cover) {
-    spkcov_c(path, idcode, cover);
-    CHECK_EXCEPTION
-    FINALIZE
-}
-
-/* Find all IDs in a ck file */
-char* ckobj_custom(char* path, SpiceCell* ids) {
-    ckobj_c(path, ids);
-    CHECK_EXCEPTION
-    FINALIZE
-}
-
-/* Get coverage window for an object in a ck file */
-char* ckcov_custom(char* path, int idcode, SpiceCell* cover) {
-    ckcov_c(path, idcode, SPICEFALSE, "SEGMENT", 0.0, "TDB", cover);
-    CHECK_EXCEPTION
-    FINALIZE
-}
-
-/* Find all frames in a spk file */
-char* pckfrm_custom(char* path, SpiceCell* ids) {
-    pckfrm_c(path, ids);
-    CHECK_EXCEPTION
-    FINALIZE
-}
-
-/* Get coverage window for an object in a spk file */
-char* pckcov_custom(char* path, int idcode, SpiceCell* cover) {
-    pckcov_c(path, idcode, cover);
-    CHECK_EXCEPTION
+/* Get double precision values from the kernel pool */
+char* gdpool_custom(char* name, int start, int room, int* n, double* values, int* found) {
+    SpiceInt n_spice;
+    SpiceBoolean found_spice;
+    gdpool_c(name, start, room, &n_spice, values, &found_spice);
+    CHECK_EXCEPTION
+    *n = (int)n_spice;
+    *found = (int)found_spice;
     FINALIZE
 }
@@ -26,3 +26,25 @@ char* namfrm_custom(char* name, int* code) {
     *code = (int)code_spice;
     FINALIZE
 }
+
+/* Get the center, class and class id of a frame */
+char* frinfo_custom(int code, int* center, int* frclass, int* classid, int* found) {
+    SpiceInt center_spice, frclass_spice, classid_spice;
+    SpiceBoolean found_spice;
+    frinfo_c(code, &center_spice, &frclass_spice, &classid_spice, &found_spice);
+    CHECK_EXCEPTION
+    *center = (int)center_spice;
+    *frclass = (int)frclass_spice;
+    *classid = (int)classid_spice;
+    *found = (int)found_spice;
+    FINALIZE
+}
+
+/* Get the SCLK or SPK id associated with a CK id */
+char* ckmeta_custom(int ckid, char* meta, int* idcode) {
+    SpiceInt idcode_spice;
+    ckmeta_c(ckid, meta, &idcode_spice);
+    CHECK_EXCEPTION
+    *idcode = (int)idcode_spice;
+    FINALIZE
+}
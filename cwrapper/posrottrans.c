@@ -1,3 +1,4 @@
+#include <string.h>
 #include "CustomSpice.h"
 
 char* spkpos_custom(char* target, double et, char* ref, char* abcorr, char* observer, double starg[3], double* lt) {
@@ -57,3 +58,69 @@ char* fovtrg_custom(char* inst, char* target, char* tshape, char* tframe, char*
     CHECK_EXCEPTION
     FINALIZE
 }
+
+/* Batched versions, one call for n epochs. Failed epochs are marked in found */
+char* spkpos_array_custom(char* target, int n, double* ets, char* ref, char* abcorr, char* observer, double* positions, double* lts, int* found) {
+    int i;
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        spkpos_c(target, ets[i], ref, abcorr, observer, positions + 3 * i, lts + i);
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
+
+char* spkezr_array_custom(char* target, int n, double* ets, char* ref, char* abcorr, char* observer, double* states, double* lts, int* found) {
+    int i;
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        spkezr_c(target, ets[i], ref, abcorr, observer, states + 6 * i, lts + i);
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
+
+char* pxform_array_custom(char* from, char* to, int n, double* ets, double* rotate, int* found) {
+    int i;
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        pxform_c(from, to, ets[i], (SpiceDouble (*)[3]) (rotate + 9 * i));
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
+
+/* Find the time windows in [et0, et1] during which a target is in the field of view of an instrument.
+ * A too small result cell is no error, complete is set to 0 instead so the caller can retry with a larger one. */
+char* gftfov_custom(char* inst, char* target, char* tshape, char* tframe, char* abcorr, char* observer, double step, double et0, double et1, SpiceCell* result, int* complete) {
+    SPICEDOUBLE_CELL(cnfine, 2);
+    char message[ERROR_LEN];
+    *complete = 1;
+    scard_c(0, &cnfine);
+    wninsd_c(et0, et1, &cnfine);
+    CHECK_EXCEPTION
+    gftfov_c(inst, target, tshape, tframe, abcorr, observer, step, &cnfine, result);
+    if(failed_c()) {
+        getmsg_c("SHORT", ERROR_LEN, message);
+        if(strcmp(message, "SPICE(WINDOWEXCESS)") == 0) {
+            reset_c();
+            *complete = 0;
+        }
+    }
+    CHECK_EXCEPTION
+    FINALIZE
+}
+
+/* State transformation matrices, rotation quaternions and angular velocities for n epochs */
+char* sxform_array_custom(char* from, char* to, int n, double* ets, double* xforms, double* quats, double* avs, int* found) {
+    int i;
+    SpiceDouble rot[3][3];
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        sxform_c(from, to, ets[i], (SpiceDouble (*)[6]) (xforms + 36 * i));
+        xf2rav_c((SpiceDouble (*)[6]) (xforms + 36 * i), rot, avs + 3 * i);
+        m2q_c(rot, quats + 4 * i);
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
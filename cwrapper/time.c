@@ -26,3 +26,35 @@ char* unitim_custom(double* et, char* insys, char* outsys) {
     *et = (double) et_spice;
     FINALIZE
 }
+
+/* Batched version of deltet_custom, stops at the first failure */
+char* deltet_array_custom(int n, double* epochs, char* eptype, double* deltas) {
+    int i;
+    for(i = 0; i < n; i++) {
+        deltet_c(epochs[i], eptype, deltas + i);
+        CHECK_EXCEPTION
+    }
+    FINALIZE
+}
+
+/* Convert ephemeris times to continuous spacecraft clock ticks */
+char* sce2c_array_custom(int sc, int n, double* ets, double* ticks, int* found) {
+    int i;
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        sce2c_c(sc, ets[i], ticks + i);
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
+
+/* Convert spacecraft clock ticks to ephemeris times */
+char* sct2e_array_custom(int sc, int n, double* ticks, double* ets, int* found) {
+    int i;
+    BEGIN_BATCH
+    for(i = 0; i < n; i++) {
+        sct2e_c(sc, ticks[i], ets + i);
+        CHECK_EXCEPTION_ITEM(found[i])
+    }
+    FINALIZE
+}
@@ -0,0 +1,64 @@
+#include "CustomSpice.h"
+
+/* Open a new spk file */
+char* spkopn_custom(char* path, char* ifname, int ncomch, int* handle) {
+    SpiceInt handle_spice;
+    spkopn_c(path, ifname, ncomch, &handle_spice);
+    CHECK_EXCEPTION
+    *handle = (int)handle_spice;
+    FINALIZE
+}
+
+/* Write a type 9 (lagrange, unequal time steps) spk segment */
+char* spkw09_custom(int handle, int body, int center, char* frame,
+        double first, double last, char* segid, int degree, int n,
+        double* states, double* epochs) {
+    spkw09_c(handle, body, center, frame, first, last, segid, degree, n,
+        (ConstSpiceDouble (*)[6])states, epochs);
+    CHECK_EXCEPTION
+    FINALIZE
+}
+
+/* Write a type 13 (hermite, unequal time steps) spk segment */
+char* spkw13_custom(int handle, int body, int center, char* frame,
+        double first, double last, char* segid, int degree, int n,
+        double* states, double* epochs) {
+    spkw13_c(handle, body, center, frame, first, last, segid, degree, n,
+        (ConstSpiceDouble (*)[6])states, epochs);
+    CHECK_EXCEPTION
+    FINALIZE
+}
+
+/* Close a spk file */
+char* spkcls_custom(int handle) {
+    spkcls_c(handle);
+    CHECK_EXCEPTION
+    FINALIZE
+}
+
+/* Open a new ck file */
+char* ckopn_custom(char* path, char* ifname, int ncomch, int* handle) {
+    SpiceInt handle_spice;
+    ckopn_c(path, ifname, ncomch, &handle_spice);
+    CHECK_EXCEPTION
+    *handle = (int)handle_spice;
+    FINALIZE
+}
+
+/* Write a type 3 (linear interpolation) ck segment */
+char* ckw03_custom(int handle, double begtim, double endtim, int inst,
+        char* ref, int avflag, char* segid, int nrec, double* sclkdp,
+        double* quats, double* avvs, int nints, double* starts) {
+    ckw03_c(handle, begtim, endtim, inst, ref, avflag, segid, nrec, sclkdp,
+        (ConstSpiceDouble (*)[4])quats, (ConstSpiceDouble (*)[3])avvs, nints,
+        starts);
+    CHECK_EXCEPTION
+    FINALIZE
+}
+
+/* Close a ck file */
+char* ckcls_custom(int handle) {
+    ckcls_c(handle);
+    CHECK_EXCEPTION
+    FINALIZE
+}
@@ -161,7 +161,12 @@ metadata = {
 # setuptools only arguments
 if has_setuptools:
     metadata.update({
-    'tests_require': ['pytest>=2.6.1']
+    # aio (and through it the server) uses concurrent.futures
+    'install_requires': ['numpy', 'futures; python_version < "3"'],
+    'tests_require': ['pytest>=2.6.1'],
+    'entry_points': {
+        'console_scripts': ['spiceminer = spiceminer.__main__:main']
+    }
 })
 
 
@@ -1,11 +1,50 @@
 #-*- coding:utf-8 -*-
 
-from . import extensions
+import sys
+import types
+import importlib
+
 from .time_ import *
 from .bodies import *
 from .kernel import *
+from .cache import *
 from ._spicewrapper import SpiceError
+from .profiling import stats, reset_stats, profile
 from .extra import angle, cartesian2sphere, sphere2cartesian #, frange, dtrange
 
 
 __version__ = '0.1.0'
+
+
+### Lazy attributes ###
+# Subpackages imported on first access to keep `import spiceminer` cheap
+_LAZY = frozenset(['extensions', 'simple'])
+
+
+class _LazyModule(types.ModuleType):
+    '''Package module that imports the subpackages in `_LAZY` on first
+    access.'''
+
+    def __getattr__(self, name):
+        if name not in _LAZY:
+            msg = "'module' object has no attribute '{}'"
+            raise AttributeError(msg.format(name))
+        module = importlib.import_module('.' + name, __name__)
+        setattr(self, name, module)
+        return module
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY))
+
+
+def _install():
+    module = sys.modules[__name__]
+    lazy = _LazyModule(__name__, module.__doc__)
+    lazy.__dict__.update(module.__dict__)
+    # Keep the original module alive, python 2 clears the globals of
+    # collected modules
+    lazy._module = module
+    sys.modules[__name__] = lazy
+
+_install()
+del _install
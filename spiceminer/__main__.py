@@ -0,0 +1,34 @@
+#-*- coding:utf-8 -*-
+
+import sys
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='spiceminer',
+        description='spiceminer command line tools.')
+    commands = parser.add_subparsers(dest='command')
+    serve = commands.add_parser('serve',
+        help='Load kernels once and answer queries over a local socket.')
+    serve.add_argument('kernels', nargs='+', metavar='PATH', type=str,
+        help='Kernel files or directories to load.')
+    address = serve.add_mutually_exclusive_group(required=True)
+    address.add_argument('-s', '--socket', type=str,
+        help='Path of the unix socket to listen on.')
+    address.add_argument('-p', '--port', type=int,
+        help='Port to listen on at localhost.')
+    serve.add_argument('-w', '--workers', type=int, default=0,
+        help='Number of worker processes. DEFAULT: evaluate in the server '
+        'process')
+    ns = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if ns.command == 'serve':
+        from .server import serve as run
+        address = ns.socket or ('localhost', ns.port)
+        run(ns.kernels, address, ns.workers)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
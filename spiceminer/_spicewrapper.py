@@ -3,11 +3,16 @@
 import os
 import glob
 import ctypes
+import functools
+import threading
 
 import numpy
 
 from ctypes import c_void_p, c_bool, c_int, c_double, c_char, c_char_p
 from ctypes import cast, sizeof, byref, POINTER, Structure
+from numpy.ctypeslib import ndpointer
+
+from . import profiling
 
 root = os.path.dirname(__file__)
 for suffix in ['so', 'dll']:
@@ -21,12 +26,65 @@ if cwrapper is None:
     raise ImportError("Can't find libspice c-library")
 #cwrapper = next(glob.iglob(cwrapper)) #TODO find better system independant alternative for glob
 del os, glob, root
-cspice = ctypes.CDLL(cwrapper)
-del cwrapper
 BITSIZE = {'char': sizeof(c_char), 'int': sizeof(c_int), 'double': sizeof(c_double)}
 del sizeof
-cspice.erract_custom('SET', 'RETURN')
-cspice.errdev_custom('SET', 'NULL')
+
+
+### Deferred library loading ###
+class _Prototype(object):
+    '''Collects argtypes, restype and errcheck of a library function until
+    the library is loaded. Calling it loads the library.'''
+
+    def __init__(self, library, name):
+        self._library = library
+        self._name = name
+
+    def _bind(self, cdll):
+        func = getattr(cdll, self._name)
+        for attr in ('argtypes', 'restype', 'errcheck'):
+            if attr in vars(self):
+                setattr(func, attr, vars(self)[attr])
+        return func
+
+    def __call__(self, *args):
+        func = self._bind(self._library._load())
+        setattr(self._library, self._name, func)
+        return func(*args)
+
+
+class _Library(object):
+    '''Stand-in for the ctypes.CDLL of libspice. The library is loaded and
+    initialized on the first call of any of its functions, after that the
+    real functions are plain attributes.'''
+
+    def __init__(self, path):
+        self._path = path
+        self._cdll = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._cdll is None:
+            func = _Prototype(self, name)
+        else:
+            func = getattr(self._cdll, name)
+        setattr(self, name, func)
+        return func
+
+    def _load(self):
+        with LOCK:
+            if self._cdll is None:
+                cdll = ctypes.CDLL(self._path)
+                for name, value in list(vars(self).items()):
+                    if isinstance(value, _Prototype):
+                        setattr(self, name, value._bind(cdll))
+                self._cdll = cdll
+                self.erract_custom('SET', 'RETURN')
+                self.errdev_custom('SET', 'NULL')
+            return self._cdll
+
+cspice = _Library(cwrapper)
+del cwrapper
 
 
 ### Exceptions ###
@@ -136,16 +194,65 @@ class SpiceCell(Structure):
         self.init = 0
 
 
+# Argument types for batched functions working on numpy arrays
+DOUBLE_ARRAY = ndpointer(dtype=numpy.float64, flags='C_CONTIGUOUS')
+INT_ARRAY = ndpointer(dtype=numpy.intc, flags='C_CONTIGUOUS')
+
+def _as_et_array(ets):
+    return numpy.ascontiguousarray(ets, dtype=numpy.float64).reshape(-1)
+
+
+# CSPICE is not reentrant and keeps global state (kernel pool, error status),
+# so every call into the library holds this lock. Batched functions acquire
+# it once per array, not once per element.
+LOCK = threading.RLock()
+
+def _locked(func):
+    '''Serialize calls of a wrapper function with `LOCK` and count them if
+    profiling is enabled.'''
+    name = 'spice.' + func.__name__
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with LOCK:
+            if profiling.enabled:
+                return profiling.record(name, func, *args, **kwargs)
+            return func(*args, **kwargs)
+    return wrapper
+
+
 def errcheck(result, func, args):
     if result:
         raise SpiceError(result)
     return args[-1] #XXX is -1 always 'found'?
 
+# Status codes stored per item by the batched (*_array) functions, failed
+# items don't raise, the message of one of them is fetched on demand
+STATUS_ERROR = -1
+STATUS_NODATA = 0
+STATUS_OK = 1
+
+cspice.batch_error_custom.argtypes = []
+cspice.batch_error_custom.restype = c_char_p
+@_locked
+def batch_error():
+    '''Short message of the first item of the last batched call that failed
+    with an error, else of the last item without data, or None if all items
+    succeeded.'''
+    return cspice.batch_error_custom()
+
+def _found(status):
+    '''Mask of the items with data. Missing data is expected, any other
+    failure raises a SpiceError.'''
+    if (status == STATUS_ERROR).any():
+        raise SpiceError(batch_error())
+    return status == STATUS_OK
+
 
 ### Kernel/Frame id <-> name ###
 cspice.bodn2c_custom.argtypes = [c_char_p, POINTER(c_int), POINTER(c_int)]
 cspice.bodn2c_custom.restype = c_char_p
 cspice.bodn2c_custom.errcheck = errcheck
+@_locked
 def bodn2c(name):
     code = c_int()
     found = c_int()
@@ -157,6 +264,7 @@ def bodn2c(name):
 cspice.bodc2n_custom.argtypes = [c_int, c_char_p, POINTER(c_int)]
 cspice.bodc2n_custom.restype = c_char_p
 cspice.bodc2n_custom.errcheck = errcheck
+@_locked
 def bodc2n(code):
     name = ctypes.create_string_buffer(256) #TODO move buffer creation to c-implementation
     found = c_int()
@@ -168,6 +276,7 @@ def bodc2n(code):
 cspice.namfrm_custom.argtypes = [c_char_p, POINTER(c_int)]
 cspice.namfrm_custom.restype = c_char_p
 cspice.namfrm_custom.errcheck = errcheck
+@_locked
 def namfrm(name):
     code = c_int()
     cspice.namfrm_custom(name, byref(code))
@@ -175,10 +284,32 @@ def namfrm(name):
         return None
     return code.value
 
+cspice.frinfo_custom.argtypes = [c_int] + [POINTER(c_int)] * 4
+cspice.frinfo_custom.restype = c_char_p
+cspice.frinfo_custom.errcheck = errcheck
+@_locked
+def frinfo(code):
+    center, frclass, classid, found = c_int(), c_int(), c_int(), c_int()
+    cspice.frinfo_custom(code, byref(center), byref(frclass), byref(classid),
+        byref(found))
+    if not found:
+        return None
+    return center.value, frclass.value, classid.value
+
+cspice.ckmeta_custom.argtypes = [c_int, c_char_p, POINTER(c_int)]
+cspice.ckmeta_custom.restype = c_char_p
+cspice.ckmeta_custom.errcheck = errcheck
+@_locked
+def ckmeta(ckid, meta):
+    idcode = c_int()
+    cspice.ckmeta_custom(ckid, meta, byref(idcode))
+    return idcode.value
+
 ### Kernel (un)load ###
 cspice.getfat_custom.argtypes = [c_char_p, c_int, c_int, c_char_p, c_char_p]
 cspice.getfat_custom.restype = c_char_p
 cspice.getfat_custom.errcheck = errcheck
+@_locked
 def getfat(path):
     arch = (c_char * 4)()
     type_ = (c_char * 4)()
@@ -188,55 +319,110 @@ def getfat(path):
 cspice.furnsh_custom.argtypes = [c_char_p]
 cspice.furnsh_custom.restype = c_char_p
 cspice.furnsh_custom.errcheck = errcheck
+@_locked
 def furnsh(path):
     cspice.furnsh_custom(path)
 
 cspice.unload_custom.argtypes = [c_char_p]
 cspice.unload_custom.restype = c_char_p
 cspice.unload_custom.errcheck = errcheck
+@_locked
 def unload(path):
     cspice.unload_custom(path)
 
-cspice.spkobj_custom.argtypes = [c_char_p, POINTER(SpiceCell)]
-cspice.spkobj_custom.restype = c_char_p
-cspice.spkobj_custom.errcheck = errcheck
-def spkobj(path, cell):
-    cspice.spkobj_custom(path, byref(cell))
-
-cspice.spkcov_custom.argtypes = [c_char_p, c_int, POINTER(SpiceCell)]
-cspice.spkcov_custom.restype = c_char_p
-cspice.spkcov_custom.errcheck = errcheck
-def spkcov(path, idcode, cell):
-    cspice.spkcov_custom(path, idcode, byref(cell))
-
-cspice.ckobj_custom.argtypes = [c_char_p, POINTER(SpiceCell)]
-cspice.ckobj_custom.restype = c_char_p
-cspice.ckobj_custom.errcheck = errcheck
-def ckobj(path, cell):
-    cspice.ckobj_custom(path, byref(cell))
-
-cspice.ckcov_custom.argtypes = [c_char_p, c_int, POINTER(SpiceCell)]
-cspice.ckcov_custom.restype = c_char_p
-cspice.ckcov_custom.errcheck = errcheck
-def ckcov(path, idcode, cell):
-    cspice.ckcov_custom(path, idcode, byref(cell))
-
-cspice.pckfrm_custom.argtypes = [c_char_p, POINTER(SpiceCell)]
-cspice.pckfrm_custom.restype = c_char_p
-cspice.pckfrm_custom.errcheck = errcheck
-def pckfrm(path, cell):
-    cspice.pckfrm_custom(path, byref(cell))
-
-cspice.pckcov_custom.argtypes = [c_char_p, c_int, POINTER(SpiceCell)]
-cspice.pckcov_custom.restype = c_char_p
-cspice.pckcov_custom.errcheck = errcheck
-def pckcov(path, idcode, cell):
-    cspice.pckcov_custom(path, idcode, byref(cell))
+cspice.gdpool_custom.argtypes = [c_char_p, c_int, c_int, POINTER(c_int),
+    DOUBLE_ARRAY, POINTER(c_int)]
+cspice.gdpool_custom.restype = c_char_p
+cspice.gdpool_custom.errcheck = errcheck
+@_locked
+def gdpool(name, room=256):
+    values = numpy.empty(room)
+    n = c_int()
+    found = c_int()
+    cspice.gdpool_custom(name, 0, room, byref(n), values, byref(found))
+    if not found:
+        return None
+    return values[:n.value]
+
+### Kernel writing ###
+cspice.spkopn_custom.argtypes = [c_char_p, c_char_p, c_int, POINTER(c_int)]
+cspice.spkopn_custom.restype = c_char_p
+cspice.spkopn_custom.errcheck = errcheck
+@_locked
+def spkopn(path, ifname, ncomch=0):
+    handle = c_int()
+    cspice.spkopn_custom(path, ifname, ncomch, byref(handle))
+    return handle.value
+
+cspice.spkw09_custom.argtypes = [c_int, c_int, c_int, c_char_p, c_double,
+    c_double, c_char_p, c_int, c_int, DOUBLE_ARRAY, DOUBLE_ARRAY]
+cspice.spkw09_custom.restype = c_char_p
+cspice.spkw09_custom.errcheck = errcheck
+@_locked
+def spkw09(handle, body, center, frame, first, last, segid, degree, states,
+    epochs):
+    states = numpy.ascontiguousarray(states, dtype=numpy.float64)
+    epochs = _as_et_array(epochs)
+    cspice.spkw09_custom(handle, body, center, frame, first, last, segid,
+        degree, len(epochs), states, epochs)
+
+cspice.spkw13_custom.argtypes = cspice.spkw09_custom.argtypes
+cspice.spkw13_custom.restype = c_char_p
+cspice.spkw13_custom.errcheck = errcheck
+@_locked
+def spkw13(handle, body, center, frame, first, last, segid, degree, states,
+    epochs):
+    states = numpy.ascontiguousarray(states, dtype=numpy.float64)
+    epochs = _as_et_array(epochs)
+    cspice.spkw13_custom(handle, body, center, frame, first, last, segid,
+        degree, len(epochs), states, epochs)
+
+cspice.spkcls_custom.argtypes = [c_int]
+cspice.spkcls_custom.restype = c_char_p
+cspice.spkcls_custom.errcheck = errcheck
+@_locked
+def spkcls(handle):
+    cspice.spkcls_custom(handle)
+
+cspice.ckopn_custom.argtypes = [c_char_p, c_char_p, c_int, POINTER(c_int)]
+cspice.ckopn_custom.restype = c_char_p
+cspice.ckopn_custom.errcheck = errcheck
+@_locked
+def ckopn(path, ifname, ncomch=0):
+    handle = c_int()
+    cspice.ckopn_custom(path, ifname, ncomch, byref(handle))
+    return handle.value
+
+cspice.ckw03_custom.argtypes = [c_int, c_double, c_double, c_int, c_char_p,
+    c_int, c_char_p, c_int, DOUBLE_ARRAY, DOUBLE_ARRAY, DOUBLE_ARRAY, c_int,
+    DOUBLE_ARRAY]
+cspice.ckw03_custom.restype = c_char_p
+cspice.ckw03_custom.errcheck = errcheck
+@_locked
+def ckw03(handle, begtim, endtim, inst, ref, segid, sclkdp, quats, avvs=None,
+    starts=None):
+    sclkdp = _as_et_array(sclkdp)
+    quats = numpy.ascontiguousarray(quats, dtype=numpy.float64)
+    avflag = avvs is not None
+    if avvs is None:
+        avvs = numpy.zeros((len(sclkdp), 3))
+    avvs = numpy.ascontiguousarray(avvs, dtype=numpy.float64)
+    starts = _as_et_array(sclkdp[:1] if starts is None else starts)
+    cspice.ckw03_custom(handle, begtim, endtim, inst, ref, avflag, segid,
+        len(sclkdp), sclkdp, quats, avvs, len(starts), starts)
+
+cspice.ckcls_custom.argtypes = [c_int]
+cspice.ckcls_custom.restype = c_char_p
+cspice.ckcls_custom.errcheck = errcheck
+@_locked
+def ckcls(handle):
+    cspice.ckcls_custom(handle)
 
 ### Time conversion ###
 cspice.utc2et_custom.argtypes = [c_char_p, POINTER(c_double)]
 cspice.utc2et_custom.restype = c_char_p
 cspice.utc2et_custom.errcheck = errcheck
+@_locked
 def utc2et(time_string): # Outdatet and unused
     et = c_double()
     cspice.utc2et_custom(time_string, byref(et))
@@ -245,6 +431,7 @@ def utc2et(time_string): # Outdatet and unused
 cspice.deltet_custom.argtypes = [c_double, c_char_p, POINTER(c_double)]
 cspice.deltet_custom.restype = c_char_p
 cspice.deltet_custom.errcheck = errcheck
+@_locked
 def deltet(time, source_format):
     delta = c_double()
     cspice.deltet_custom(time, source_format, byref(delta))
@@ -253,16 +440,53 @@ def deltet(time, source_format):
 cspice.unitim_custom.argtypes = [POINTER(c_double), c_char_p, c_char_p]
 cspice.unitim_custom.restype = c_char_p
 cspice.unitim_custom.errcheck = errcheck
+@_locked
 def unitim(et, insys, outsys):
     et = c_double(et)
     cspice.unitim_custom(byref(et), insys, outsys)
     return et.value
 
+cspice.deltet_array_custom.argtypes = [c_int, DOUBLE_ARRAY, c_char_p,
+    DOUBLE_ARRAY]
+cspice.deltet_array_custom.restype = c_char_p
+cspice.deltet_array_custom.errcheck = errcheck
+@_locked
+def deltet_array(times, source_format):
+    times = _as_et_array(times)
+    deltas = numpy.empty_like(times)
+    cspice.deltet_array_custom(len(times), times, source_format, deltas)
+    return deltas
+
+cspice.sce2c_array_custom.argtypes = [c_int, c_int, DOUBLE_ARRAY,
+    DOUBLE_ARRAY, INT_ARRAY]
+cspice.sce2c_array_custom.restype = c_char_p
+cspice.sce2c_array_custom.errcheck = errcheck
+@_locked
+def sce2c_array(sc, ets):
+    ets = _as_et_array(ets)
+    ticks = numpy.empty_like(ets)
+    found = numpy.empty(len(ets), dtype=numpy.intc)
+    cspice.sce2c_array_custom(sc, len(ets), ets, ticks, found)
+    return ticks, _found(found)
+
+cspice.sct2e_array_custom.argtypes = [c_int, c_int, DOUBLE_ARRAY,
+    DOUBLE_ARRAY, INT_ARRAY]
+cspice.sct2e_array_custom.restype = c_char_p
+cspice.sct2e_array_custom.errcheck = errcheck
+@_locked
+def sct2e_array(sc, ticks):
+    ticks = _as_et_array(ticks)
+    ets = numpy.empty_like(ticks)
+    found = numpy.empty(len(ticks), dtype=numpy.intc)
+    cspice.sct2e_array_custom(sc, len(ticks), ticks, ets, found)
+    return ets, _found(found)
+
 ### Get position, velocity, etc. ###
 cspice.spkpos_custom.argtypes = [c_char_p, c_double, c_char_p, c_char_p,
     c_char_p, POINTER(c_double * 3), POINTER(c_double)]
 cspice.spkpos_custom.restype = c_char_p
 cspice.spkpos_custom.errcheck = errcheck
+@_locked
 def spkpos(target, et, ref, abcorr, observer):
     output = (c_double * 3)()
     light_time = c_double()
@@ -274,6 +498,7 @@ cspice.spkezr_custom.argtypes = [c_char_p, c_double, c_char_p, c_char_p,
     c_char_p, POINTER(c_double * 6), POINTER(c_double)]
 cspice.spkezr_custom.restype = c_char_p
 cspice.spkezr_custom.errcheck = errcheck
+@_locked
 def spkezr(target, et, ref, abcorr, observer):
     output = (c_double * 6)()
     light_time = c_double()
@@ -281,19 +506,76 @@ def spkezr(target, et, ref, abcorr, observer):
         byref(light_time))
     return output[::], light_time.value #XXX is light_time usefull?
 
+cspice.spkpos_array_custom.argtypes = [c_char_p, c_int, DOUBLE_ARRAY,
+    c_char_p, c_char_p, c_char_p, DOUBLE_ARRAY, DOUBLE_ARRAY, INT_ARRAY]
+cspice.spkpos_array_custom.restype = c_char_p
+cspice.spkpos_array_custom.errcheck = errcheck
+@_locked
+def spkpos_array(target, ets, ref, abcorr, observer):
+    ets = _as_et_array(ets)
+    positions = numpy.empty((len(ets), 3))
+    light_times = numpy.empty(len(ets))
+    found = numpy.empty(len(ets), dtype=numpy.intc)
+    cspice.spkpos_array_custom(target, len(ets), ets, ref, abcorr, observer,
+        positions, light_times, found)
+    return positions, light_times, _found(found)
+
+cspice.spkezr_array_custom.argtypes = [c_char_p, c_int, DOUBLE_ARRAY,
+    c_char_p, c_char_p, c_char_p, DOUBLE_ARRAY, DOUBLE_ARRAY, INT_ARRAY]
+cspice.spkezr_array_custom.restype = c_char_p
+cspice.spkezr_array_custom.errcheck = errcheck
+@_locked
+def spkezr_array(target, ets, ref, abcorr, observer):
+    ets = _as_et_array(ets)
+    states = numpy.empty((len(ets), 6))
+    light_times = numpy.empty(len(ets))
+    found = numpy.empty(len(ets), dtype=numpy.intc)
+    cspice.spkezr_array_custom(target, len(ets), ets, ref, abcorr, observer,
+        states, light_times, found)
+    return states, light_times, _found(found)
+
 cspice.pxform_custom.argtypes = [c_char_p, c_char_p, c_double,
     POINTER(c_double * 9)]
 cspice.pxform_custom.restype = c_char_p
 cspice.pxform_custom.errcheck = errcheck
+@_locked
 def pxform(from_, to, et):
     output = (c_double * 9)()
     cspice.pxform_custom(from_, to, et, byref(output))
     return output[:]
 
+cspice.pxform_array_custom.argtypes = [c_char_p, c_char_p, c_int,
+    DOUBLE_ARRAY, DOUBLE_ARRAY, INT_ARRAY]
+cspice.pxform_array_custom.restype = c_char_p
+cspice.pxform_array_custom.errcheck = errcheck
+@_locked
+def pxform_array(from_, to, ets):
+    ets = _as_et_array(ets)
+    output = numpy.empty((len(ets), 3, 3))
+    found = numpy.empty(len(ets), dtype=numpy.intc)
+    cspice.pxform_array_custom(from_, to, len(ets), ets, output, found)
+    return output, _found(found)
+
+cspice.sxform_array_custom.argtypes = [c_char_p, c_char_p, c_int,
+    DOUBLE_ARRAY, DOUBLE_ARRAY, DOUBLE_ARRAY, DOUBLE_ARRAY, INT_ARRAY]
+cspice.sxform_array_custom.restype = c_char_p
+cspice.sxform_array_custom.errcheck = errcheck
+@_locked
+def sxform_array(from_, to, ets):
+    ets = _as_et_array(ets)
+    xforms = numpy.empty((len(ets), 6, 6))
+    quats = numpy.empty((len(ets), 4))
+    avs = numpy.empty((len(ets), 3))
+    found = numpy.empty(len(ets), dtype=numpy.intc)
+    cspice.sxform_array_custom(from_, to, len(ets), ets, xforms, quats, avs,
+        found)
+    return xforms, quats, avs, _found(found)
+
 cspice.ckgp_custom.argtypes = [c_int, c_int, c_double, c_double, c_char_p,
     POINTER(c_double * 9), POINTER(c_double), POINTER(c_int)]
 cspice.ckgp_custom.restype = c_char_p
 cspice.ckgp_custom.errcheck = errcheck
+@_locked
 def ckgp(spacecraft_id, instrument_id, et, tol, ref_frame): #Unused
     cmat = (c_double * 9)()
     clkout = c_double()
@@ -307,8 +589,10 @@ def ckgp(spacecraft_id, instrument_id, et, tol, ref_frame): #Unused
 cspice.getfov_custom.argtypes = [c_int, c_char * 16, c_char * 64, c_double * 3, POINTER(c_int), c_double * (8 * 3)]
 cspice.getfov_custom.restype = c_char_p
 cspice.getfov_custom.errcheck = errcheck
+@_locked
 def getfov(idcode):
-    shape2bounds = {'POLYGON': 3, 'RECTANGLE': 4, 'CIRCLE': 1, 'ELLIPSE': 2}
+    # Polygons have as many bounds as getfov reports
+    shape2bounds = {'RECTANGLE': 4, 'CIRCLE': 1, 'ELLIPSE': 2}
     shape = (c_char * 16)()
     frame = (c_char * 64)()
     boresight = (c_double * 3)()
@@ -322,9 +606,22 @@ def getfov(idcode):
 cspice.fovtrg_custom.argtypes = [c_char_p] * 6 + [POINTER(c_double), POINTER(c_int)]
 cspice.fovtrg_custom.restype = c_char_p
 cspice.fovtrg_custom.errcheck = errcheck
+@_locked
 def fovtrg(inst, target, tshape, tframe, abcorr, observer, et):
     et = c_double(et)
     visible = c_int()
     cspice.fovtrg_custom(inst, target, tshape, tframe, abcorr, observer,
         byref(et), byref(visible))
     return bool(visible.value)
+
+cspice.gftfov_custom.argtypes = [c_char_p] * 6 + [c_double, c_double, c_double,
+    POINTER(SpiceCell), POINTER(c_int)]
+cspice.gftfov_custom.restype = c_char_p
+cspice.gftfov_custom.errcheck = errcheck
+@_locked
+def gftfov(inst, target, tshape, tframe, abcorr, observer, step, et0, et1, cell):
+    '''Fill `cell` with the visibility windows, False if it was too small.'''
+    complete = c_int()
+    cspice.gftfov_custom(inst, target, tshape, tframe, abcorr, observer, step,
+        et0, et1, byref(cell), byref(complete))
+    return bool(complete.value)
@@ -0,0 +1,261 @@
+#-*- coding:utf-8 -*-
+
+import threading
+import collections
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import numpy
+
+from concurrent import futures
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from .parallel import Pool, _portable
+
+__all__ = ['Executor']
+
+
+### Requests ###
+_Request = collections.namedtuple('_Request', ['key', 'times', 'future'])
+
+def _select(method, result, times):
+    '''Pick the results for `times` out of the result of a merged batch.'''
+    if method == 'rotation':
+        valid, data = result
+    else:
+        valid = result[0]
+    if len(valid):
+        index = numpy.searchsorted(valid, times).clip(0, len(valid) - 1)
+        index = index[valid[index] == times]
+    else:
+        index = numpy.empty(0, dtype=int)
+    if method == 'rotation':
+        return valid[index], data[index]
+    return result[:, index]
+
+
+class Executor(object):
+    '''Non-blocking access to a `parallel.Pool` for threaded and asyncio
+    applications.
+
+    Requests return futures immediately. Pending requests with the same
+    method, body and options are merged into a single batch, so many small
+    concurrent requests cost about as much as one large request. At most
+    `max_batches` batches run at a time; further requests wait in the queue
+    and are merged while they wait. Requests can be cancelled as long as they
+    are queued. At most `max_pending` requests are queued, `submit` blocks
+    while the queue is full. `pause` holds all requests back until `resume`,
+    e.g. to merge a known set of requests in tests.
+
+    Parameters
+    ----------
+    kernel_paths: list of str
+        Kernel files or directories to load in every worker.
+    workers: int, optional
+        Number of worker processes, defaults to the number of CPUs.
+    chunk_size: int, optional
+        Maximum number of times evaluated in a single task.
+    max_batches: int, optional
+        Maximum number of batches evaluated at the same time, defaults to
+        the number of workers.
+    max_pending: int, optional
+        Maximum number of queued requests, 0 means unlimited.
+    pool: object, optional
+        Evaluate batches with this object instead of a new `parallel.Pool`.
+        It needs the methods and the `workers` attribute of `parallel.Pool`.
+
+    Examples
+    --------
+    >>> executor = Executor(['data/kernels'])
+    >>> earth = executor.body('EARTH')
+    >>> positions = await earth.aposition(times)
+    '''
+
+    def __init__(self, kernel_paths, workers=None, chunk_size=10000,
+        max_batches=None, max_pending=1000, pool=None):
+        self._pool = pool or Pool(kernel_paths, workers, chunk_size)
+        max_batches = max_batches or self._pool.workers
+        self._slots = threading.Semaphore(max_batches)
+        self._threads = futures.ThreadPoolExecutor(max_batches)
+        self._queue = queue.Queue(max_pending)
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._dispatcher = threading.Thread(target=self._dispatch)
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def pending(self):
+        '''Number of submitted requests not yet merged into a batch.'''
+        return self._pending
+
+    def pause(self):
+        '''Stop starting batches, requests are queued and merged until
+        `resume` is called.'''
+        self._resumed.clear()
+
+    def resume(self):
+        '''Start batches again after `pause`.'''
+        self._resumed.set()
+
+    def close(self):
+        '''Finish all queued requests and stop the workers.'''
+        self.resume()
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._threads.shutdown()
+        self._pool.close()
+
+    def submit(self, method, body, times, block=True, timeout=None,
+        **kwargs):
+        '''Queue a request for ``Body.<method>``.
+
+        Parameters
+        ----------
+        method: {'state', 'position', 'speed', 'rotation'}
+            The method of `Body` to call.
+        body: str or int or Body
+            The body to call it for.
+        times: iterable of float
+            UNIX timestamps passed to the method.
+        block: bool, optional
+            Wait for room in the queue if it is full, otherwise raise at once.
+        timeout: float, optional
+            Wait at most this many seconds for room in the queue.
+        **kwargs:
+            Further arguments of the method.
+
+        Returns
+        -------
+        future: concurrent.futures.Future
+            Resolves to the output of the method.
+
+        Raises
+        ------
+        queue.Full
+            If the queue is still full after waiting as requested.
+        '''
+        if method not in ('state', 'position', 'speed', 'rotation'):
+            raise ValueError("Unknown method '{}'".format(method))
+        kwargs = {key: _portable(value) for key, value in kwargs.items()}
+        key = method, _portable(body), tuple(sorted(kwargs.items()))
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        future = futures.Future()
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put(_Request(key, times, future), block, timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return future
+
+    ### Dispatching ###
+    def _dispatch(self):
+        '''Merge queued requests and start batches while slots are free.'''
+        stop = False
+        while not stop:
+            requests = [self._queue.get()]
+            self._resumed.wait()
+            while True:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._pending -= sum(request is not None
+                    for request in requests)
+            groups = collections.OrderedDict()
+            for request in requests:
+                if request is None:
+                    stop = True
+                elif request.future.set_running_or_notify_cancel():
+                    groups.setdefault(request.key, []).append(request)
+            for key, group in groups.items():
+                self._slots.acquire()
+                self._threads.submit(self._evaluate, key, group)
+
+    def _evaluate(self, key, group):
+        method, body, kwargs = key
+        try:
+            times = numpy.unique(numpy.concatenate(
+                [request.times for request in group]))
+            result = getattr(self._pool, method)(body, times, **dict(kwargs))
+            for request in group:
+                request.future.set_result(_select(method, result,
+                    request.times))
+        except Exception as e:
+            for request in group:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    ### Convenience ###
+    def state(self, body, times, **kwargs):
+        return self.submit('state', body, times, **kwargs)
+
+    def position(self, body, times, **kwargs):
+        return self.submit('position', body, times, **kwargs)
+
+    def speed(self, body, times, **kwargs):
+        return self.submit('speed', body, times, **kwargs)
+
+    def rotation(self, body, times, **kwargs):
+        return self.submit('rotation', body, times, **kwargs)
+
+    def astate(self, body, times, **kwargs):
+        '''Like `state`, but returns an awaitable asyncio future.'''
+        return _awaitable(self.state(body, times, **kwargs))
+
+    def aposition(self, body, times, **kwargs):
+        '''Like `position`, but returns an awaitable asyncio future.'''
+        return _awaitable(self.position(body, times, **kwargs))
+
+    def aspeed(self, body, times, **kwargs):
+        '''Like `speed`, but returns an awaitable asyncio future.'''
+        return _awaitable(self.speed(body, times, **kwargs))
+
+    def arotation(self, body, times, **kwargs):
+        '''Like `rotation`, but returns an awaitable asyncio future.'''
+        return _awaitable(self.rotation(body, times, **kwargs))
+
+    def body(self, body):
+        '''A proxy with the methods of this executor bound to `body`.'''
+        return _BodyProxy(self, body)
+
+
+class _BodyProxy(object):
+    def __init__(self, executor, body):
+        self._executor = executor
+        self._body = body
+
+    def __getattr__(self, name):
+        method = getattr(self._executor, name)
+        def bound(times, **kwargs):
+            return method(self._body, times, **kwargs)
+        return bound
+
+
+def _awaitable(future):
+    '''Wrap a concurrent future for the current asyncio event loop, cancelling
+    the asyncio future cancels the request.'''
+    if asyncio is None:
+        raise RuntimeError('asyncio is not available')
+    return asyncio.wrap_future(future)
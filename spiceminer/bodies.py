@@ -4,9 +4,12 @@ import collections
 
 import numpy
 
+from . import frames
+from . import profiling
 from . import util
 from . import _spicewrapper as spice
-from .time_ import Time
+from .time_ import Time, posix2et
+from .kernel import spk
 
 __all__ = ['Body', 'Asteroid', 'Barycenter', 'Comet', 'Instrument',
     'Planet', 'Satellite', 'Spacecraft', 'Star']
@@ -14,7 +17,13 @@ __all__ = ['Body', 'Asteroid', 'Barycenter', 'Comet', 'Instrument',
 
 ### Special frame handlers ###
 class FrameDecorator(object):
-    '''Decorator for frames which are not spice objects.'''
+    '''Decorator for frames which are not spice objects.
+
+    The decorated class must derive from `SpecialFrame`. Its `rotation`
+    method provides the rotations from `base` to the new frame for arrays
+    of ephimeris times. `base` may be a SPICE frame or another special
+    frame.
+    '''
 
     FRAMES = {}
 
@@ -23,77 +32,279 @@ class FrameDecorator(object):
         self.name = name
 
     def __call__(self, frame_cls):
-        transform = frame_cls()
-        with util.ignored(KeyError):
-            while True:
-                base_base, base_transform = self.__class__.FRAMES[self.base]
-                transform = _MergedFrame(base_transform, transform)
-                self.base = base_base
         if self.name is None:
             self.name = frame_cls.__name__.strip('_').replace('_', ' ')
-        self.__class__.FRAMES[self.name.upper()] = (self.base, transform)
+        self.register(self.name, frame_cls(self.base))
         return frame_cls
 
+    @classmethod
+    def register(cls, name, frame):
+        '''Make a `SpecialFrame` instance available under `name`.'''
+        cls.FRAMES[name.upper()] = frame
+
     @classmethod
     def convert(cls, frame):
-        '''Convert strings representing special frames to their base frame and
-        a SpecialFrame instance with the relevant transformative methods.'''
+        '''Convert strings representing special frames to their SPICE base
+        frame and a _FrameChain which rotates from there.'''
         frame = frame.upper()
-        if frame in ('J2000', 'ECLIPJ2000'):
-            transform = SpecialFrame()
-        else:
-            frame, transform = cls.FRAMES[frame]
-        return frame, transform
+        chain = []
+        while frame in cls.FRAMES:
+            chain.append(cls.FRAMES[frame])
+            frame = chain[-1].base.upper()
+        if not chain and frame not in ('J2000', 'ECLIPJ2000'):
+            raise KeyError(frame)
+        return frame, _FrameChain(reversed(chain))
 
 
 class SpecialFrame(object):
-    '''Template for custom frames.'''
-    def state(self, output):
-        return output
-    #def speed(self, output):
-    #    return output
-    def position(self, output):
-        return output
-    def rotation(self, output):
-        return output
+    '''Template for custom frames.
+
+    Parameters
+    ----------
+    base: str
+        Name of the frame the rotations are relative to.
+    '''
 
-class _MergedFrame():
-    '''Frame that applies the transforms of multiple special frames.'''
+    def __init__(self, base):
+        self.base = base
+
+    def rotation(self, ets):
+        '''Get the rotations from the base frame to this frame.
+
+        Parameters
+        ----------
+        ets: ndarray of float
+            Ephimeris times.
+
+        Returns
+        -------
+        matrices: ndarray of float
+            The nx3x3 array of rotation matrices.
+        found: ndarray of bool
+            Which times could be computed.
+        '''
+        return (numpy.repeat(numpy.identity(3)[None], len(ets), axis=0),
+            numpy.ones(len(ets), dtype=bool))
 
-    def __init__(self, *frames):
-        self.frames = []
-        for frame in frames:
-            if isinstance(frame, self.__class__):
-                self.frames += frame.frames
-            else:
-                self.frames.append(frame)
+
+class _FrameChain(object):
+    '''Special frames applied on top of a SPICE frame, innermost first.
+
+    All rotations of a query are composed into one nx3x3 array before they
+    are applied to the output of `Body` methods.
+    '''
+
+    # Time step in sec for the rotation rate applied to velocities
+    STEP = 1.0
+
+    def __init__(self, frames=()):
+        self.frames = list(frames)
+
+    def matrices(self, ets):
+        '''Composed rotations from the SPICE frame to the outermost frame.'''
+        result, found = self.frames[0].rotation(ets)
+        for frame in self.frames[1:]:
+            matrices, valid = frame.rotation(ets)
+            result = numpy.einsum('nij,njk->nik', matrices, result)
+            found &= valid
+        return result, found
+
+    def _apply(self, times, vectors):
+        '''Rotate the 3xn vectors, returns the result and the valid mask.'''
+        matrices, found = self.matrices(posix2et(times))
+        return numpy.einsum('nij,jn->in', matrices, vectors), found
 
     def state(self, output):
-        for frame in self.frames:
-            output = frame.state(output)
+        if not self.frames:
+            return output
+        ets = posix2et(output[0])
+        matrices, found = self.matrices(ets)
+        # Rotation rate from central differences
+        after, valid_after = self.matrices(ets + self.STEP)
+        before, valid_before = self.matrices(ets - self.STEP)
+        rates = (after - before) / (2 * self.STEP)
+        found &= valid_after & valid_before
+        result = output.copy()
+        result[1:4] = numpy.einsum('nij,jn->in', matrices, output[1:4])
+        result[4:7] = (numpy.einsum('nij,jn->in', matrices, output[4:7]) +
+            numpy.einsum('nij,jn->in', rates, output[1:4]))
+        return result[:, found]
 
     def position(self, output):
-        for frame in self.frames:
-            output = frame.position(output)
+        if not self.frames:
+            return output
+        result = output.copy()
+        result[1:], found = self._apply(output[0], output[1:])
+        return result[:, found]
 
     def rotation(self, output):
-        for frame in self.frames:
-            output = frame.rotation(output)
+        if not self.frames:
+            return output
+        times, matrices = output
+        chain, found = self.matrices(posix2et(times))
+        matrices = numpy.asarray(matrices, dtype=float).reshape(-1, 3, 3)
+        result = numpy.einsum('nij,njk->nik', chain[found], matrices[found])
+        return times[found], list(result)
+
+
+class TwoVectorFrame(SpecialFrame):
+    '''Dynamic frame defined by two vectors, like CSPICE's two-vector frames.
+
+    The primary axis points along the primary vector, the secondary axis
+    lies in the plane of both vectors on the side of the secondary vector.
+    Vectors are evaluated with one batched state lookup per pair of target
+    and observer.
+
+    Parameters
+    ----------
+    primary, secondary: tuple
+        Vector definitions relative to `base`:
+        ``('position', target, observer)``: Position of target relative to
+        observer.
+        ``('velocity', target, observer)``: Velocity of target relative to
+        observer.
+        ``('constant', (x, y, z))``: A fixed vector.
+    primary_axis, secondary_axis: {'X', 'Y', 'Z', '-X', '-Y', '-Z'}, optional
+        Axes of the new frame aligned with the vectors.
+    base: str, optional
+        SPICE frame the vectors are evaluated in.
+    abcorr: str, optional
+        Aberration correction for the state lookups.
+
+    Raises
+    ------
+    ValueError
+        If a vector definition or the axes are invalid.
+
+    Examples
+    --------
+    Sun pointing with the velocity in the X-Z plane:
+
+    >>> frame = TwoVectorFrame(('position', 'SUN', 'SOHO'),
+    ...     ('velocity', 'SOHO', 'SUN'), 'X', 'Z')
+    >>> FrameDecorator.register('SOHO SUN POINTING', frame)
+    '''
+
+    AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+    def __init__(self, primary, secondary, primary_axis='X',
+        secondary_axis='Z', base='ECLIPJ2000', abcorr='NONE'):
+        super(TwoVectorFrame, self).__init__(base)
+        self.primary = self._check_vector(primary)
+        self.secondary = self._check_vector(secondary)
+        self._primary_axis, self._primary_sign = self._check_axis(primary_axis)
+        self._secondary_axis, self._secondary_sign = self._check_axis(
+            secondary_axis)
+        if self._primary_axis == self._secondary_axis:
+            msg = 'Primary and secondary axis must differ, got {} and {}'
+            raise ValueError(msg.format(primary_axis, secondary_axis))
+        self.abcorr = abcorr
+
+    @staticmethod
+    def _check_vector(vector):
+        kind = vector[0]
+        if kind in ('position', 'velocity') and len(vector) == 3:
+            return tuple(vector)
+        elif kind == 'constant' and len(vector) == 2:
+            return kind, numpy.array(vector[1], dtype=float).reshape(3)
+        msg = "Expected ('position'|'velocity', target, observer) or "
+        raise ValueError(msg + "('constant', vector), got {}".format(vector))
+
+    @classmethod
+    def _check_axis(cls, axis):
+        sign = -1 if axis.startswith('-') else 1
+        try:
+            return cls.AXES[axis.lstrip('+-').upper()], sign
+        except KeyError:
+            raise ValueError('Unknown axis {}'.format(axis))
+
+    def _vectors(self, ets):
+        '''Evaluate both vectors (nx3) and a mask of valid times.'''
+        states = {}
+        found = numpy.ones(len(ets), dtype=bool)
+        result = []
+        for vector in (self.primary, self.secondary):
+            if vector[0] == 'constant':
+                result.append(numpy.repeat(vector[1][None], len(ets), axis=0))
+                continue
+            key = _prepare_observer(vector[1]), _prepare_observer(vector[2])
+            if key not in states:
+                states[key], _, valid = spice.spkezr_array(key[0], ets,
+                    self.base, self.abcorr, key[1])
+                found &= valid
+            column = slice(0, 3) if vector[0] == 'position' else slice(3, 6)
+            result.append(states[key][:, column])
+        return result[0], result[1], found
+
+    def rotation(self, ets):
+        primary, secondary, found = self._vectors(ets)
+        primary = primary * self._primary_sign
+        secondary = secondary * self._secondary_sign
+        a, s = self._primary_axis, self._secondary_axis
+        t = 3 - a - s
+        axes = numpy.empty((len(ets), 3, 3))
+        axes[:, a] = primary
+        # Keep the frame right handed
+        if s == (a + 1) % 3:
+            axes[:, t] = numpy.cross(primary, secondary)
+            axes[:, s] = numpy.cross(axes[:, t], primary)
+        else:
+            axes[:, t] = numpy.cross(secondary, primary)
+            axes[:, s] = numpy.cross(primary, axes[:, t])
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            axes /= numpy.sqrt((axes ** 2).sum(axis=2))[:, :, None]
+        found &= numpy.isfinite(axes).all(axis=(1, 2))
+        return axes, found
 
 
-@FrameDecorator('SUN')
+@FrameDecorator('IAU_SUN')
 class _Carrington(SpecialFrame):
-    '''This frame is just an alias for 'SUN'.'''
+    '''This frame is just an alias for 'IAU_SUN'.'''
     pass
 
 
-### Helpers ###
-def _iterbodies(start, stop, step=1):
-    '''Iterate over all bodies with ids in the given range.'''
-    for i in range(start, stop, step):
-        with util.ignored(ValueError):
-            yield Body(i)
+# Geocentric Solar Ecliptic: X points from the earth to the sun, Z to the
+# ecliptic north pole
+FrameDecorator.register('GSE', TwoVectorFrame(('position', 'SUN', 'EARTH'),
+    ('constant', (0, 0, 1)), 'X', 'Z', base='ECLIPJ2000'))
+# Heliocentric Earth Ecliptic: X points from the sun to the earth, Z to the
+# ecliptic north pole
+FrameDecorator.register('HEE', TwoVectorFrame(('position', 'EARTH', 'SUN'),
+    ('constant', (0, 0, 1)), 'X', 'Z', base='ECLIPJ2000'))
+
+def rtn_frame(body, base='ECLIPJ2000'):
+    '''Register the Radial Tangential Normal frame of `body`.
+
+    R points from the sun to the body, N along its orbital angular momentum
+    relative to the sun and T completes the right handed frame, so the
+    velocity lies in the R-T plane.
+
+    Parameters
+    ----------
+    body: str or int or Body
+        The body, usually a spacecraft.
+    base: str, optional
+        SPICE frame the vectors are evaluated in.
+
+    Returns
+    -------
+    name: str
+        The name of the frame, ``'RTN <body name>'``.
+
+    Examples
+    --------
+    >>> frame = rtn_frame('SOHO')
+    >>> Body('EARTH').position(times, observer='SOHO', frame=frame)
+    '''
+    name = _prepare_observer(body)
+    frame = TwoVectorFrame(('position', name, 'SUN'),
+        ('velocity', name, 'SUN'), 'X', 'Y', base=base)
+    name = 'RTN ' + name
+    FrameDecorator.register(name, frame)
+    return name
+
 
+### Helpers ###
 def _prepare_times(times):
     if isinstance(times, basestring):
         times = [float(times)]
@@ -103,6 +314,11 @@ def _prepare_times(times):
         times = [float(times)]
     return times
 
+def _prepare_time_array(times):
+    if isinstance(times, numpy.ndarray):
+        return times.astype(float).reshape(-1)
+    return numpy.fromiter(_prepare_times(times), dtype=float)
+
 def _prepare_observer(body):
     return Body(body).name
 
@@ -112,99 +328,303 @@ def _prepare_frame(frame):
     except (KeyError, AttributeError):
         frame = Body(frame)
         frame = frame._frame or frame.name
-        transform = SpecialFrame()
+        transform = _FrameChain()
     return frame, transform
 
 def _typecheck(times, observer=None, frame='ECLIPJ2000'):
     '''Check and convert arguments for spice interface methods.'''
-    times = _prepare_times(times)
+    times = _prepare_time_array(times)
     if observer:
         observer = _prepare_observer(observer)
     frame, transform = _prepare_frame(frame)
     return times, observer, frame, transform
 
 
+### Field of view geometry ###
+FOVParameters = collections.namedtuple('FOVParameters',
+    ['shape', 'frame', 'boresight', 'bounds'])
+
+# Maps instrument id -> (FOVParameters, frame name), reset on kernel (un)load
+_FOV_CACHE = {}
+util.on_kernel_change(_FOV_CACHE.clear)
+
+def _fov_contains(shape, boresight, bounds, directions):
+    '''Test which direction vectors lie inside a field of view.
+
+    Parameters
+    ----------
+    shape: {'POLYGON', 'RECTANGLE', 'CIRCLE', 'ELLIPSE'}
+        The shape of the field of view.
+    boresight: array_like
+        Vector pointing in the direction of the center of the field of view.
+    bounds: array_like
+        The mx3 array of boundary vectors as returned by ``getfov``.
+    directions: array_like
+        The nx3 array of direction vectors to test, in the same frame as
+        `boresight` and `bounds`.
+
+    Returns
+    -------
+    ndarray of bool
+        If the n-th direction lies inside the field of view.
+    '''
+    boresight = numpy.asarray(boresight, dtype=float)
+    boresight = boresight / numpy.linalg.norm(boresight)
+    bounds = numpy.asarray(bounds, dtype=float).reshape(-1, 3)
+    directions = numpy.asarray(directions, dtype=float).reshape(-1, 3)
+    along = directions.dot(boresight)
+    inside = along > 0
+    shape = shape.upper()
+    if shape == 'CIRCLE':
+        limit = bounds[0].dot(boresight) / numpy.linalg.norm(bounds[0])
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            cosines = along / numpy.linalg.norm(directions, axis=1)
+        return inside & (cosines >= limit)
+    # Project everything onto the plane at unit distance along the boresight
+    axis_u = bounds[0] - bounds[0].dot(boresight) * boresight
+    axis_u = axis_u / numpy.linalg.norm(axis_u)
+    axis_w = numpy.cross(boresight, axis_u)
+    def project(vectors):
+        distance = vectors.dot(boresight)
+        return vectors.dot(axis_u) / distance, vectors.dot(axis_w) / distance
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        u, w = project(directions)
+    bu, bw = project(bounds)
+    if shape == 'ELLIPSE':
+        semi_major = numpy.hypot(bu[0], bw[0])
+        semi_minor = numpy.hypot(bu[1], bw[1])
+        with numpy.errstate(invalid='ignore'):
+            return inside & ((u / semi_major) ** 2 + (w / semi_minor) ** 2 <= 1)
+    # Polygon (and rectangle): even-odd rule, all edges at once
+    u, w = u[:, None], w[:, None]
+    bu_next, bw_next = numpy.roll(bu, -1), numpy.roll(bw, -1)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        crossing_u = bu + (w - bw) * (bu_next - bu) / (bw_next - bw)
+        crosses = ((bw > w) != (bw_next > w)) & (u < crossing_u)
+    return inside & (crosses.sum(axis=1) % 2 == 1)
+
+
+### Name/ID cache ###
+# Normalized name -> id (None for unknown names) and id -> name, filled by
+# lookups and reset on kernel (un)load, because text kernels can add names
+_NAME_TO_ID = {}
+_ID_TO_NAME = {}
+
+@util.on_kernel_change
+def _clear_names():
+    _NAME_TO_ID.clear()
+    _ID_TO_NAME.clear()
+
+def _normalize(name):
+    '''Normalize a body name like CSPICE: case-insensitive with consecutive
+    blanks compressed and leading/trailing ones removed.'''
+    return ' '.join(name.split()).upper()
+
+def _name2id(name):
+    '''The id of a body name or numeric string, None if it's unknown.'''
+    key = _normalize(name)
+    try:
+        return _NAME_TO_ID[key]
+    except KeyError:
+        pass
+    try:
+        id_ = int(float(key))
+    except ValueError:
+        id_ = spice.bodn2c(key)
+    _NAME_TO_ID[key] = id_
+    return id_
+
+def _id2name(id_):
+    '''The name of a body id, the id as string if it has no name.'''
+    try:
+        return _ID_TO_NAME[id_]
+    except KeyError:
+        pass
+    name = spice.bodc2n(id_) or str(id_)
+    _ID_TO_NAME[id_] = name
+    _NAME_TO_ID.setdefault(_normalize(name), id_)
+    return name
+
+
+class _Registry(object):
+    '''Table of the loaded bodies.
+
+    Row i holds id, reference count and class code of ``bodies[i]`` in
+    growing arrays, `rows` maps ids to rows. Removed rows are refilled with
+    the last one, so the table stays dense and per class selections are
+    single array operations.
+    '''
+
+    def __init__(self, capacity=256):
+        self.ids = numpy.zeros(capacity, dtype=numpy.int64)
+        self.counts = numpy.zeros(capacity, dtype=numpy.int64)
+        self.codes = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.bodies = []
+        self.rows = {}
+        # Incremented on every change, invalidates the per class views
+        self.version = 0
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def __getitem__(self, id_):
+        '''Reference count of `id_`, 0 if it isn't loaded.'''
+        row = self.rows.get(id_)
+        return 0 if row is None else int(self.counts[row])
+
+    def items(self):
+        '''List of (id, reference count) tuples.'''
+        n = len(self.bodies)
+        return list(zip(self.ids[:n].tolist(), self.counts[:n].tolist()))
+
+    def add(self, body, code):
+        row = len(self.bodies)
+        if row == len(self.ids):
+            self.ids, self.counts, self.codes = [numpy.concatenate([array,
+                numpy.zeros_like(array)]) for array in (self.ids,
+                self.counts, self.codes)]
+        self.ids[row] = body.id
+        self.counts[row] = 0
+        self.codes[row] = code
+        self.bodies.append(body)
+        self.rows[body.id] = row
+        self.version += 1
+        return row
+
+    def remove(self, id_):
+        row = self.rows.pop(id_)
+        last = len(self.bodies) - 1
+        if row != last:
+            moved = self.bodies[last]
+            self.bodies[row] = moved
+            self.ids[row] = self.ids[last]
+            self.counts[row] = self.counts[last]
+            self.codes[row] = self.codes[last]
+            self.rows[moved.id] = row
+        self.bodies.pop()
+        self.version += 1
+
+    def select(self, codes):
+        '''Rows with one of the class codes `codes`.'''
+        selected = numpy.zeros(256, dtype=bool)
+        selected[codes] = True
+        return numpy.flatnonzero(selected[self.codes[:len(self.bodies)]])
+
+
 class _BodyMeta(type):
     '''Metaclass for Body to seperate instance creation from initialisation and
     to force methods on the class level only.'''
 
-    _ID_COUNTER = collections.Counter()
-    _ID_MAP = {}
+    # The loaded bodies, _ID_COUNTER keeps the mapping interface of the
+    # reference counter it replaces
+    _TABLE = _Registry()
+    _ID_COUNTER = _TABLE
+    # All classes, indexed by class code
+    _CLASSES = []
+    # Maps parent id -> ids of the loaded children
+    _CHILDREN = {}
 
     def __init__(cls, name, bases, namespace):
         super(cls.__class__, cls).__init__(name, bases, namespace)
-        cls.LOADED = set()
-        cls._REGISTRY = set(base for base in bases if isinstance(cls, cls.__class__))
-        cls._REGISTRY.add(cls)
-
-    def _register(cls, body):
-        for kls in cls._REGISTRY:
-            kls.LOADED.add(body)
+        cls._CODE = len(_BodyMeta._CLASSES)
+        _BodyMeta._CLASSES.append(cls)
+        # Bodies of a class are listed by the class and its direct bases
+        cls._CODES = [cls._CODE]
+        for base in bases:
+            if isinstance(base, _BodyMeta):
+                base._CODES.append(cls._CODE)
+        cls._VIEW = -1, frozenset()
 
-    def _unregister(cls, body):
-        for kls in cls._REGISTRY:
-            kls.LOADED.remove(body)
+    @property
+    def LOADED(cls):
+        '''All loaded bodies of the class and its direct subclasses.'''
+        table = _BodyMeta._TABLE
+        version, view = cls._VIEW
+        if version != table.version:
+            bodies = table.bodies
+            view = frozenset(bodies[row] for row in table.select(cls._CODES))
+            cls._VIEW = table.version, view
+        return view
+
+    def loaded_ids(cls):
+        '''IDs of all loaded bodies of the class and its direct subclasses as
+        array, without creating a set of bodies.'''
+        table = _BodyMeta._TABLE
+        return table.ids[table.select(cls._CODES)]
 
     def _make(cls, id_):
-        if _BodyMeta._ID_COUNTER[id_] == 0:
+        table = _BodyMeta._TABLE
+        row = table.rows.get(id_)
+        if row is None:
             # Create correct subclass
             if id_ > 2000000:
-                body = object.__new__(Asteroid)
+                kls = Asteroid
             elif id_ > 1000000:
-                body = object.__new__(Comet)
+                kls = Comet
             elif id_ > 1000:
-                body = object.__new__(Body)
+                kls = Body
             elif id_ > 10:
                 if id_ % 100 == 99:
-                    body = object.__new__(Planet)
+                    kls = Planet
                 else:
-                    body = object.__new__(Satellite)
+                    kls = Satellite
             elif id_ == 10:
-                body = object.__new__(Star)
+                kls = Star
             elif id_ >= 0:
-                body = object.__new__(Barycenter)
+                kls = Barycenter
             elif id_ > -1000:
-                body = object.__new__(Spacecraft)
+                kls = Spacecraft
             elif id_ >= -100000:
-                body = object.__new__(Instrument)
+                kls = Instrument
             else:
-                body = object.__new__(Spacecraft)
+                kls = Spacecraft
+            body = object.__new__(kls)
             body.__init__(id_)
-            body.__class__._register(body)
-            _BodyMeta._ID_MAP[id_] = body
-        _BodyMeta._ID_COUNTER[id_] += 1
+            row = table.add(body, kls._CODE)
+            parent_id = kls._parent_id(id_)
+            if parent_id is not None:
+                _BodyMeta._CHILDREN.setdefault(parent_id, set()).add(id_)
+        table.counts[row] += 1
 
     def _delete(cls, id_):
-        _BodyMeta._ID_COUNTER[id_] -= 1
-        body = cls(id_)
-        count = _BodyMeta._ID_COUNTER[id_]
-        if count == 0:
-            body.__class__._unregister(body)
-            del _BodyMeta._ID_MAP[id_]
-        elif count < 0:
-            _BodyMeta._ID_COUNTER[id_] = 0
+        table = _BodyMeta._TABLE
+        row = table.rows.get(id_)
+        if row is None:
             msg = '{} with id {} is not loaded'
             raise ValueError(msg.format(cls.__name__, id_))
+        table.counts[row] -= 1
+        if table.counts[row] == 0:
+            body = table.bodies[row]
+            table.remove(id_)
+            parent_id = body._parent_id(id_)
+            if parent_id is not None:
+                siblings = _BodyMeta._CHILDREN[parent_id]
+                siblings.discard(id_)
+                if not siblings:
+                    del _BodyMeta._CHILDREN[parent_id]
 
     def __call__(cls, body):
         # Check and convert type
-        try:
-            id_ = body.id
-        except AttributeError:
-            id_ = body
-        try:
-            id_ = int(float(id_))
-        except TypeError:
-            msg = "'Body', 'int' or 'str' argument expected, got '{}'"
-            raise TypeError(msg.format(type(body)))
-        except ValueError:
-            id_ = spice.bodn2c(body)
+        if isinstance(body, basestring):
+            id_ = _name2id(body)
             if id_ is None:
                 raise ValueError("Got invalid name '{}'".format(body))
-        if id_ not in _BodyMeta._ID_MAP:
+        else:
+            try:
+                id_ = body.id
+            except AttributeError:
+                id_ = body
+            try:
+                id_ = int(id_)
+            except (TypeError, ValueError):
+                msg = "'Body', 'int' or 'str' argument expected, got '{}'"
+                raise TypeError(msg.format(type(body)))
+        table = _BodyMeta._TABLE
+        try:
+            return table.bodies[table.rows[id_]]
+        except KeyError:
             msg = "No loaded 'Body' with ID or name '{}'"
             raise ValueError(msg.format(body))
-        return _BodyMeta._ID_MAP[id_]
 
 
 ### Public API ###
@@ -226,8 +646,8 @@ class Body(object):
 
     Attributes
     ----------
-    *classattribute* LOADED: set of body
-        All available bodies.
+    *classattribute* LOADED: frozenset of body
+        All available bodies. `loaded_ids()` returns their IDs as array.
     id: int
         The reference id of the body. Guaranteed to be unique.
     name: str
@@ -245,13 +665,17 @@ class Body(object):
         The reverse of `parent`.
     '''
     __metaclass__ = _BodyMeta
+    # Catalogues can have hundreds of thousands of bodies, keep them small
+    __slots__ = ('_id',)
 
     _ABCORR = 'NONE'
+    _BACKEND = 'cspice'
+
+    # Body fixed frame, if it differs from the name
+    _frame = None
 
     def __init__(self, body):
         self._id = body
-        self._name = spice.bodc2n(body) or str(self._id)
-        self._frame = None
 
     def __str__(self):
         return self.__class__.__name__ + ' {} (ID {})'.format(self.name,
@@ -269,7 +693,8 @@ class Body(object):
 
     @property
     def name(self):
-        return self._name
+        # Looked up on first use, so creating bodies doesn't touch CSPICE
+        return _id2name(self._id)
 
     @property
     def times_pos(self):
@@ -279,16 +704,45 @@ class Body(object):
     def times_rot(self):
         return util.TIMEWINDOWS_ROT[self]
 
+    @staticmethod
+    def _parent_id(id_):
+        '''The id of the parent of body `id_`, None if it has no parent.'''
+        return None
+
     @property
     def parent(self):
-        return None
+        parent_id = self._parent_id(self.id)
+        return None if parent_id is None else Body(parent_id)
 
     @property
     def children(self):
-        return []
+        ids = _BodyMeta._CHILDREN.get(self.id, ())
+        return [Body(id_) for id_ in sorted(ids, key=abs)]
 
+    def descendants(self, depth=None):
+        '''All loaded bodies below this one in the hierarchy.
+
+        Parameters
+        ----------
+        depth: int, optional
+            Only go this many levels down. DEFAULT: all levels
+
+        Returns
+        -------
+        descendants: list of Body
+            Breadth first, children of the same parent sorted by ID.
+        '''
+        result = []
+        level = [self]
+        while level and depth != 0:
+            level = [child for body in level for child in body.children]
+            result.extend(level)
+            depth = None if depth is None else depth - 1
+        return result
+
+    @profiling.instrument('Body.state')
     def state(self, times, observer='SUN', frame='ECLIPJ2000',
-        abcorr=None):
+        abcorr=None, backend=None):
         '''Get the position and speed of this body relative to the observer
         in a specific reference frame.
 
@@ -309,32 +763,39 @@ class Body(object):
         abcorr: {'LT', 'LT+S', 'CN', 'CN+S', 'XLT', 'XLT+S', 'XCN', 'XCN+S'}, optional
             Aberration correction to be applied. For explanation see
             `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/spkez_c.html#Detailed_Input>`_.
+        backend: {'cspice', 'numpy'}, optional
+            `cspice`: Evaluate with CSPICE, supports all kernels and options.
+            `numpy`: Evaluate SPK segments of type 2, 3, 9 and 13 directly
+            from the memory mapped files. No aberration correction, frame
+            has to be 'ECLIPJ2000' or 'J2000'.
+            Defaults to `Body._BACKEND`.
 
         Returns
         -------
         state: ndarray of float
-            The nx7 array where the rows are time, position x, y, z and speed
-            x, y, z.
+            The 8xn array where the rows are time, position x, y, z, speed
+            x, y, z and one way light time.
             Positions are in km and speeds in km/sec.
 
         Raises
         ------
         TypeError
             If an argument doesn't conform to the type requirements.
+        ValueError
+            If the backend can't handle the request.
         SpiceError
             If necessary information is missing.
         '''
         times, observer, frame, transform = _typecheck(times, observer, frame)
-        result = []
-        for time in times:
-            with util.ignored(spice.SpiceError):
-                data = spice.spkezr(self.name, Time.fromposix(time).et(),
-                    frame, abcorr or Body._ABCORR, observer)
-                result.append([time] + data[0] + [data[1]])
-        return transform.state(numpy.array(result).transpose())
+        states, light_times, found = self._states(times, observer, frame,
+            abcorr, backend)
+        result = numpy.vstack([times[found], states[found].T,
+            light_times[found]])
+        return transform.state(result)
 
+    @profiling.instrument('Body.position')
     def position(self, times, observer='SUN', frame='ECLIPJ2000',
-        abcorr=None):
+        abcorr=None, backend=None):
         '''Get the position of this body relative to the observer in a
         specific reference frame.
 
@@ -354,6 +815,12 @@ class Body(object):
         abcorr: {'LT', 'LT+S', 'CN', 'CN+S', 'XLT', 'XLT+S', 'XCN', 'XCN+S'}, optional
             Aberration correction to be applied. For explanation see
             `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/spkez_c.html#Detailed_Input>`_.
+        backend: {'cspice', 'numpy'}, optional
+            `cspice`: Evaluate with CSPICE, supports all kernels and options.
+            `numpy`: Evaluate SPK segments of type 2, 3, 9 and 13 directly
+            from the memory mapped files. No aberration correction, frame
+            has to be 'ECLIPJ2000' or 'J2000'.
+            Defaults to `Body._BACKEND`.
 
         Returns
         -------
@@ -365,20 +832,20 @@ class Body(object):
         ------
         TypeError
             If an argument doesn't conform to the type requirements.
+        ValueError
+            If the backend can't handle the request.
         SpiceError
             If necessary information is missing.
         '''
         times, observer, frame, transform = _typecheck(times, observer, frame)
-        result = []
-        for time in times:
-            with util.ignored(spice.SpiceError):
-                result.append([time] + spice.spkpos(self.name,
-                Time.fromposix(time).et(), frame, abcorr or Body._ABCORR,
-                observer)[0])
-        return transform.position(numpy.array(result).transpose())
+        positions, _, found = self._states(times, observer, frame, abcorr,
+            backend, position_only=True)
+        result = numpy.vstack([times[found], positions[found, :3].T])
+        return transform.position(result)
 
+    @profiling.instrument('Body.speed')
     def speed(self, times, observer='SUN', frame='ECLIPJ2000',
-        abcorr=None):
+        abcorr=None, backend=None):
         '''Get the speed of this body relative to the observer in a specific
         reference frame.
 
@@ -398,6 +865,12 @@ class Body(object):
         abcorr: {'LT', 'LT+S', 'CN', 'CN+S', 'XLT', 'XLT+S', 'XCN', 'XCN+S'}, optional
             Aberration correction to be applied. For explanation see
             `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/spkez_c.html#Detailed_Input>`_.
+        backend: {'cspice', 'numpy'}, optional
+            `cspice`: Evaluate with CSPICE, supports all kernels and options.
+            `numpy`: Evaluate SPK segments of type 2, 3, 9 and 13 directly
+            from the memory mapped files. No aberration correction, frame
+            has to be 'ECLIPJ2000' or 'J2000'.
+            Defaults to `Body._BACKEND`.
 
         Returns
         -------
@@ -413,10 +886,11 @@ class Body(object):
             If necessary information is missing.
         '''
         #times, observer, _, _ = _typecheck(times, observer, frame)
-        data = self.state(times, observer, frame, abcorr)
-        return data[numpy.array([True] + [False] * 3 + [True] * 3)]
+        data = self.state(times, observer, frame, abcorr, backend)
+        return data[numpy.array([True] + [False] * 3 + [True] * 3 + [False])]
 
-    def rotation(self, times, target='ECLIPJ2000'):
+    @profiling.instrument('Body.rotation')
+    def rotation(self, times, target='ECLIPJ2000', backend=None):
         '''Get the rotation matrix for transforming the rotating of this body
         from its own reference frame to that of the target.
 
@@ -426,6 +900,14 @@ class Body(object):
             UNIX timestamp(s) for which to get the matrix.
         target: Body or {'ECLIPJ2000', 'J2000'}, optional
             Reference frame to transform to.
+        backend: {'cspice', 'numpy'}, optional
+            `cspice`: Evaluate with CSPICE, supports all kernels and frames.
+            `numpy`: Evaluate binary PCK (type 2 and 3), text PCK (IAU_*)
+            and CK (type 2, 3 and 5) based frames directly from the memory
+            mapped files and the kernel pool.
+            Rotations between inertial frames are constant and computed only
+            once with either backend.
+            Defaults to `Body._BACKEND`.
 
         Returns
         -------
@@ -438,22 +920,136 @@ class Body(object):
         ------
         TypeError
             If an argument doesn't conform to the type requirements.
+        ValueError
+            If the backend can't handle the request.
         SpiceError
             If necessary information is missing.
         '''
-        times = _prepare_times(times)
+        times = _prepare_time_array(times)
         target, transform = _prepare_frame(target)
-        result = []
-        valid_times = []
-        for time in times:
-            with util.ignored(spice.SpiceError):
-                result.append(spice.pxform(self._frame or self.name,
-                    target, Time.fromposix(time).et()))
-                valid_times.append(time)
-        result = numpy.array(valid_times), [numpy.array(item).reshape(3, 3)
-            for item in result]
+        matrices, found = self._rotations(posix2et(times), target, backend)
+        result = times[found], list(matrices[found])
         return transform.rotation(result)
 
+    def iter_states(self, times, chunk_size=10000, observer='SUN',
+        frame='ECLIPJ2000', abcorr=None, backend=None, prefetch=False):
+        '''Like `state`, but for time series too large to keep in memory.
+
+        Parameters
+        ----------
+        times: iterable of float or slice
+            UNIX timestamps, consumed lazily. ``slice(start, stop, step)``
+            stands for ``numpy.arange(start, stop, step)``.
+        chunk_size: int, optional
+            Number of times evaluated per chunk.
+        observer, frame, abcorr, backend:
+            See `state`.
+        prefetch: bool, optional
+            Compute the next chunk in a background thread while the current
+            one is processed.
+
+        Yields
+        ------
+        state: ndarray of float
+            The 8xn array of a chunk, see `state`. Times without data are
+            left out, so n can be smaller than `chunk_size`.
+        '''
+        chunks = (self.state(chunk, observer, frame, abcorr, backend)
+            for chunk in util.time_chunks(times, chunk_size))
+        return util.prefetched(chunks) if prefetch else chunks
+
+    def iter_positions(self, times, chunk_size=10000, observer='SUN',
+        frame='ECLIPJ2000', abcorr=None, backend=None, prefetch=False):
+        '''Like `position`, but yields the result in chunks, see
+        `iter_states`.'''
+        chunks = (self.position(chunk, observer, frame, abcorr, backend)
+            for chunk in util.time_chunks(times, chunk_size))
+        return util.prefetched(chunks) if prefetch else chunks
+
+    def iter_rotations(self, times, chunk_size=10000, target='ECLIPJ2000',
+        backend=None, prefetch=False):
+        '''Like `rotation`, but yields the (times, matrices) result in
+        chunks, see `iter_states`.'''
+        chunks = (self.rotation(chunk, target, backend)
+            for chunk in util.time_chunks(times, chunk_size))
+        return util.prefetched(chunks) if prefetch else chunks
+
+    def _states(self, times, observer, frame, abcorr, backend,
+        position_only=False):
+        '''Batched states for UNIX timestamps, see `state`.
+
+        Returns states (nx6, or nx3 if `position_only` with CSPICE), light
+        times and a mask of the times that could be computed.
+        '''
+        ets = posix2et(times)
+        abcorr = abcorr or Body._ABCORR
+        backend = backend or Body._BACKEND
+        if backend == 'numpy':
+            if abcorr.upper() != 'NONE':
+                msg = "The numpy backend doesn't support abcorr '{}'"
+                raise ValueError(msg.format(abcorr))
+            return spk.state(self.id, ets, frame, Body(observer).id)
+        elif backend == 'cspice':
+            func = spice.spkpos_array if position_only else spice.spkezr_array
+            return func(self.name, ets, frame, abcorr, observer)
+        msg = "backend must be 'cspice' or 'numpy', got '{}'"
+        raise ValueError(msg.format(backend))
+
+    def _rotations(self, ets, target, backend):
+        '''Batched rotation matrices for ephemeris times, see `rotation`.'''
+        frame = self._frame or self.name
+        return frames.rotation(frame, target, ets, backend or Body._BACKEND)
+
+    @profiling.instrument('Body.attitude')
+    def attitude(self, times, target='ECLIPJ2000', kind='quat'):
+        '''Get the rotation of this body relative to the target frame together
+        with its angular velocity.
+
+        Parameters
+        ----------
+        times: float or iterable of float
+            UNIX timestamp(s) for which to get the attitude.
+        target: Body or {'ECLIPJ2000', 'J2000'}, optional
+            Reference frame to transform to.
+        kind: {'quat', 'matrix', 'state6x6'}, optional
+            Representation of the rotation.
+            `quat`: Quaternions in SPICE convention (scalar first).
+            `matrix`: 3x3 rotation matrices as returned by `rotation`.
+            `state6x6`: 6x6 matrices for transforming states.
+
+        Returns
+        -------
+        times: ndarray of float
+            The times for which the attitude could be computed.
+        attitude: ndarray of float
+            The nx4, nx3x3 or nx6x6 array depending on `kind`.
+        angular_velocity: ndarray of float
+            The nx3 array of angular velocities in rad/sec. Derived
+            analytically from the state transformation, see
+            `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/xf2rav_c.html#Detailed_Output>`_.
+
+        Raises
+        ------
+        TypeError
+            If an argument doesn't conform to the type requirements.
+        ValueError
+            If `kind` is unknown.
+        '''
+        if kind not in ('quat', 'matrix', 'state6x6'):
+            msg = "kind must be 'quat', 'matrix' or 'state6x6', got '{}'"
+            raise ValueError(msg.format(kind))
+        times = _prepare_time_array(times)
+        target, _ = _prepare_frame(target)
+        xforms, quats, angular_velocity, found = spice.sxform_array(
+            self._frame or self.name, target, posix2et(times))
+        attitude = {
+            'quat': quats,
+            'matrix': xforms[:, :3, :3],
+            'state6x6': xforms
+        }[kind]
+        return times[found], attitude[found], angular_velocity[found]
+
+    @profiling.instrument('Body.proximity')
     def proximity(self, time, distance, classes=None):
         '''Get other bodies at most `distance` km away from this body.
 
@@ -476,12 +1072,12 @@ class Body(object):
         SpiceError
             If necessary information is missing.
         '''
-        for body in set().union(kls.LOADED for kls in (classes or [Body])):
+        for body in set().union(*[kls.LOADED for kls in (classes or [Body])]):
             try:
                 pos = body.position(time, observer=self, frame=self)[1:]
             except spice.SpiceError:
                 continue
-            if len(pos) == 0:
+            if pos.size == 0:
                 continue
             dist = numpy.sqrt((pos ** 2).sum())
             if body != self and dist <= distance:
@@ -490,9 +1086,14 @@ class Body(object):
 
 class Asteroid(Body):
     '''Asteroids are ephimeris objects with IDs > 200000.'''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Asteroid, self).__init__(body)
-        self._frame = 'IAU_' + self._name
+
+    @property
+    def _frame(self):
+        return 'IAU_' + self.name
 
 
 class Barycenter(Body):
@@ -500,6 +1101,8 @@ class Barycenter(Body):
 
     A barycenter is the center of mass of a planet and all of its moons.
     '''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Barycenter, self).__init__(body)
 
@@ -508,20 +1111,25 @@ Body._make(0)
 
 class Comet(Body):
     '''Comets are ephimeris objects with IDs between 100000 and 200000.'''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Comet, self).__init__(body)
 
 
 class Instrument(Body):
     '''Instruments are ephimeris objects with IDs between -1001 and -10000.'''
+    __slots__ = ()
+    # Initial number of windows the visibility search has room for
+    _WINDOW_CELL_SIZE = 1000
+
     def __init__(self, body):
         super(Instrument, self).__init__(body)
 
-    @property
-    def parent(self):
-        offset = 0 if self.id % 1000 == 0 else -1
-        spacecraft_id = self.id / 1000 + offset
-        return Body(spacecraft_id)
+    @staticmethod
+    def _parent_id(id_):
+        # Instruments of spacecraft -n have IDs -n000 to -n999
+        return -(-id_ // 1000)
 
     def fov(self):
         '''Get the field of view of an instrument.
@@ -547,14 +1155,49 @@ class Instrument(Body):
         For more information on the relation between shape and bounds, see
         `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/getfov_c.html#Detailed_Output>`_
         '''
-        nt = collections.namedtuple('FOVParameters',
-            ['shape', 'frame', 'boresight', 'bounds'])
-        shape, frame, boresight, bounds = spice.getfov(self.id)
-        frame = Body(frame)
-        boresight = numpy.array(boresight)
-        bounds = numpy.array(bounds).T
-        return nt(shape, frame, boresight, bounds)
+        return self._fov()[0]
+
+    def _fov(self):
+        '''Cached field of view parameters and the name of their frame.'''
+        try:
+            return _FOV_CACHE[self.id]
+        except KeyError:
+            pass
+        shape, frame_name, boresight, bounds = spice.getfov(self.id)
+        params = FOVParameters(shape, Body(frame_name),
+            numpy.array(boresight), numpy.array(bounds).T)
+        _FOV_CACHE[self.id] = params, frame_name
+        return params, frame_name
+
+    def _visibility(self, ets, body, abcorr=None):
+        '''Batched visibility test of `body` as a point target.
+
+        Parameters
+        ----------
+        ets: ndarray of float
+            Ephimeris times to evaluate.
+        body: Body
+            The target.
+        abcorr: str, optional
+            Aberration correction.
 
+        Returns
+        -------
+        valid: ndarray of bool
+            If the geometry could be computed for the respective time.
+        visible: ndarray of bool
+            If the target is inside the field of view at the respective time.
+        '''
+        fov, frame_name = self._fov()
+        positions, _, found_pos = spice.spkpos_array(body.name, ets, 'J2000',
+            abcorr or Body._ABCORR, fov.frame.name)
+        rotations, found_rot = spice.pxform_array('J2000', frame_name, ets)
+        directions = numpy.einsum('nij,nj->ni', rotations, positions)
+        visible = _fov_contains(fov.shape, fov.boresight, fov.bounds.T,
+            directions)
+        return found_pos & found_rot, visible
+
+    @profiling.instrument('Instrument.can_see')
     def can_see(self, times, body, abcorr=None):
         '''Test if the Instrument can see a specified Body.
 
@@ -576,34 +1219,80 @@ class Instrument(Body):
         visibility: ndarray of bool
             If the Body was visible at the given time.
         '''
-        times = _prepare_times(times)
+        times = _prepare_time_array(times)
+        body = Body(body)
+        valid, visible = self._visibility(posix2et(times), body, abcorr)
+        return numpy.ma.array(times[valid], mask=~visible[valid])
+
+    @profiling.instrument('Instrument.visibility_windows')
+    def visibility_windows(self, body, start, stop, step, abcorr=None):
+        '''Find the time windows in which the Instrument can see a specified
+        Body.
+
+        Uses the adaptive search of the geometry finder instead of sampling.
+
+        Parameters
+        ----------
+        body: str or Body
+            The Body to test visibility for.
+        start, stop: float
+            UNIX timestamps confining the search.
+        step: float
+            Step size of the search in seconds. Must be shorter than the
+            shortest visibility window or gap that should be found.
+        abcorr: {'LT', 'LT+S', 'CN', 'CN+S', 'XLT', 'XLT+S', 'XCN', 'XCN+S'}, optional
+            Aberration correction to be applied. For explanation see
+            `here <http://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/cspice/gftfov_c.html#Detailed_Input>`_.
+
+        Returns
+        -------
+        TimeWindows
+            All start-end-tuples of Time during which the Body is visible.
+
+        Raises
+        ------
+        SpiceError
+            If necessary information is missing.
+        '''
         body = Body(body)
         frame, _ = _prepare_frame(body)
-        observer = self.fov().frame
-        result = []
-        for t in times:
-            with util.ignored(spice.SpiceError):
-                visible = spice.fovtrg(self.name, body.name, 'POINT', frame,
-                    abcorr or Body._ABCORR, observer.name,
-                    Time.fromposix(t).et())
-                result.extend([float(t), not visible])
-        return numpy.ma.array(result[::2], mask=result[1::2])
+        fov, _ = self._fov()
+        et0 = Time.fromposix(start).et()
+        et1 = Time.fromposix(stop).et()
+        # Result cell grows on demand, up to one window per search step
+        size = self._WINDOW_CELL_SIZE
+        max_size = max(size, int((et1 - et0) / float(step)) + 1)
+        while True:
+            cell = spice.SpiceCell.double(2 * size)
+            complete = spice.gftfov(self.name, body.name, 'POINT', frame,
+                abcorr or Body._ABCORR, fov.frame.name, float(step), et0, et1,
+                cell)
+            if complete:
+                break
+            if size >= max_size:
+                msg = 'More than {} visibility windows found'
+                raise spice.SpiceError(msg.format(max_size))
+            size = min(2 * size, max_size)
+        windows = ((Time.fromet(t0), Time.fromet(t1))
+            for t0, t1 in zip(cell[::2], cell[1::2]))
+        return util.TimeWindows(*windows)
 
 
 class Planet(Body):
     '''Planets are ephimeris objects with IDs between 199 and 999 with
     pattern [1-9]99.'''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Planet, self).__init__(body)
-        self._frame = 'IAU_' + self._name
 
     @property
-    def parent(self):
-        return Body(10)
+    def _frame(self):
+        return 'IAU_' + self.name
 
-    @property
-    def children(self):
-        return list(_iterbodies(self.id - 98, self.id))
+    @staticmethod
+    def _parent_id(id_):
+        return 10
 
 
 class Satellite(Body):
@@ -612,36 +1301,40 @@ class Satellite(Body):
 
     Satellites are natural bodies orbiting a planet e.g. moons.
     '''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Satellite, self).__init__(body)
-        self._frame = 'IAU_' + self._name
 
     @property
-    def parent(self):
-        return Body(self.id - self.id % 100 + 99)
+    def _frame(self):
+        return 'IAU_' + self.name
+
+    @staticmethod
+    def _parent_id(id_):
+        return id_ - id_ % 100 + 99
 
 
 class Spacecraft(Body):
     '''Spacecraft are ephimeris objects with IDs between -1
     and -999 or < -99999.'''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Spacecraft, self).__init__(body)
 
-    @property
-    def children(self):
-        return list(_iterbodies(self.id * 1000, self.id * 1000 - 1000, -1))
-
 
 class Star(Body):
     '''Only used for the sun (ID 10) at the moment.'''
+    __slots__ = ()
+
     def __init__(self, body):
         super(Star, self).__init__(body)
-        self._frame = 'IAU_SUN'
 
     @property
-    def parent(self):
-        return Body(0)
+    def _frame(self):
+        return 'IAU_SUN'
 
-    @property
-    def children(self):
-        return list(_iterbodies(199, 1000, 100))
+    @staticmethod
+    def _parent_id(id_):
+        return 0
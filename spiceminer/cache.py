@@ -0,0 +1,390 @@
+#-*- coding:utf-8 -*-
+
+import weakref
+import collections
+
+import numpy
+
+from . import util
+from .bodies import Body
+from .extra import chebyshev, matrix2quaternion, quaternion2matrix, \
+    quaternion_angle, slerp
+from .time_ import Time
+
+__all__ = ['PositionCache', 'RotationCache']
+
+
+### Invalidation ###
+# All living caches, cleared whenever kernels are (un)loaded
+_CACHES = weakref.WeakSet()
+
+@util.on_kernel_change
+def _clear_all():
+    for cache in list(_CACHES):
+        cache.clear()
+
+
+class _LRUCache(object):
+    '''Base class for caches storing data in time segments, least recently
+    used segments are evicted first.'''
+
+    def __init__(self, segment_length, max_segments):
+        self._segment_length = float(segment_length)
+        self._max_segments = int(max_segments)
+        self._segments = collections.OrderedDict()
+        _CACHES.add(self)
+
+    def __len__(self):
+        return len(self._segments)
+
+    def clear(self):
+        '''Drop all cached segments.'''
+        self._segments.clear()
+
+    def _segment(self, key):
+        try:
+            segment = self._segments.pop(key)
+        except KeyError:
+            segment = self._build(key)
+            while len(self._segments) >= self._max_segments:
+                self._segments.popitem(last=False)
+        self._segments[key] = segment
+        return segment
+
+    def _bounds(self, key):
+        '''Start and end time of the segment with `key`.'''
+        return key[-1] * self._segment_length, (key[-1] + 1) * self._segment_length
+
+    def _evaluate(self, times, func, prefix=()):
+        '''Call ``func(segment, times)`` for the times in each segment.
+
+        Parameters
+        ----------
+        times: ndarray of float
+            The times to evaluate.
+        func: callable
+            Returns a boolean array marking the times it could evaluate and
+            the values for those times.
+        prefix: tuple, optional
+            Added in front of the segment number to build the segment key.
+
+        Returns
+        -------
+        valid: ndarray of bool
+            Which times could be evaluated.
+        results: list of tuple
+            The indices in `times` and the values computed for them.
+        '''
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        keys = numpy.floor(times / self._segment_length).astype(int)
+        valid = numpy.zeros(len(times), dtype=bool)
+        order = numpy.argsort(keys, kind='mergesort')
+        results = []
+        for key in numpy.unique(keys):
+            indices = order[keys[order] == key]
+            segment = self._segment(prefix + (int(key),))
+            seg_valid, value = func(segment, times[indices])
+            valid[indices] = seg_valid
+            results.append((indices[seg_valid], value))
+        return valid, results
+
+    def _build(self, key):
+        raise NotImplementedError()
+
+
+### Rotation ###
+_RotationSegment = collections.namedtuple('RotationSegment',
+    ['times', 'quats', 'linked'])
+
+class RotationCache(_LRUCache):
+    '''Interpolating cache for dense sampling of `Body.rotation`.
+
+    The rotation is sampled at knots `spacing` seconds apart and stored as
+    quaternions. Requests are answered by spherical linear interpolation
+    (SLERP) between the surrounding knots. When a segment is built, the
+    interpolation is checked at the midpoints between knots, failing
+    intervals are refined by inserting the exact midpoint until the error is
+    below `tolerance`. Intervals that still fail after `MAX_REFINE`
+    refinements or lack data are not interpolated, times in them are
+    evaluated directly.
+
+    The cache is emptied whenever kernels are loaded or unloaded.
+
+    Parameters
+    ----------
+    body: str or int or Body
+        The Body whose rotation is cached.
+    target: Body or {'ECLIPJ2000', 'J2000'}, optional
+        Reference frame to transform to.
+    spacing: float, optional
+        Distance between knots in seconds.
+    tolerance: float, optional
+        Maximum interpolation error in radians.
+    knots: int, optional
+        Knots per segment.
+    max_segments: int, optional
+        Maximum number of segments to keep.
+
+    Attributes
+    ----------
+    *classattribute* MAX_REFINE: int
+        How often an interval is split at most.
+    body: Body
+    target: str or Body
+    spacing: float
+    tolerance: float
+    '''
+
+    MAX_REFINE = 8
+
+    def __init__(self, body, target='ECLIPJ2000', spacing=Time.HOUR,
+        tolerance=1e-6, knots=64, max_segments=128):
+        super(RotationCache, self).__init__(spacing * knots, max_segments)
+        self.body = Body(body)
+        self.target = target
+        self.spacing = float(spacing)
+        self.tolerance = float(tolerance)
+
+    def _sample(self, times):
+        # Only rotations, attitude would need angular velocities as well
+        times, matrices = self.body.rotation(times, self.target)
+        matrices = numpy.asarray(matrices, dtype=float).reshape(-1, 3, 3)
+        return times, matrix2quaternion(matrices)
+
+    def _interpolate(self, segment, times):
+        knots = segment.times
+        if len(knots) < 2:
+            return numpy.zeros(len(times), dtype=bool), numpy.empty((0, 4))
+        index = numpy.searchsorted(knots, times, side='right') - 1
+        # Times on the last knot use the last interval
+        index[times == knots[-1]] = len(knots) - 2
+        valid = (index >= 0) & (index < len(knots) - 1)
+        index = index[valid]
+        valid[valid] = segment.linked[index]
+        index = index[segment.linked[index]]
+        t0, t1 = knots[index], knots[index + 1]
+        fractions = (times[valid] - t0) / (t1 - t0)
+        return valid, slerp(segment.quats[index], segment.quats[index + 1],
+            fractions)
+
+    def _build(self, key):
+        start, stop = self._bounds(key)
+        count = int(round((stop - start) / self.spacing))
+        times, quats = self._sample(numpy.linspace(start, stop, count + 1))
+        broken = set()
+        # Intervals to check, given by their left knot times
+        left = times[:-1][numpy.diff(times) <= self.spacing * (1 + 1e-9)]
+        for _ in range(self.MAX_REFINE):
+            if not len(left):
+                break
+            index = numpy.searchsorted(times, left)
+            mids = (times[index] + times[index + 1]) / 2.0
+            mid_times, mid_quats = self._sample(mids)
+            found = numpy.in1d(mids, mid_times)
+            broken.update(left[~found])
+            index = index[found]
+            estimate = slerp(quats[index], quats[index + 1], [0.5] * len(index))
+            bad = quaternion_angle(estimate, mid_quats) > self.tolerance
+            if not bad.any():
+                break
+            new_times, new_quats = mid_times[bad], mid_quats[bad]
+            left = numpy.concatenate([times[index][bad], new_times])
+            order = numpy.argsort(numpy.concatenate([times, new_times]))
+            times = numpy.concatenate([times, new_times])[order]
+            quats = numpy.concatenate([quats, new_quats])[order]
+        else:
+            # The intervals split in the last pass were never checked
+            broken.update(left)
+        linked = numpy.diff(times) <= self.spacing * (1 + 1e-9)
+        if broken:
+            linked &= ~numpy.in1d(times[:-1], list(broken))
+        return _RotationSegment(times, quats, linked)
+
+    def quaternions(self, times):
+        '''Get interpolated rotation quaternions.
+
+        Parameters
+        ----------
+        times: float or iterable of float
+            UNIX timestamp(s) for which to get the rotation.
+
+        Returns
+        -------
+        times: ndarray of float
+            The times for which the rotation is available.
+        quats: ndarray of float
+            The nx4 quaternions in SPICE convention (scalar first).
+        '''
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        valid, results = self._evaluate(times, self._interpolate)
+        quats = numpy.empty((len(times), 4))
+        for indices, value in results:
+            quats[indices] = value
+        # Evaluate everything the interpolation doesn't cover directly
+        missing = numpy.flatnonzero(~valid)
+        if len(missing):
+            direct_times, direct = self._sample(times[missing])
+            found = numpy.in1d(times[missing], direct_times)
+            quats[missing[found]] = direct
+            valid[missing[found]] = True
+        return times[valid], quats[valid]
+
+    def rotation(self, times):
+        '''Get interpolated rotation matrices, see `Body.rotation`.
+
+        Parameters
+        ----------
+        times: float or iterable of float
+            UNIX timestamp(s) for which to get the matrix.
+
+        Returns
+        -------
+        times: ndarray of float
+            The times for which the rotation is available.
+        matrices: ndarray of float
+            The nx3x3 rotation matrices.
+        '''
+        times, quats = self.quaternions(times)
+        return times, quaternion2matrix(quats)
+
+
+### Position ###
+_PositionSegment = collections.namedtuple('PositionSegment',
+    ['starts', 'stops', 'coeffs'])
+
+class PositionCache(_LRUCache):
+    '''Cache of Chebyshev fits for dense sampling of `Body.position`.
+
+    Time is split into blocks of `block` seconds. For every combination of
+    body, observer, frame and aberration correction a block is fitted with
+    Chebyshev polynomials of degree `degree` from ``degree + 1`` samples. The
+    fit is verified against additional samples and the block is halved until
+    the deviation is below `tolerance`. Times in blocks that can't be fitted
+    (e.g. because of missing data) are evaluated directly.
+
+    The cache is emptied whenever kernels are loaded or unloaded.
+
+    Parameters
+    ----------
+    block: float, optional
+        Length of the largest fitted block in seconds.
+    degree: int, optional
+        Degree of the Chebyshev polynomials.
+    tolerance: float, optional
+        Maximum deviation of the fit in km.
+    max_depth: int, optional
+        How often a block is halved at most.
+    max_segments: int, optional
+        Maximum number of blocks to keep.
+
+    Attributes
+    ----------
+    degree: int
+    tolerance: float
+    max_depth: int
+    '''
+
+    def __init__(self, block=Time.DAY, degree=12, tolerance=1e-3, max_depth=6,
+        max_segments=256):
+        super(PositionCache, self).__init__(block, max_segments)
+        self.degree = int(degree)
+        self.tolerance = float(tolerance)
+        self.max_depth = int(max_depth)
+        nodes = numpy.cos(numpy.pi * (numpy.arange(self.degree + 1) + 0.5) /
+            (self.degree + 1))
+        self._nodes = nodes[::-1]
+        self._checks = numpy.linspace(-1, 1, 2 * (self.degree + 1))
+
+    def _sample(self, key, times):
+        body, observer, frame, abcorr = key[:4]
+        data = body.position(times, observer, frame, abcorr)
+        if data.size == 0:
+            return numpy.empty(0), numpy.empty((0, 3))
+        return data[0], data[1:].T
+
+    def _fit(self, key, start, stop):
+        '''Chebyshev coefficients for [start, stop] or None if the fit is
+        impossible or too inaccurate.'''
+        half, mid = (stop - start) / 2.0, (stop + start) / 2.0
+        times, positions = self._sample(key, mid + half * self._nodes)
+        if len(times) != len(self._nodes):
+            return None
+        coeffs = numpy.polynomial.chebyshev.chebfit(self._nodes, positions,
+            self.degree)
+        times, positions = self._sample(key, mid + half * self._checks)
+        if len(times) != len(self._checks):
+            return None
+        fitted = chebyshev((times - mid) / half, [coeffs] * len(times))
+        if numpy.linalg.norm(fitted - positions, axis=1).max() > self.tolerance:
+            return None
+        return coeffs
+
+    def _build(self, key):
+        blocks = []
+        pending = [self._bounds(key) + (0,)]
+        while pending:
+            start, stop, depth = pending.pop()
+            coeffs = self._fit(key, start, stop)
+            if coeffs is not None:
+                blocks.append((start, stop, coeffs))
+            elif depth < self.max_depth:
+                mid = (start + stop) / 2.0
+                pending.extend([(start, mid, depth + 1), (mid, stop, depth + 1)])
+        blocks.sort(key=lambda item: item[0])
+        shape = (len(blocks), self.degree + 1, 3)
+        return _PositionSegment(
+            numpy.array([item[0] for item in blocks], dtype=float),
+            numpy.array([item[1] for item in blocks], dtype=float),
+            numpy.array([item[2] for item in blocks], dtype=float).reshape(shape))
+
+    def _interpolate(self, segment, times):
+        index = numpy.searchsorted(segment.starts, times, side='right') - 1
+        valid = index >= 0
+        valid[valid] = times[valid] <= segment.stops[index[valid]]
+        index = index[valid]
+        start, stop = segment.starts[index], segment.stops[index]
+        x = (2 * times[valid] - start - stop) / (stop - start)
+        return valid, chebyshev(x, segment.coeffs[index])
+
+    def position(self, body, times, observer='SUN', frame='ECLIPJ2000',
+        abcorr=None):
+        '''Get the position of a body like `Body.position`, but from cached
+        fits where possible.
+
+        Parameters
+        ----------
+        body: str or Body
+            The Body to get the position of.
+        times: float or iterable of float
+            UNIX timestamp(s) for which to get the position.
+        observer: str or Body, optional
+            The positional reference frame.
+        frame: Body or {'ECLIPJ2000', 'J2000'}, optional
+            The rotational reference frame.
+        abcorr: {'LT', 'LT+S', 'CN', 'CN+S', 'XLT', 'XLT+S', 'XCN', 'XCN+S'}, optional
+            Aberration correction to be applied.
+
+        Returns
+        -------
+        position: ndarray of float
+            The nx4 array where the rows are time, position x, y, z.
+            Positions are in km.
+        '''
+        if isinstance(frame, basestring):
+            frame = frame.upper()
+        else:
+            frame = Body(frame)
+        key = (Body(body), Body(observer), frame, abcorr)
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        valid, results = self._evaluate(times, self._interpolate, key)
+        positions = numpy.empty((len(times), 3))
+        for indices, value in results:
+            positions[indices] = value
+        # Evaluate everything the fits don't cover directly
+        missing = numpy.flatnonzero(~valid)
+        if len(missing):
+            direct_times, direct = self._sample(key, times[missing])
+            found = numpy.in1d(times[missing], direct_times)
+            positions[missing[found]] = direct
+            valid[missing[found]] = True
+        return numpy.vstack([times[valid], positions[valid].T])
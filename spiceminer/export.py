@@ -0,0 +1,220 @@
+#-*- coding:utf-8 -*-
+
+'''Columnar ephemeris files readable without CSPICE.
+
+An export is a directory with an ``index.json`` and one plain ``.npy`` file
+per body and column, e.g. ``399/time.npy`` and ``399/x.npy``. Any NumPy
+can open the columns with ``numpy.load(path, mmap_mode='r')``, `Reader`
+does that and slices time ranges by binary search.
+'''
+
+import os
+import io
+import json
+import collections
+
+import numpy
+
+from . import util
+from .bodies import Body
+
+__all__ = ['export', 'Reader']
+
+
+### Constants ###
+FORMAT_VERSION = 1
+INDEX = 'index.json'
+COLUMNS = ['time', 'x', 'y', 'z', 'vx', 'vy', 'vz', 'lt']
+# Bytes reserved for the .npy header, so it can be rewritten in place once
+# the number of rows is known
+HEADER_SIZE = 128
+
+
+### Writing ###
+def _npy_header(rows):
+    '''Version 1.0 .npy header of a float64 column, padded to HEADER_SIZE.'''
+    magic = numpy.lib.format.magic(1, 0)
+    text = "{{'descr': '<f8', 'fortran_order': False, 'shape': ({},), }}"
+    text = text.format(rows)
+    size = HEADER_SIZE - len(magic) - 2
+    header = text.ljust(size - 1) + '\n'
+    return magic + numpy.array(size, dtype='<u2').tobytes() + \
+        header.encode('latin1')
+
+
+class _ColumnWriter(object):
+    '''Append float64 chunks to a .npy file of yet unknown length.'''
+
+    def __init__(self, path):
+        self._file = io.open(path, 'wb')
+        self._file.write(_npy_header(0))
+        self.rows = 0
+
+    def append(self, values):
+        self._file.write(numpy.asarray(values, dtype='<f8').tobytes())
+        self.rows += len(values)
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(_npy_header(self.rows))
+        self._file.close()
+
+
+def export(directory, bodies, times, observer='SUN', frame='ECLIPJ2000',
+    abcorr=None, chunk_size=100000, backend=None):
+    '''Write the states of several bodies into a columnar export.
+
+    Parameters
+    ----------
+    directory: str
+        Target directory, created if necessary. Existing files of the same
+        bodies are overwritten.
+    bodies: iterable of (str or int or Body)
+        The bodies to export.
+    times: iterable of float or slice
+        Increasing UNIX timestamps, consumed lazily in chunks, see
+        `util.time_chunks`.
+    observer, frame, abcorr, backend:
+        See `Body.state`.
+    chunk_size: int, optional
+        Number of times evaluated and written at once.
+
+    Returns
+    -------
+    reader: Reader
+        The export opened for reading.
+
+    Raises
+    ------
+    ValueError
+        If the times are not increasing.
+    '''
+    bodies = [Body(body) for body in bodies]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    writers = collections.OrderedDict()
+    for body in bodies:
+        path = os.path.join(directory, str(body.id))
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        writers[body] = [_ColumnWriter(os.path.join(path, name + '.npy'))
+            for name in COLUMNS]
+    index = {
+        'version': FORMAT_VERSION,
+        'observer': str(getattr(observer, 'name', observer)),
+        'frame': str(getattr(frame, 'name', frame)),
+        'abcorr': abcorr or Body._ABCORR,
+        'columns': COLUMNS,
+        'bodies': collections.OrderedDict()
+    }
+    last = -numpy.inf
+    try:
+        for chunk in util.time_chunks(times, chunk_size):
+            if chunk[0] < last or (numpy.diff(chunk) < 0).any():
+                raise ValueError('times must be increasing')
+            last = chunk[-1]
+            for body, columns in writers.items():
+                data = body.state(chunk, observer, frame, abcorr, backend)
+                for writer, values in zip(columns, data):
+                    writer.append(values)
+    finally:
+        for columns in writers.values():
+            for writer in columns:
+                writer.close()
+    for body, columns in writers.items():
+        index['bodies'][str(body.id)] = {'name': body.name,
+            'rows': columns[0].rows}
+    with open(os.path.join(directory, INDEX), 'w') as f:
+        json.dump(index, f, indent=1)
+    return Reader(directory)
+
+
+### Reading ###
+class Reader(object):
+    '''Memory mapped access to an export written by `export`.
+
+    Parameters
+    ----------
+    directory: str
+        Directory of the export.
+
+    Attributes
+    ----------
+    observer, frame, abcorr: str
+        The parameters the states were computed with.
+    bodies: dict of int: str
+        IDs and names of the exported bodies.
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX)) as f:
+            index = json.load(f)
+        if index['version'] != FORMAT_VERSION:
+            msg = 'Unsupported export version {}'
+            raise ValueError(msg.format(index['version']))
+        self.observer = index['observer']
+        self.frame = index['frame']
+        self.abcorr = index['abcorr']
+        self._columns = index['columns']
+        self.bodies = {int(key): value['name']
+            for key, value in index['bodies'].items()}
+        self._ids = {name.upper(): id_ for id_, name in self.bodies.items()}
+        self._maps = {}
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.directory)
+
+    def _id(self, body):
+        try:
+            return int(getattr(body, 'id', body))
+        except ValueError:
+            pass
+        try:
+            return self._ids[body.strip().upper()]
+        except KeyError:
+            raise ValueError("Body '{}' is not in the export".format(body))
+
+    def _open(self, id_):
+        if id_ not in self.bodies:
+            raise ValueError("Body '{}' is not in the export".format(id_))
+        if id_ not in self._maps:
+            path = os.path.join(self.directory, str(id_))
+            self._maps[id_] = collections.OrderedDict((name, numpy.load(
+                os.path.join(path, name + '.npy'), mmap_mode='r'))
+                for name in self._columns)
+        return self._maps[id_]
+
+    def columns(self, body, start=None, stop=None):
+        '''Zero-copy views of all columns for times in [`start`, `stop`).
+
+        Parameters
+        ----------
+        body: str or int or Body
+            Name or ID of an exported body.
+        start, stop: float, optional
+            UNIX timestamps, open ended if omitted.
+
+        Returns
+        -------
+        columns: OrderedDict of str: ndarray
+            Memory mapped columns 'time', 'x', 'y', 'z', 'vx', 'vy', 'vz'
+            and 'lt'.
+        '''
+        columns = self._open(self._id(body))
+        times = columns['time']
+        first = 0 if start is None else numpy.searchsorted(times, start)
+        last = len(times) if stop is None else numpy.searchsorted(times,
+            stop)
+        return collections.OrderedDict((name, values[first:last])
+            for name, values in columns.items())
+
+    def state(self, body, start=None, stop=None):
+        '''The 8xn array of `Body.state` for times in [`start`, `stop`).'''
+        return numpy.vstack(list(self.columns(body, start, stop).values()))
+
+    def position(self, body, start=None, stop=None):
+        '''The 4xn array of `Body.position` for times in [`start`,
+        `stop`).'''
+        columns = self.columns(body, start, stop)
+        return numpy.vstack([columns[name] for name in COLUMNS[:4]])
@@ -6,7 +6,8 @@ import numpy as np
 
 from numpy.linalg import norm
 
-__all__ = ['angle', 'sphere2cartesian', 'cartesian2sphere']
+__all__ = ['angle', 'sphere2cartesian', 'cartesian2sphere',
+    'quaternion2matrix', 'matrix2quaternion', 'slerp']
 
 UX, UY, UZ = np.identity(3)
 
@@ -160,6 +161,155 @@ def sphere2cartesian(vectors):
     return np.array([x, y, z])
 
 
+### Rotations ###
+def quaternion2matrix(quats):
+    '''Convert quaternions to rotation matrices.
+
+    Parameters
+    ----------
+    quats: array-like
+        The quaternions to convert. Must have shape (4,) or (n, 4) and use the
+        SPICE convention (scalar first), as returned by `Body.attitude`.
+
+    Returns
+    -------
+    array-like
+        The rotation matrices with shape (3, 3) or (n, 3, 3).
+    '''
+    quats = np.asarray(quats, dtype=float)
+    c, x, y, z = np.rollaxis(quats / norm(quats, axis=-1)[..., None], -1)
+    result = np.empty(quats.shape[:-1] + (3, 3))
+    result[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    result[..., 0, 1] = 2 * (x * y - c * z)
+    result[..., 0, 2] = 2 * (x * z + c * y)
+    result[..., 1, 0] = 2 * (x * y + c * z)
+    result[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    result[..., 1, 2] = 2 * (y * z - c * x)
+    result[..., 2, 0] = 2 * (x * z - c * y)
+    result[..., 2, 1] = 2 * (y * z + c * x)
+    result[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return result
+
+def matrix2quaternion(matrices):
+    '''Convert rotation matrices to quaternions.
+
+    Parameters
+    ----------
+    matrices: array-like
+        The rotation matrices to convert with shape (3, 3) or (n, 3, 3).
+
+    Returns
+    -------
+    array-like
+        The quaternions with shape (4,) or (n, 4) in SPICE convention (scalar
+        first) with a non-negative scalar part.
+    '''
+    matrices = np.asarray(matrices, dtype=float)
+    m = matrices.reshape(-1, 3, 3)
+    m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+    # Use the largest component as divisor for numerical stability
+    squares = np.array([1 + m00 + m11 + m22, 1 + m00 - m11 - m22,
+        1 - m00 + m11 - m22, 1 - m00 - m11 + m22]).T
+    largest = squares.argmax(axis=1)
+    rows = np.arange(len(m))
+    scale = np.sqrt(squares[rows, largest]) * 2
+    sums = [m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0],
+        m[:, 1, 0] - m[:, 0, 1], m[:, 0, 1] + m[:, 1, 0],
+        m[:, 0, 2] + m[:, 2, 0], m[:, 1, 2] + m[:, 2, 1]]
+    # 4 * q[i] * q[j] for all i, j
+    products = np.array([
+        [squares[:, 0], sums[0], sums[1], sums[2]],
+        [sums[0], squares[:, 1], sums[3], sums[4]],
+        [sums[1], sums[3], squares[:, 2], sums[5]],
+        [sums[2], sums[4], sums[5], squares[:, 3]]]).transpose(2, 0, 1)
+    result = products[rows, largest] / scale[:, None]
+    result *= np.where(result[:, 0] < 0, -1, 1)[:, None]
+    return result.reshape(matrices.shape[:-2] + (4,))
+
+def quaternion_multiply(q0, q1):
+    '''Hamilton product of quaternions with shape (4,) or (n, 4), so that
+    ``quaternion2matrix(quaternion_multiply(q0, q1))`` equals the matrix
+    product of ``quaternion2matrix(q0)`` and ``quaternion2matrix(q1)``.'''
+    c0, x0, y0, z0 = np.rollaxis(np.asarray(q0, dtype=float), -1)
+    c1, x1, y1, z1 = np.rollaxis(np.asarray(q1, dtype=float), -1)
+    return np.rollaxis(np.array([
+        c0 * c1 - x0 * x1 - y0 * y1 - z0 * z1,
+        c0 * x1 + x0 * c1 + y0 * z1 - z0 * y1,
+        c0 * y1 - x0 * z1 + y0 * c1 + z0 * x1,
+        c0 * z1 + x0 * y1 - y0 * x1 + z0 * c1]), 0, np.ndim(c0) + 1)
+
+def slerp(q0, q1, fractions):
+    '''Spherical linear interpolation between pairs of quaternions.
+
+    Parameters
+    ----------
+    q0, q1: array-like
+        The quaternions to interpolate between with shape (n, 4).
+    fractions: array-like
+        The n interpolation parameters, 0 yields `q0` and 1 yields `q1`.
+
+    Returns
+    -------
+    array-like
+        The n interpolated unit quaternions. Always follows the shorter arc.
+    '''
+    q0 = np.asarray(q0, dtype=float)
+    q1 = np.asarray(q1, dtype=float)
+    fractions = np.asarray(fractions, dtype=float)[:, None]
+    dot = (q0 * q1).sum(axis=1)
+    q1 = np.where((dot < 0)[:, None], -q1, q1)
+    theta = np.arccos(np.clip(np.abs(dot), 0, 1))[:, None]
+    sin_theta = np.sin(theta)
+    small = sin_theta < 1e-12
+    safe = np.where(small, 1, sin_theta)
+    w0 = np.where(small, 1 - fractions, np.sin((1 - fractions) * theta) / safe)
+    w1 = np.where(small, fractions, np.sin(fractions * theta) / safe)
+    result = w0 * q0 + w1 * q1
+    return result / norm(result, axis=1)[:, None]
+
+def quaternion_angle(q0, q1):
+    '''The angles in radians of the rotations between pairs of quaternions
+    with shape (n, 4).'''
+    dot = np.abs((np.asarray(q0) * np.asarray(q1)).sum(axis=-1))
+    return 2 * np.arccos(np.clip(dot, 0, 1))
+
+
+### Polynomials ###
+def chebyshev(x, coeffs, derivative=False):
+    '''Evaluate Chebyshev series with individual coefficients for each point.
+
+    Parameters
+    ----------
+    x: array-like
+        The n points in [-1, 1] to evaluate.
+    coeffs: array-like
+        Coefficients with shape (n, d+1, k) for k series of degree d per
+        point, lowest order first.
+    derivative: bool, optional
+        Also return the derivative with respect to `x`.
+
+    Returns
+    -------
+    array-like
+        The values with shape (n, k). With `derivative` a tuple of values and
+        derivatives.
+    '''
+    x = np.asarray(x, dtype=float)[:, None]
+    coeffs = np.asarray(coeffs, dtype=float)
+    t_prev, t_curr = np.ones_like(x), x
+    d_prev, d_curr = np.zeros_like(x), np.ones_like(x)
+    value = coeffs[:, 0] * t_prev
+    deriv = np.zeros_like(value)
+    for k in range(1, coeffs.shape[1]):
+        value = value + coeffs[:, k] * t_curr
+        deriv = deriv + coeffs[:, k] * d_curr
+        t_prev, t_curr = t_curr, 2 * x * t_curr - t_prev
+        d_prev, d_curr = d_curr, 2 * t_prev + 2 * x * d_curr - d_prev
+    if derivative:
+        return value, deriv
+    return value
+
+
 ### Some range-functions for easier usage of bodies.Body.state() etc. ###
 def _range_base(start, stop, step):
     '''Simple range function to be used in more complex wrappers.
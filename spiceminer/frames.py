@@ -0,0 +1,126 @@
+#-*- coding:utf-8 -*-
+
+import collections
+
+import numpy
+
+from . import util
+from . import profiling
+from . import _spicewrapper as spice
+from .kernel import ck, pck
+
+
+### Frame classes, see frinfo_c ###
+INERTIAL = 1
+PCK = 2
+CK = 3
+
+FrameInfo = collections.namedtuple('FrameInfo', ['code', 'center', 'frclass',
+    'classid'])
+
+# Frame name -> FrameInfo or None
+_INFO = {}
+# (from, to) -> constant 3x3 matrix
+_CONSTANT = {}
+util.on_kernel_change(_INFO.clear)
+util.on_kernel_change(_CONSTANT.clear)
+
+
+def frame_info(name):
+    '''Code, center, class and class ID of a frame or None if unknown.'''
+    name = name.upper()
+    if name not in _INFO:
+        code = spice.namfrm(name) or 0
+        info = spice.frinfo(code) if code else None
+        _INFO[name] = FrameInfo(code, *info) if info else None
+    return _INFO[name]
+
+def is_inertial(name):
+    info = frame_info(name)
+    return info is not None and info.frclass == INERTIAL
+
+def constant(from_, to):
+    '''The rotation between two inertial frames, computed once with CSPICE.
+
+    Raises
+    ------
+    ValueError
+        If one of the frames is not inertial.
+    '''
+    key = from_.upper(), to.upper()
+    if key not in _CONSTANT:
+        if not (is_inertial(from_) and is_inertial(to)):
+            msg = "Rotation from '{}' to '{}' is not constant"
+            raise ValueError(msg.format(from_, to))
+        matrix = numpy.array(spice.pxform(from_, to, 0.0)).reshape(3, 3)
+        _CONSTANT[key] = matrix
+    return _CONSTANT[key]
+
+def _from_j2000(name, ets):
+    '''Rotations from J2000 to the frame evaluated without CSPICE.'''
+    info = frame_info(name)
+    if info is None:
+        raise ValueError("Unknown frame '{}'".format(name))
+    if info.frclass == INERTIAL:
+        matrix = constant('J2000', name)
+        return numpy.repeat(matrix[None], len(ets), axis=0), numpy.ones(
+            len(ets), dtype=bool)
+    elif info.frclass == PCK:
+        matrices, found = pck.rotation(info.classid, ets)
+        if not found.all():
+            # E.g. no complete IAU model in the pool, CSPICE may know more
+            missing = ~found
+            matrices[missing], found[missing] = spice.pxform_array('J2000',
+                name, ets[missing])
+        return matrices, found
+    elif info.frclass == CK:
+        matrices, found = ck.matrices(info.classid, ets, 'J2000')
+        return matrices.transpose(0, 2, 1), found
+    msg = "Frame '{}' of class {} not supported by the numpy backend"
+    raise ValueError(msg.format(name, info.frclass))
+
+@profiling.instrument('frames.rotation')
+def rotation(from_, to, ets, backend='cspice'):
+    '''Rotation matrices like ``pxform(from_, to, et)`` for many times.
+
+    Rotations between inertial frames are constant and only computed once.
+
+    Parameters
+    ----------
+    from_, to: str
+        Frame names.
+    ets: ndarray of float
+        Ephemeris times.
+    backend: {'cspice', 'numpy'}, optional
+        `cspice`: Evaluate other rotations with CSPICE.
+        `numpy`: Evaluate binary PCK, text PCK (IAU_*) and CK frames
+        directly, other frames are not supported. Times of PCK frames that
+        neither a binary segment nor a complete IAU model covers are left to
+        CSPICE.
+
+    Returns
+    -------
+    matrices: ndarray of float
+        The nx3x3 array of rotation matrices.
+    found: ndarray of bool
+        Which times could be computed.
+
+    Raises
+    ------
+    ValueError
+        If the backend can't handle the frames.
+    '''
+    ets = numpy.asarray(ets, dtype=float).reshape(-1)
+    if is_inertial(from_) and is_inertial(to):
+        matrix = constant(from_, to)
+        return numpy.repeat(matrix[None], len(ets), axis=0), numpy.ones(
+            len(ets), dtype=bool)
+    if backend == 'numpy':
+        source, found_source = _from_j2000(from_, ets)
+        target, found_target = _from_j2000(to, ets)
+        matrices = numpy.einsum('nij,nkj->nik', target, source)
+        return matrices, found_source & found_target
+    elif backend == 'cspice':
+        return spice.pxform_array(from_, to, ets)
+    msg = "backend must be 'cspice' or 'numpy', got '{}'"
+    raise ValueError(msg.format(backend))
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+import collections
+
+import numpy
+
+from .daf import DAF
+from .spk import INERTIAL_FRAMES, INERTIAL_CODES, _lagrange, _hermite
+from .. import _spicewrapper as spice
+from .. import profiling
+from ..extra import (quaternion2matrix, matrix2quaternion,
+    quaternion_multiply, slerp)
+
+
+### Constants ###
+# J2000 -> frame rotations as quaternions
+INERTIAL_QUATERNIONS = {name: matrix2quaternion(matrix)
+    for name, matrix in INERTIAL_FRAMES.items()}
+
+# Packet sizes of type 5 subtypes
+TYPE5_PACKETS = {0: 8, 1: 4, 2: 14, 3: 7}
+
+
+def _conjugate(quats):
+    return quats * numpy.array([1, -1, -1, -1])
+
+
+### Segment evaluation ###
+class _Segment(object):
+    '''A single CK segment.
+
+    Attributes
+    ----------
+    instrument, frame, type: int
+        As in the segment summary.
+    start, stop: float
+        Covered time span in spacecraft clock ticks.
+    '''
+
+    def __init__(self, daf, doubles, ints):
+        self.start, self.stop = doubles[:2]
+        self.instrument, self.frame, self.type, self.rates = ints[:4]
+        self._begin, self._end = ints[4:6]
+        self._data = daf.doubles
+
+    def __repr__(self):
+        return '{}(instrument={}, frame={}, type={})'.format(
+            self.__class__.__name__, self.instrument, self.frame, self.type)
+
+    def evaluate(self, ticks):
+        '''Get the C-matrix quaternions (segment frame -> instrument) and a
+        mask of the ticks covered by the segment.'''
+        raise NotImplementedError()
+
+
+class _ConstantRateSegment(_Segment):
+    '''Type 2: Intervals of constant angular velocity.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_ConstantRateSegment, self).__init__(daf, doubles, ints)
+        size = self._end - self._begin + 1
+        # size = 10 * count + (count - 1) // 100
+        count = (size * 100 + 100) // 1001
+        start = self._begin - 1
+        self._records = self._data[start:start + 8 * count].reshape(count, 8)
+        self._starts = self._data[start + 8 * count:start + 9 * count]
+        self._stops = self._data[start + 9 * count:start + 10 * count]
+
+    def evaluate(self, ticks):
+        index = numpy.searchsorted(self._starts, ticks, side='right') - 1
+        found = (index >= 0) & (ticks <= self._stops[index.clip(0)])
+        index = index.clip(0)
+        records = self._records[index]
+        rate = records[:, 4:7]
+        speed = numpy.sqrt((rate ** 2).sum(axis=1))
+        axis = rate / numpy.where(speed == 0, 1, speed)[:, None]
+        angle = speed * (ticks - self._starts[index]) * records[:, 7]
+        # C(t) = C0 * R(axis, angle)^T
+        rotation = numpy.hstack([numpy.cos(angle / 2)[:, None],
+            -axis * numpy.sin(angle / 2)[:, None]])
+        return quaternion_multiply(records[:, :4], rotation), found
+
+
+class _InterpolatedSegment(_Segment):
+    '''Base for types 3 and 5: discrete quaternions with interpolation
+    intervals.'''
+
+    def _layout(self, count, intervals, packet):
+        start = self._begin - 1
+        self._packets = self._data[start:start + packet * count].reshape(
+            count, packet)
+        start += packet * count
+        self._epochs = self._data[start:start + count]
+        start += count + (count - 1) // 100
+        self._interval_starts = self._data[start:start + intervals]
+        # Index of the first and last record of each interval
+        self._first = numpy.searchsorted(self._epochs, self._interval_starts)
+        self._last = numpy.append(self._first[1:], count) - 1
+
+    def _locate(self, ticks):
+        '''Interval index for each tick and whether it's covered.'''
+        interval = numpy.searchsorted(self._interval_starts, ticks,
+            side='right') - 1
+        valid = interval >= 0
+        interval = interval.clip(0)
+        found = valid & (ticks <= self._epochs[self._last[interval]])
+        return interval, found
+
+
+class _LinearSegment(_InterpolatedSegment):
+    '''Type 3: Linear interpolation between quaternions.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_LinearSegment, self).__init__(daf, doubles, ints)
+        intervals, count = self._data[self._end - 2:self._end].astype(int)
+        self._layout(count, intervals, 7 if self.rates else 4)
+
+    def evaluate(self, ticks):
+        interval, found = self._locate(ticks)
+        first, last = self._first[interval], self._last[interval]
+        index = numpy.searchsorted(self._epochs, ticks, side='right') - 1
+        index = index.clip(first, numpy.maximum(last - 1, first))
+        following = numpy.minimum(index + 1, last)
+        span = self._epochs[following] - self._epochs[index]
+        fraction = (ticks - self._epochs[index]) / numpy.where(span == 0, 1,
+            span)
+        quats = slerp(self._packets[index, :4], self._packets[following, :4],
+            fraction.clip(0, 1))
+        return quats, found
+
+
+class _PolynomialSegment(_InterpolatedSegment):
+    '''Type 5: Hermite (subtypes 0 and 2) or Lagrange (subtypes 1 and 3)
+    interpolation of quaternions.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_PolynomialSegment, self).__init__(daf, doubles, ints)
+        values = self._data[self._end - 5:self._end]
+        self._rate = values[0]
+        self._subtype, self._window, intervals, count = values[1:].astype(int)
+        if self._subtype not in TYPE5_PACKETS:
+            msg = 'Unknown CK type 5 subtype {} ({})'
+            raise ValueError(msg.format(self._subtype, self))
+        self._layout(count, intervals, TYPE5_PACKETS[self._subtype])
+
+    def evaluate(self, ticks):
+        interval, found = self._locate(ticks)
+        result = numpy.empty((len(ticks), 4))
+        for i in numpy.unique(interval):
+            mask = interval == i
+            result[mask] = self._interpolate(ticks[mask], self._first[i],
+                self._last[i])
+        norm = numpy.sqrt((result ** 2).sum(axis=1))
+        return result / norm[:, None], found
+
+    def _interpolate(self, ticks, first, last):
+        window = min(self._window, last - first + 1)
+        start = numpy.searchsorted(self._epochs, ticks, side='right') - 1
+        start = (start - (window - 1) // 2).clip(first, last - window + 1)
+        index = start[:, None] + numpy.arange(window)
+        nodes = self._epochs[index]
+        packets = self._packets[index]
+        # Keep quaternions of a window in the same hemisphere
+        sign = numpy.where((packets[:, :, :4] * packets[:, :1, :4]).sum(
+            axis=2) < 0, -1, 1)[:, :, None]
+        quats = packets[:, :, :4] * sign
+        if self._subtype in (1, 3):
+            return _lagrange(nodes, quats, ticks)
+        # Derivatives are stored per second
+        derivatives = packets[:, :, 4:8] * sign * self._rate
+        return _hermite(nodes, quats, derivatives, ticks)[:, :4]
+
+SEGMENT_TYPES = {
+    2: _ConstantRateSegment,
+    3: _LinearSegment,
+    5: _PolynomialSegment
+}
+
+
+### Files and segment index ###
+class CKFile(object):
+    '''Memory mapped CK file with its segments in file order.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.daf = DAF(path)
+        doubles, ints = self.daf.summaries()
+        self.segments = [_make_segment(self.daf, d, i)
+            for d, i in zip(doubles, ints)]
+
+def _make_segment(daf, doubles, ints):
+    cls = SEGMENT_TYPES.get(ints[2], _Segment)
+    return cls(daf, doubles, ints)
+
+# Paths of loaded CK files in load order
+_PATHS = []
+# path -> CKFile, instrument -> list of segments, highest priority first
+_FILES = {}
+_INDEX = None
+
+def register(path):
+    '''Make a CK file available to the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    _PATHS.append(path)
+    _INDEX = None
+
+def unregister(path):
+    '''Remove a CK file from the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    _FILES.pop(path, None)
+    _INDEX = None
+
+def _index():
+    '''Map instruments to their segments, later loaded files and later
+    segments in a file take precedence.'''
+    global _INDEX
+    if _INDEX is None:
+        index = collections.defaultdict(list)
+        for path in _PATHS:
+            if path not in _FILES:
+                _FILES[path] = CKFile(path)
+            for segment in _FILES[path].segments:
+                index[segment.instrument].append(segment)
+        for segments in index.values():
+            segments.reverse()
+        _INDEX = dict(index)
+    return _INDEX
+
+def segments(instrument):
+    '''All segments for `instrument`, highest priority first.'''
+    return list(_index().get(instrument, []))
+
+
+### Public evaluation ###
+def pointing(instrument, ticks):
+    '''C-matrix quaternions (J2000 -> instrument) for spacecraft clock ticks.
+
+    Parameters
+    ----------
+    instrument: int
+        CK ID of the instrument or structure.
+    ticks: ndarray of float
+        Encoded continuous spacecraft clock times.
+
+    Returns
+    -------
+    quats: ndarray of float
+        The nx4 array of quaternions in SPICE convention, rows that are not
+        covered are NaN.
+    found: ndarray of bool
+        Which times are covered.
+
+    Raises
+    ------
+    ValueError
+        If a needed segment can't be handled.
+    '''
+    ticks = numpy.asarray(ticks, dtype=float).reshape(-1)
+    result = numpy.empty((len(ticks), 4))
+    result.fill(numpy.nan)
+    remaining = numpy.ones(len(ticks), dtype=bool)
+    for segment in _index().get(instrument, []):
+        mask = remaining & (ticks >= segment.start) & (ticks <= segment.stop)
+        if not mask.any():
+            continue
+        if segment.type not in SEGMENT_TYPES:
+            msg = 'CK type {} not supported by the numpy backend ({})'
+            raise ValueError(msg.format(segment.type, segment))
+        if segment.frame not in INERTIAL_CODES:
+            msg = 'CK frame {} not supported by the numpy backend ({})'
+            raise ValueError(msg.format(segment.frame, segment))
+        quats, covered = segment.evaluate(ticks[mask])
+        if segment.frame != 1:
+            base = INERTIAL_QUATERNIONS[INERTIAL_CODES[segment.frame]]
+            quats = quaternion_multiply(quats, base)
+        index = numpy.flatnonzero(mask)[covered]
+        result[index] = quats[covered]
+        remaining[index] = False
+        if not remaining.any():
+            break
+    return result, ~remaining
+
+@profiling.instrument('ck.rotation')
+def rotation(instrument, ets, frame, sclk=None):
+    '''Rotation from the instrument frame to an inertial frame, equivalent
+    to ``pxform(<instrument frame>, frame, et)``.
+
+    Results agree with CSPICE to about 1e-12 rad. The time conversion to
+    spacecraft clock ticks is done by CSPICE, so the SCLK and leapseconds
+    kernels have to be loaded.
+
+    Parameters
+    ----------
+    instrument: int
+        CK ID of the instrument or structure.
+    ets: ndarray of float
+        Ephemeris times.
+    frame: {'J2000', 'ECLIPJ2000'}
+        Frame to transform to.
+    sclk: int, optional
+        Spacecraft clock ID, by default looked up with ``ckmeta``.
+
+    Returns
+    -------
+    quats: ndarray of float
+        The nx4 array of quaternions in SPICE convention.
+    found: ndarray of bool
+        Which times are covered.
+
+    Raises
+    ------
+    ValueError
+        If the frame or a needed segment can't be handled.
+    SpiceError
+        If the spacecraft clock is unknown.
+    '''
+    try:
+        target = INERTIAL_QUATERNIONS[frame.upper()]
+    except KeyError:
+        msg = "Frame '{}' not supported by the numpy backend"
+        raise ValueError(msg.format(frame))
+    if sclk is None:
+        sclk = spice.ckmeta(instrument, 'SCLK')
+    ticks, converted = spice.sce2c_array(sclk, ets)
+    quats, found = pointing(instrument, ticks)
+    found &= converted
+    return quaternion_multiply(target, _conjugate(quats)), found
+
+def matrices(instrument, ets, frame, sclk=None):
+    '''Like `rotation`, but returns nx3x3 rotation matrices.'''
+    quats, found = rotation(instrument, ets, frame, sclk)
+    return quaternion2matrix(quats), found
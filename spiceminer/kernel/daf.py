@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+import mmap
+import struct
+
+import numpy
+
+__all__ = ['DAF']
+
+
+### Constants ###
+RECORD_BYTES = 1024
+RECORD_DOUBLES = RECORD_BYTES // 8
+
+# Binary formats as stored in the file record
+FORMATS = {'LTL-IEEE': '<', 'BIG-IEEE': '>'}
+
+
+class DAF(object):
+    '''Read-only, memory mapped Double precision Array File (DAF).
+
+    SPK, CK and binary PCK kernels are DAFs. Each array in the file is
+    described by a summary of `nd` doubles and `ni` integers and a name.
+
+    Parameters
+    ----------
+    path: str
+        Path to the file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a DAF.
+
+    Attributes
+    ----------
+    path: str
+    idword: str
+        File identifier, e.g. 'DAF/SPK'.
+    nd, ni: int
+        Number of doubles/integers in a summary.
+    doubles: ndarray of float
+        The whole file as array of doubles, the element with DAF address
+        `a` is ``doubles[a - 1]``.
+
+    Notes
+    -----
+    Format description:
+        https://naif.jpl.nasa.gov/pub/naif/toolkit_docs/C/req/daf.html
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        record = self._mmap[:RECORD_BYTES]
+        self.idword = record[:8].decode('ascii', 'replace').strip()
+        if not (self.idword.startswith('DAF/') or self.idword == 'NAIF/DAF'):
+            self.close()
+            raise ValueError('Not a DAF file: {}'.format(path))
+        fmt = record[88:96].decode('ascii', 'replace')
+        endian = FORMATS.get(fmt)
+        if endian is None:
+            # Very old files don't record their format, guess from ND
+            nd = struct.unpack('<i', record[8:12])[0]
+            endian = '<' if 0 < nd < RECORD_DOUBLES else '>'
+        self._endian = endian
+        self.nd, self.ni = struct.unpack(endian + 'ii', record[8:16])
+        self._fward = struct.unpack(endian + 'i', record[76:80])[0]
+        count = len(self._mmap) // 8
+        self.doubles = numpy.frombuffer(self._mmap, dtype=endian + 'f8',
+            count=count)
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.path)
+
+    def close(self):
+        '''Release the memory map.'''
+        self.doubles = None
+        self._mmap.close()
+
+    @property
+    def summary_size(self):
+        '''Size of a single summary in doubles.'''
+        return self.nd + (self.ni + 1) // 2
+
+    def _summary_dtype(self):
+        size = self.summary_size * 8
+        return numpy.dtype({
+            'names': ['doubles', 'ints'],
+            'formats': [(self._endian + 'f8', self.nd),
+                (self._endian + 'i4', self.ni)],
+            'offsets': [0, self.nd * 8],
+            'itemsize': size})
+
+    def _records(self):
+        '''Yield number and summary count of all summary records.'''
+        record = self._fward
+        seen = set()
+        while record and record not in seen:
+            seen.add(record)
+            base = (record - 1) * RECORD_DOUBLES
+            next_, _, count = self.doubles[base:base + 3]
+            yield record, int(count)
+            record = int(next_)
+
+    def summaries(self):
+        '''Read all array summaries in a single pass over the file.
+
+        Returns
+        -------
+        doubles: ndarray of float
+            The nxnd array of the double components.
+        ints: ndarray of int
+            The nxni array of the integer components.
+        '''
+        dtype = self._summary_dtype()
+        chunks = [numpy.frombuffer(self._mmap, dtype=dtype, count=count,
+            offset=(record - 1) * RECORD_BYTES + 24)
+            for record, count in self._records()]
+        if not chunks:
+            return numpy.empty((0, self.nd)), numpy.empty((0, self.ni), int)
+        summaries = numpy.concatenate(chunks)
+        doubles = summaries['doubles'].astype(float).reshape(-1, self.nd)
+        ints = summaries['ints'].astype(int).reshape(-1, self.ni)
+        return doubles, ints
+
+    def coverage(self, id_column=0):
+        '''Group the time spans of all arrays by an integer summary field.
+
+        Assumes the first two doubles of a summary are the start and stop
+        time, as in SPK, CK and binary PCK files.
+
+        Parameters
+        ----------
+        id_column: int, optional
+            Index of the integer component holding the ID.
+
+        Returns
+        -------
+        dict[int: ndarray]
+            Maps IDs to nx2 arrays of start and stop times in file order.
+        '''
+        doubles, ints = self.summaries()
+        ids = ints[:, id_column]
+        order = numpy.argsort(ids, kind='mergesort')
+        ids, spans = ids[order], doubles[order, :2]
+        unique, first = numpy.unique(ids, return_index=True)
+        last = numpy.append(first[1:], len(ids))
+        return {int(i): spans[a:b] for i, a, b in zip(unique, first, last)}
+
+    def names(self):
+        '''Read the names of all arrays in the order of `summaries`.'''
+        size = self.summary_size * 8
+        result = []
+        for record, count in self._records():
+            offset = record * RECORD_BYTES
+            for i in range(count):
+                name = self._mmap[offset + i * size:offset + (i + 1) * size]
+                result.append(name.decode('ascii', 'replace').strip())
+        return result
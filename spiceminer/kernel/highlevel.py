@@ -7,6 +7,8 @@ import itertools
 from . import lowlevel
 from .. import bodies
 from .. import util
+from .. import profiling
+from .. import _spicewrapper as spice
 
 __all__ = ['Kernel']
 
@@ -57,6 +59,7 @@ class Kernel(object):
                 Kernel.TIMEWINDOWS_ROT[body] += vals
         # Make self available for unloading
         self.__class__.LOADED.add(self)
+        util.kernel_changed()
 
     def _unload(self):
         self.__class__.LOADED.remove(self)
@@ -72,6 +75,7 @@ class Kernel(object):
                     del windows[body]
                 bodies.Body._delete(id_)
         lowlevel.unload_any(self._kprops)
+        util.kernel_changed()
 
     def __str__(self):
         return '{} {} ({})'.format(
@@ -97,6 +101,7 @@ class Kernel(object):
         return self._kprops.info
 
     @classmethod
+    @profiling.instrument('Kernel.load')
     def load(cls, path='.', recursive=True, followlinks=False, force_reload=False):
         '''Load a kernel file or all kernel files in a directory tree.
 
@@ -142,18 +147,22 @@ class Kernel(object):
             raise IOError(2, msg, path)
         else:
             kpall = itertools.chain([first], kpall)
-        # Filter depending on force_reload to allow reloading existing kernels
-        if force_reload:
-            kpall = lowlevel.iunload_kprops(kpall)
-        else:
-            kpall = lowlevel.ifilter_kprops(kpall)
-        # Split and create instances (misc first for ls and sc)
-        kpmisc, kpbody = lowlevel.split_kprops(kpall)
-        misc_kernels = set(cls(kprops) for kprops in kpmisc)
-        body_kernels = set(cls(kprops) for kprops in kpbody)
+        # Other threads must not see a partially loaded set of kernels
+        with spice.LOCK:
+            # Filter depending on force_reload to allow reloading existing
+            # kernels
+            if force_reload:
+                kpall = lowlevel.iunload_kprops(kpall)
+            else:
+                kpall = lowlevel.ifilter_kprops(kpall)
+            # Split and create instances (misc first for ls and sc)
+            kpmisc, kpbody = lowlevel.split_kprops(kpall)
+            misc_kernels = set(cls(kprops) for kprops in kpmisc)
+            body_kernels = set(cls(kprops) for kprops in kpbody)
         return set.union(misc_kernels, body_kernels)
 
     @classmethod
+    @profiling.instrument('Kernel.unload')
     def unload(cls, path='.', recursive=True, followlinks=False):
         '''Unload a kernel file or all kernel files in a directory tree.
 
@@ -184,8 +193,10 @@ class Kernel(object):
             msg = 'No valid files found on path'
             raise IOError(2, msg, path)
         kpfound = {p.path for p in kpfound}
-        kernels = {k for k in cls.LOADED if k.path in kpfound}
-        # FIXME: Unload ls kernel last and only if no more bodies are loaded
-        for k in kernels:
-            k._unload()
+        with spice.LOCK:
+            kernels = {k for k in cls.LOADED if k.path in kpfound}
+            # FIXME: Unload ls kernel last and only if no more bodies are
+            # loaded
+            for k in kernels:
+                k._unload()
         return kernels
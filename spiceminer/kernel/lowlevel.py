@@ -5,9 +5,13 @@ import os
 import re
 import collections
 
+from . import ck
+from . import pck
+from . import spk
+from .daf import DAF
 from .. import util
 from .. import _spicewrapper as spice
-from ..time_ import Time
+from ..time_ import Time, et2posix
 
 
 ### Constants ###
@@ -23,6 +27,9 @@ KTYPE_NONE = {'ls', 'sc', 'i'}
 KTYPE_BODY = set.union(KTYPE_POS, KTYPE_ROT)
 KTYPE = set.union(KTYPE_BODY, KTYPE_NONE)
 
+# Pure numpy evaluators for binary kernels
+EVALUATORS = {'sp': spk, 'c': ck, 'pc': pck}
+
 
 ### Kernel property parsing ###
 kp = collections.namedtuple('KernelProperties', ['path', 'binary', 'arch', 'type', 'info'])
@@ -126,27 +133,41 @@ def load_any(kprops):
     }.get(kprops.type, _load_dummy)
     windows = loader(kprops.path)
     spice.furnsh(kprops.path)
+    evaluator = EVALUATORS.get(kprops.type)
+    if evaluator and kprops.binary:
+        evaluator.register(kprops.path)
     return windows
 
 def unload_any(kprops):
     spice.unload(kprops.path)
+    evaluator = EVALUATORS.get(kprops.type)
+    if evaluator:
+        evaluator.unregister(kprops.path)
 
 # Abstract loading mechanisms
-_IDS = spice.SpiceCell.integer(1000)
-_WINDOWS = spice.SpiceCell.double(100)
-
-def _loader_template_bin(getter_ids, getter_times, path):
-    getter_ids(path, _IDS)
+def _loader_template_daf(path, convert=None):
+    '''Read the coverage of all bodies from the DAF summaries in one pass,
+    without loading the file into CSPICE.'''
+    daf = DAF(path)
+    try:
+        coverage = daf.coverage()
+    finally:
+        daf.close()
     result = {}
-    for idcode in _IDS:
-        _WINDOWS.reset()
-        getter_times(path, idcode, _WINDOWS)
-        # Create new time windows
-        windows = ((Time.fromet(et0), Time.fromet(et1))
-            for et0, et1 in zip(_WINDOWS[::2], _WINDOWS[1::2]))
-        result[idcode] = util.TimeWindows(*windows)
+    for idcode, spans in coverage.items():
+        if convert is not None:
+            spans = convert(idcode, spans)
+        result[idcode] = util.TimeWindows.fromarray(et2posix(spans),
+            Time.fromposix)
     return result
 
+def _sclk2et(idcode, spans):
+    '''Convert CK spacecraft clock ticks to ephimeris times.'''
+    sclk = spice.ckmeta(idcode, 'SCLK')
+    ets, found = spice.sct2e_array(sclk, spans)
+    found = found.reshape(-1, 2).all(axis=1)
+    return ets.reshape(-1, 2)[found]
+
 def _loader_template_txt(regex, path):
     with open(path, 'r') as f:
         return {int(i): util.TimeWindows() for i in re.findall(regex, f.read())}
@@ -164,23 +185,18 @@ def _load_dummy(path):
 def _load_sp(path):
     '''Load sp kernel and associated windows.'''
     _validate_ls()
-    _IDS.reset()
-    windows = _loader_template_bin(spice.spkobj, spice.spkcov, path)
-    return windows
+    return _loader_template_daf(path)
 
 def _load_c(path):
     '''Load c kernel and associated windows.'''
-    _IDS.reset()
-    windows = _loader_template_bin(spice.ckobj, spice.ckcov, path)
-    return windows
+    return _loader_template_daf(path, _sclk2et)
 
 def _load_pc(path):
     '''Load pc kernel and associated windows.'''
     _validate_ls()
-    _IDS.reset()
     try:
-        windows = _loader_template_bin(spice.pckfrm, spice.ckcov, path)
-    except spice.SpiceError as e:
+        windows = _loader_template_daf(path)
+    except ValueError as e:
         # Parse text kernels seperately
         # TODO: Necessary?
         with util.ignored(IOError):
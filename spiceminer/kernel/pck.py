@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+import collections
+
+import numpy
+
+from .daf import DAF
+from .spk import INERTIAL_FRAMES, INERTIAL_CODES
+from .. import util
+from .. import profiling
+from .. import _spicewrapper as spice
+from ..extra import chebyshev
+
+
+### Constants ###
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_CENTURY = SECONDS_PER_DAY * 36525
+
+
+def _rotate(angles, axis):
+    '''Frame rotation matrices (n x 3 x 3) about axis 1, 2 or 3, like
+    CSPICE's rotate_c.'''
+    angles = numpy.asarray(angles, dtype=float)
+    i, j, k = axis - 1, axis % 3, (axis + 1) % 3
+    cos, sin = numpy.cos(angles), numpy.sin(angles)
+    result = numpy.zeros((len(angles), 3, 3))
+    result[:, i, i] = 1
+    result[:, j, j] = cos
+    result[:, k, k] = cos
+    result[:, j, k] = sin
+    result[:, k, j] = -sin
+    return result
+
+def euler313(w, delta, phi):
+    '''Vectorized ``eul2m_c(w, delta, phi, 3, 1, 3)``.'''
+    return numpy.einsum('nij,njk,nkl->nil', _rotate(w, 3), _rotate(delta, 1),
+        _rotate(phi, 3))
+
+
+### Binary PCK segments ###
+class _Segment(object):
+    '''A single binary PCK segment.
+
+    Attributes
+    ----------
+    body, frame, type: int
+        As in the segment summary, `body` is the frame class ID.
+    start, stop: float
+        Covered time span in ephemeris time.
+    '''
+
+    def __init__(self, daf, doubles, ints):
+        self.start, self.stop = doubles[:2]
+        self.body, self.frame, self.type = ints[:3]
+        self._begin, self._end = ints[3:5]
+        self._data = daf.doubles
+
+    def __repr__(self):
+        return '{}(body={}, frame={}, type={})'.format(
+            self.__class__.__name__, self.body, self.frame, self.type)
+
+    def evaluate(self, ets):
+        '''Get the nx3 Euler angles (phi, delta, w) in radians.'''
+        raise NotImplementedError()
+
+
+class _ChebyshevSegment(_Segment):
+    '''Types 2 and 3: Chebyshev polynomials for the Euler angles (and their
+    rates) in equally sized records.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_ChebyshevSegment, self).__init__(daf, doubles, ints)
+        init, intlen, rsize, count = self._data[self._end - 4:self._end]
+        self._init, self._intlen = init, intlen
+        self._records = self._data[self._begin - 1:
+            self._begin - 1 + int(count) * int(rsize)].reshape(int(count),
+            int(rsize))
+        self._components = 3 if self.type == 2 else 6
+
+    def evaluate(self, ets):
+        index = numpy.floor((ets - self._init) / self._intlen).astype(int)
+        index = index.clip(0, len(self._records) - 1)
+        records = self._records[index]
+        mid, radius = records[:, 0], records[:, 1]
+        coeffs = records[:, 2:].reshape(len(ets), self._components, -1)
+        coeffs = coeffs.transpose(0, 2, 1)[:, :, :3]
+        return chebyshev((ets - mid) / radius, coeffs)
+
+SEGMENT_TYPES = {
+    2: _ChebyshevSegment,
+    3: _ChebyshevSegment
+}
+
+
+### Files and segment index ###
+class PCKFile(object):
+    '''Memory mapped binary PCK file with its segments in file order.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.daf = DAF(path)
+        doubles, ints = self.daf.summaries()
+        self.segments = [_make_segment(self.daf, d, i)
+            for d, i in zip(doubles, ints)]
+
+def _make_segment(daf, doubles, ints):
+    cls = SEGMENT_TYPES.get(ints[2], _Segment)
+    return cls(daf, doubles, ints)
+
+# Paths of loaded PCK files in load order
+_PATHS = []
+# path -> PCKFile, body -> list of segments, highest priority first
+_FILES = {}
+_INDEX = None
+
+def register(path):
+    '''Make a binary PCK file available to the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    _PATHS.append(path)
+    _INDEX = None
+
+def unregister(path):
+    '''Remove a binary PCK file from the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    _FILES.pop(path, None)
+    _INDEX = None
+
+def _index():
+    '''Map bodies to their segments, later loaded files and later segments
+    in a file take precedence.'''
+    global _INDEX
+    if _INDEX is None:
+        index = collections.defaultdict(list)
+        for path in _PATHS:
+            if path not in _FILES:
+                _FILES[path] = PCKFile(path)
+            for segment in _FILES[path].segments:
+                index[segment.body].append(segment)
+        for segments in index.values():
+            segments.reverse()
+        _INDEX = dict(index)
+    return _INDEX
+
+def segments(body):
+    '''All segments for `body`, highest priority first.'''
+    return list(_index().get(body, []))
+
+
+### Text PCK model ###
+IAUModel = collections.namedtuple('IAUModel', ['ra', 'dec', 'pm', 'angles',
+    'nut_ra', 'nut_dec', 'nut_pm', 'frame'])
+
+# body -> IAUModel or None, filled from the kernel pool
+_MODELS = {}
+util.on_kernel_change(_MODELS.clear)
+
+def _pool(body, item, default=None):
+    values = spice.gdpool('BODY{}_{}'.format(body, item))
+    return default if values is None else values
+
+def _quadratic(values):
+    '''The first three polynomial coefficients, missing ones are zero.'''
+    values = numpy.asarray(values, dtype=float)[:3]
+    return numpy.concatenate([values, numpy.zeros(3 - len(values))])
+
+def _model(body):
+    '''Read the rotation constants of `body` from the kernel pool, None if
+    they are incomplete.'''
+    if body not in _MODELS:
+        _MODELS[body] = None
+        ra, dec, pm = [_pool(body, item) for item in ('POLE_RA', 'POLE_DEC',
+            'PM')]
+        if not any(values is None for values in (ra, dec, pm)):
+            # Nutation/precession angles belong to the system barycenter
+            bary = body // 100 if 100 < body < 1000 else body
+            angles = _pool(bary, 'NUT_PREC_ANGLES', numpy.empty(0))
+            degree = int(_pool(bary, 'MAX_PHASE_DEGREE', [1])[0])
+            frame = _pool(bary, 'CONSTANTS_REF_FRAME', [1])[0]
+            _MODELS[body] = IAUModel(
+                _quadratic(ra),
+                _quadratic(dec),
+                _quadratic(pm),
+                numpy.radians(angles.reshape(-1, degree + 1)),
+                _pool(body, 'NUT_PREC_RA', numpy.empty(0)),
+                _pool(body, 'NUT_PREC_DEC', numpy.empty(0)),
+                _pool(body, 'NUT_PREC_PM', numpy.empty(0)),
+                int(frame))
+    return _MODELS[body]
+
+def _iau_angles(model, ets):
+    '''Euler angles (phi, delta, w) in radians, as in CSPICE's bodeul.'''
+    centuries = ets / SECONDS_PER_CENTURY
+    days = ets / SECONDS_PER_DAY
+    ra = model.ra[0] + centuries * (model.ra[1] + centuries * model.ra[2])
+    dec = model.dec[0] + centuries * (model.dec[1] + centuries * model.dec[2])
+    w = model.pm[0] + days * (model.pm[1] + days * model.pm[2])
+    if len(model.angles):
+        powers = centuries[:, None] ** numpy.arange(model.angles.shape[1])
+        theta = powers.dot(model.angles.T)
+        sin, cos = numpy.sin(theta), numpy.cos(theta)
+        ra += sin[:, :len(model.nut_ra)].dot(model.nut_ra)
+        dec += cos[:, :len(model.nut_dec)].dot(model.nut_dec)
+        w += sin[:, :len(model.nut_pm)].dot(model.nut_pm)
+    return numpy.radians(numpy.array([ra + 90, 90 - dec, w % 360])).T
+
+
+### Public evaluation ###
+@profiling.instrument('pck.rotation')
+def rotation(body, ets):
+    '''Rotations from J2000 to the body fixed frame, equivalent to
+    ``pxform('J2000', <body fixed frame>, et)`` for PCK based frames.
+
+    Binary PCK segments take precedence over the IAU rotation model from text
+    PCKs, as in CSPICE.
+
+    Parameters
+    ----------
+    body: int
+        Frame class ID, the body ID for IAU_* frames.
+    ets: ndarray of float
+        Ephemeris times.
+
+    Returns
+    -------
+    matrices: ndarray of float
+        The nx3x3 array of rotation matrices, rows that are not covered are
+        NaN.
+    found: ndarray of bool
+        Which times are covered. Without POLE_RA, POLE_DEC and PM in the
+        kernel pool only binary segments cover times.
+
+    Raises
+    ------
+    ValueError
+        If a needed segment or model can't be handled.
+    '''
+    ets = numpy.asarray(ets, dtype=float).reshape(-1)
+    result = numpy.empty((len(ets), 3, 3))
+    result.fill(numpy.nan)
+    remaining = numpy.ones(len(ets), dtype=bool)
+    for segment in _index().get(body, []):
+        mask = remaining & (ets >= segment.start) & (ets <= segment.stop)
+        if not mask.any():
+            continue
+        if segment.type not in SEGMENT_TYPES:
+            msg = 'PCK type {} not supported by the numpy backend ({})'
+            raise ValueError(msg.format(segment.type, segment))
+        result[mask] = _to_j2000(segment.evaluate(ets[mask]), segment.frame)
+        remaining &= ~mask
+    model = _model(body)
+    if model is not None and remaining.any():
+        angles = _iau_angles(model, ets[remaining])
+        result[remaining] = _to_j2000(angles, model.frame)
+        remaining[:] = False
+    return result, ~remaining
+
+def _to_j2000(angles, frame):
+    '''Rotations from J2000 to the frame described by Euler angles relative
+    to an inertial frame.'''
+    if frame not in INERTIAL_CODES:
+        msg = 'PCK reference frame {} not supported by the numpy backend'
+        raise ValueError(msg.format(frame))
+    phi, delta, w = angles.T
+    matrices = euler313(w, delta, phi)
+    if frame != 1:
+        matrices = matrices.dot(INERTIAL_FRAMES[INERTIAL_CODES[frame]])
+    return matrices
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+#-*- coding:utf-8 -*-
+
+import collections
+
+import numpy
+
+from .daf import DAF
+from ..extra import chebyshev
+from .. import profiling
+
+
+### Constants ###
+# Speed of light in km/sec
+CLIGHT = 299792.458
+
+# J2000 -> frame rotations for frames the evaluator can handle without CSPICE
+_OBLIQUITY = numpy.radians(84381.448 / 3600.0)
+INERTIAL_FRAMES = {
+    'J2000': numpy.identity(3),
+    'ECLIPJ2000': numpy.array([
+        [1, 0, 0],
+        [0, numpy.cos(_OBLIQUITY), numpy.sin(_OBLIQUITY)],
+        [0, -numpy.sin(_OBLIQUITY), numpy.cos(_OBLIQUITY)]])
+}
+INERTIAL_CODES = {1: 'J2000', 17: 'ECLIPJ2000'}
+
+
+### Segment evaluation ###
+class _Segment(object):
+    '''A single SPK segment.
+
+    Attributes
+    ----------
+    target, center, frame, type: int
+        As in the segment summary.
+    start, stop: float
+        Covered time span in ephemeris time.
+    '''
+
+    def __init__(self, daf, doubles, ints):
+        self.start, self.stop = doubles[:2]
+        self.target, self.center, self.frame, self.type = ints[:4]
+        self._begin, self._end = ints[4:6]
+        self._data = daf.doubles
+
+    def __repr__(self):
+        return '{}(target={}, center={}, frame={}, type={})'.format(
+            self.__class__.__name__, self.target, self.center, self.frame,
+            self.type)
+
+    def evaluate(self, ets):
+        '''Get the nx6 states in the segment frame relative to the center.'''
+        raise NotImplementedError()
+
+
+class _ChebyshevSegment(_Segment):
+    '''Types 2 and 3: Chebyshev polynomials for position (and velocity) in
+    equally sized records.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_ChebyshevSegment, self).__init__(daf, doubles, ints)
+        init, intlen, rsize, count = self._data[self._end - 4:self._end]
+        self._init, self._intlen = init, intlen
+        self._records = self._data[self._begin - 1:
+            self._begin - 1 + int(count) * int(rsize)].reshape(int(count),
+            int(rsize))
+        self._components = 3 if self.type == 2 else 6
+
+    def evaluate(self, ets):
+        index = numpy.floor((ets - self._init) / self._intlen).astype(int)
+        index = index.clip(0, len(self._records) - 1)
+        records = self._records[index]
+        mid, radius = records[:, 0], records[:, 1]
+        coeffs = records[:, 2:].reshape(len(ets), self._components, -1)
+        coeffs = coeffs.transpose(0, 2, 1)
+        x = (ets - mid) / radius
+        if self.type == 3:
+            return chebyshev(x, coeffs)
+        positions, derivatives = chebyshev(x, coeffs, derivative=True)
+        return numpy.hstack([positions, derivatives / radius[:, None]])
+
+
+class _DiscreteSegment(_Segment):
+    '''Types 9 and 13: Discrete states with unequal time steps, interpolated
+    with Lagrange (9) or Hermite (13) polynomials.'''
+
+    def __init__(self, daf, doubles, ints):
+        super(_DiscreteSegment, self).__init__(daf, doubles, ints)
+        value, count = self._data[self._end - 2:self._end]
+        count = int(count)
+        start = self._begin - 1
+        self._states = self._data[start:start + 6 * count].reshape(count, 6)
+        self._epochs = self._data[start + 6 * count:start + 7 * count]
+        # Type 9 stores the degree, type 13 the window size - 1
+        window = int(value) + 1
+        self._window = min(window, count)
+
+    def _windows(self, ets):
+        '''Index arrays (n x window) of the states used for each time.'''
+        epochs, window = self._epochs, self._window
+        last = numpy.searchsorted(epochs, ets, side='right') - 1
+        if window % 2:
+            # Odd: centered on the nearest epoch
+            following = (last + 1).clip(0, len(epochs) - 1)
+            preceding = last.clip(0, len(epochs) - 1)
+            nearer = (numpy.abs(epochs[following] - ets) <
+                numpy.abs(ets - epochs[preceding]))
+            first = numpy.where(nearer, following, preceding) - window // 2
+        else:
+            first = last - window // 2 + 1
+        first = first.clip(0, len(epochs) - window)
+        return first[:, None] + numpy.arange(window)
+
+    def evaluate(self, ets):
+        index = self._windows(ets)
+        nodes = self._epochs[index]
+        states = self._states[index]
+        if self.type == 9:
+            return _lagrange(nodes, states, ets)
+        return _hermite(nodes, states[:, :, :3], states[:, :, 3:], ets)
+
+
+def _lagrange(nodes, values, x):
+    '''Lagrange interpolation, nodes (n x w), values (n x w x k).'''
+    window = nodes.shape[1]
+    diff = x[:, None] - nodes
+    denom = nodes[:, :, None] - nodes[:, None, :]
+    numer = numpy.repeat(diff[:, None, :], window, axis=1)
+    diagonal = numpy.arange(window)
+    denom[:, diagonal, diagonal] = 1
+    numer[:, diagonal, diagonal] = 1
+    weights = (numer / denom).prod(axis=2)
+    return (weights[:, :, None] * values).sum(axis=1)
+
+def _hermite(nodes, values, derivatives, x):
+    '''Hermite interpolation using values and derivatives at the nodes
+    (n x w x k). Returns values and derivatives at `x` as n x 2k array.'''
+    z = numpy.repeat(nodes, 2, axis=1)
+    size = z.shape[1]
+    diffs = numpy.empty((values.shape[0], size - 1, values.shape[2]))
+    diffs[:, 0::2] = derivatives
+    diffs[:, 1::2] = ((values[:, 1:] - values[:, :-1]) /
+        (nodes[:, 1:] - nodes[:, :-1])[:, :, None])
+    coeffs = [values[:, 0], diffs[:, 0]]
+    for order in range(2, size):
+        diffs = ((diffs[:, 1:] - diffs[:, :-1]) /
+            (z[:, order:] - z[:, :-order])[:, :, None])
+        coeffs.append(diffs[:, 0])
+    # Newton form and its derivative via Horner's scheme
+    result = coeffs[-1]
+    deriv = numpy.zeros_like(result)
+    for k in range(size - 2, -1, -1):
+        step = (x - z[:, k])[:, None]
+        deriv = deriv * step + result
+        result = result * step + coeffs[k]
+    return numpy.hstack([result, deriv])
+
+SEGMENT_TYPES = {
+    2: _ChebyshevSegment,
+    3: _ChebyshevSegment,
+    9: _DiscreteSegment,
+    13: _DiscreteSegment
+}
+
+
+### Files and segment index ###
+class SPKFile(object):
+    '''Memory mapped SPK file with its segments in file order.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.daf = DAF(path)
+        doubles, ints = self.daf.summaries()
+        self.segments = [_make_segment(self.daf, d, i)
+            for d, i in zip(doubles, ints)]
+
+def _make_segment(daf, doubles, ints):
+    cls = SEGMENT_TYPES.get(ints[3], _Segment)
+    return cls(daf, doubles, ints)
+
+# Paths of loaded SPK files in load order
+_PATHS = []
+# path -> SPKFile, target -> list of segments, highest priority first
+_FILES = {}
+_INDEX = None
+
+def register(path):
+    '''Make an SPK file available to the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    _PATHS.append(path)
+    _INDEX = None
+
+def unregister(path):
+    '''Remove an SPK file from the evaluator.'''
+    global _INDEX
+    if path in _PATHS:
+        _PATHS.remove(path)
+    # The memory map is released with the last segment referencing it
+    _FILES.pop(path, None)
+    _INDEX = None
+
+def _index():
+    '''Map targets to their segments. Like in CSPICE, later loaded files and
+    later segments in a file take precedence.'''
+    global _INDEX
+    if _INDEX is None:
+        index = collections.defaultdict(list)
+        for path in _PATHS:
+            if path not in _FILES:
+                _FILES[path] = SPKFile(path)
+            for segment in _FILES[path].segments:
+                index[segment.target].append(segment)
+        for segments in index.values():
+            segments.reverse()
+        _INDEX = dict(index)
+    return _INDEX
+
+def segments(target):
+    '''All segments for `target`, highest priority first.'''
+    return list(_index().get(target, []))
+
+
+### Public evaluation ###
+def _states_ssb(target, ets, depth=0):
+    '''States relative to the solar system barycenter in J2000, rows that
+    can't be computed are NaN.'''
+    result = numpy.empty((len(ets), 6))
+    result.fill(numpy.nan)
+    if target == 0:
+        result.fill(0)
+        return result
+    if depth > 100:
+        raise ValueError('Circular SPK center chain for {}'.format(target))
+    remaining = numpy.ones(len(ets), dtype=bool)
+    for segment in _index().get(target, []):
+        mask = remaining & (ets >= segment.start) & (ets <= segment.stop)
+        if not mask.any():
+            continue
+        if segment.type not in SEGMENT_TYPES:
+            msg = 'SPK type {} not supported by the numpy backend ({})'
+            raise ValueError(msg.format(segment.type, segment))
+        if segment.frame not in INERTIAL_CODES:
+            msg = 'SPK frame {} not supported by the numpy backend ({})'
+            raise ValueError(msg.format(segment.frame, segment))
+        states = segment.evaluate(ets[mask])
+        if segment.frame != 1:
+            # Back to J2000 (row vectors, so no transpose)
+            rotation = INERTIAL_FRAMES[INERTIAL_CODES[segment.frame]]
+            states = numpy.hstack([states[:, :3].dot(rotation),
+                states[:, 3:].dot(rotation)])
+        result[mask] = states + _states_ssb(segment.center, ets[mask],
+            depth + 1)
+        remaining &= ~mask
+        if not remaining.any():
+            break
+    return result
+
+@profiling.instrument('spk.state')
+def state(target, ets, frame, observer):
+    '''Geometric states of `target` relative to `observer`.
+
+    Parameters
+    ----------
+    target, observer: int
+        Body IDs.
+    ets: ndarray of float
+        Ephemeris times.
+    frame: {'J2000', 'ECLIPJ2000'}
+        Frame of the output.
+
+    Returns
+    -------
+    states: ndarray of float
+        The nx6 array of positions (km) and velocities (km/sec).
+    light_times: ndarray of float
+        One way light times (sec).
+    found: ndarray of bool
+        Which times are covered.
+
+    Raises
+    ------
+    ValueError
+        If the frame or a needed segment can't be handled.
+    '''
+    try:
+        rotation = INERTIAL_FRAMES[frame.upper()]
+    except KeyError:
+        msg = "Frame '{}' not supported by the numpy backend"
+        raise ValueError(msg.format(frame))
+    ets = numpy.asarray(ets, dtype=float).reshape(-1)
+    states = _states_ssb(target, ets) - _states_ssb(observer, ets)
+    states = numpy.hstack([states[:, :3].dot(rotation.T),
+        states[:, 3:].dot(rotation.T)])
+    found = ~numpy.isnan(states).any(axis=1)
+    light_times = numpy.sqrt((states[:, :3] ** 2).sum(axis=1)) / CLIGHT
+    return states, light_times, found
@@ -0,0 +1,177 @@
+#-*- coding:utf-8 -*-
+
+import os
+import tempfile
+import multiprocessing
+
+import numpy
+
+from . import kernel
+from .bodies import Body
+
+__all__ = ['Pool']
+
+
+### Constants ###
+# Results are exchanged through memory mapped files in here, if available
+SHM_DIR = '/dev/shm'
+
+
+### Worker side ###
+def _init_worker(kernel_paths):
+    '''Load the kernels once per worker process.'''
+    for path in kernel_paths:
+        kernel.load(path)
+
+def _work(task):
+    '''Evaluate a chunk of times and write the result into the shared file.
+
+    Invalid times stay NaN.
+    '''
+    method, body, times, kwargs, path, shape, offset = task
+    result = numpy.memmap(path, dtype=float, mode='r+', shape=shape)
+    body = Body(body)
+    if method == 'rotation':
+        valid_times, matrices = body.rotation(times, **kwargs)
+        index = offset + numpy.flatnonzero(numpy.in1d(times, valid_times))
+        if len(index):
+            result[index] = matrices
+    else:
+        data = getattr(body, method)(times, **kwargs)
+        index = offset + numpy.flatnonzero(numpy.in1d(times, data[0]))
+        result[:, index] = data
+    result.flush()
+    del result
+
+
+### Pool ###
+def _portable(arg):
+    '''Replace Body instances by their ID so arguments can be sent to the
+    workers.'''
+    return arg.id if isinstance(arg, Body) else arg
+
+
+class Pool(object):
+    '''Evaluate large requests in several processes.
+
+    CSPICE is single threaded, so each worker is a process of its own with
+    all kernels loaded. Requests are split into time chunks and the results
+    are written into a memory mapped file shared by all processes instead
+    of being pickled.
+
+    All methods accept a single body or a list of bodies, in the latter case
+    a list of results is returned. The chunks of all bodies are evaluated
+    together.
+
+    Parameters
+    ----------
+    kernel_paths: list of str
+        Kernel files or directories to load in every worker.
+    workers: int, optional
+        Number of worker processes, defaults to the number of CPUs.
+    chunk_size: int, optional
+        Maximum number of times evaluated in a single task.
+
+    Examples
+    --------
+    >>> with Pool(['data/kernels'], workers=4) as pool:
+    ...     positions = pool.position('EARTH', times)
+    '''
+
+    def __init__(self, kernel_paths, workers=None, chunk_size=10000):
+        self.kernel_paths = list(kernel_paths)
+        self.chunk_size = int(chunk_size)
+        self.workers = workers or multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(workers, _init_worker,
+            (self.kernel_paths,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        '''Stop the workers after all pending tasks are done.'''
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        '''Stop the workers immediately.'''
+        self._pool.terminate()
+        self._pool.join()
+
+    def _run(self, method, bodies, times, shape, kwargs):
+        '''Split the requests for all bodies into chunks, run them and
+        collect the shared results.'''
+        if not len(times):
+            return [numpy.empty(shape) for body in bodies]
+        kwargs = {key: _portable(value) for key, value in kwargs.items()}
+        directory = SHM_DIR if os.path.isdir(SHM_DIR) else None
+        paths = []
+        try:
+            tasks = []
+            for body in bodies:
+                handle, path = tempfile.mkstemp(suffix='.dat', dir=directory)
+                os.close(handle)
+                paths.append(path)
+                result = numpy.memmap(path, dtype=float, mode='w+',
+                    shape=shape)
+                result.fill(numpy.nan)
+                result.flush()
+                del result
+                tasks += [(method, _portable(body),
+                    times[i:i + self.chunk_size], kwargs, path, shape, i)
+                    for i in range(0, len(times), self.chunk_size)]
+            self._pool.map(_work, tasks)
+            return [numpy.fromfile(path).reshape(shape) for path in paths]
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    def _columns(self, method, rows, body, times, kwargs):
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        bodies = body if isinstance(body, (list, tuple)) else [body]
+        results = [data[:, ~numpy.isnan(data[0])] for data in self._run(
+            method, bodies, times, (rows, len(times)), kwargs)]
+        return results if bodies is body else results[0]
+
+    def state(self, body, times, observer='SUN', frame='ECLIPJ2000',
+        abcorr=None, backend=None):
+        '''Parallel version of `Body.state` with the same arguments and
+        output.'''
+        return self._columns('state', 8, body, times, dict(observer=observer,
+            frame=frame, abcorr=abcorr, backend=backend))
+
+    def position(self, body, times, observer='SUN', frame='ECLIPJ2000',
+        abcorr=None, backend=None):
+        '''Parallel version of `Body.position` with the same arguments and
+        output.'''
+        return self._columns('position', 4, body, times, dict(
+            observer=observer, frame=frame, abcorr=abcorr, backend=backend))
+
+    def speed(self, body, times, observer='SUN', frame='ECLIPJ2000',
+        abcorr=None, backend=None):
+        '''Parallel version of `Body.speed` with the same arguments and
+        output.'''
+        return self._columns('speed', 4, body, times, dict(observer=observer,
+            frame=frame, abcorr=abcorr, backend=backend))
+
+    def rotation(self, body, times, target='ECLIPJ2000', backend=None):
+        '''Parallel version of `Body.rotation` with the same arguments.
+
+        Returns
+        -------
+        times: ndarray of float
+            The times for which rotation matrices where generated.
+        matrices: ndarray of float
+            The nx3x3 array of rotation matrices.
+        '''
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        bodies = body if isinstance(body, (list, tuple)) else [body]
+        results = []
+        for data in self._run('rotation', bodies, times, (len(times), 3, 3),
+            dict(target=target, backend=backend)):
+            valid = ~numpy.isnan(data[:, 0, 0])
+            results.append((times[valid], data[valid]))
+        return results if bodies is body else results[0]
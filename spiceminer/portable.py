@@ -0,0 +1,236 @@
+#-*- coding:utf-8 -*-
+
+'''Compact fitted ephemerides for consumers without CSPICE.
+
+`compile_ephemeris` samples `Body.position` over a time span and stores
+piecewise Chebyshev fits of the positions in a single ``.npz`` file.
+`Ephemeris` answers vectorized position and state queries from that file
+with NumPy alone, velocities are the derivatives of the fits.
+'''
+
+import json
+
+import numpy
+import numpy.polynomial.chebyshev as cheb
+
+from .bodies import Body
+from .extra import chebyshev
+from .time_ import Time
+from .kernel.spk import CLIGHT
+
+__all__ = ['compile_ephemeris', 'Ephemeris']
+
+
+### Constants ###
+FORMAT_VERSION = 1
+
+
+### Fitting ###
+def _sample(body, times, observer, frame, abcorr):
+    '''Positions (nx3) for `times` and a mask of the times with data.'''
+    data = body.position(times, observer, frame, abcorr)
+    found = numpy.in1d(times, data[0])
+    positions = numpy.empty((len(times), 3))
+    positions[found] = data[1:].T
+    return positions, found
+
+def _fit(body, start, stop, observer, frame, abcorr, tolerance, degree,
+    block, max_depth):
+    '''Fit blocks of at most `block` seconds, halving those that miss the
+    tolerance. All blocks of a level are sampled and fitted at once.
+
+    Returns
+    -------
+    bounds: ndarray of float
+        The mx2 start and end times of the fitted blocks, sorted.
+    coeffs: ndarray of float
+        The mx(degree+1)x3 Chebyshev coefficients, lowest order first.
+    '''
+    nodes = numpy.cos(numpy.pi * (numpy.arange(degree + 1) + 0.5) /
+        (degree + 1))[::-1]
+    checks = numpy.linspace(-1, 1, 2 * (degree + 1))
+    check_matrix = cheb.chebvander(checks, degree)
+    x = numpy.concatenate([nodes, checks])
+    lows = numpy.arange(start, stop, block)
+    highs = numpy.minimum(lows + block, stop)
+    bounds, coeffs = [], []
+    for _ in range(max_depth + 1):
+        if not len(lows):
+            break
+        half, mid = (highs - lows) / 2.0, (highs + lows) / 2.0
+        times = (mid[:, None] + half[:, None] * x).ravel()
+        positions, found = _sample(body, times, observer, frame, abcorr)
+        positions = positions.reshape(len(lows), len(x), 3)
+        complete = found.reshape(len(lows), len(x)).all(axis=1)
+        positions[~complete] = 0
+        # Same nodes for all blocks, so one least squares fit does all
+        samples = positions[:, :degree + 1].transpose(1, 0, 2)
+        fitted = cheb.chebfit(nodes, samples.reshape(degree + 1, -1), degree)
+        fitted = fitted.reshape(degree + 1, len(lows), 3).transpose(1, 0, 2)
+        estimate = numpy.einsum('cd,ndk->nck', check_matrix, fitted)
+        error = numpy.sqrt(((estimate - positions[:, degree + 1:]) ** 2).sum(
+            axis=2)).max(axis=1)
+        good = complete & (error <= tolerance)
+        bounds.append(numpy.array([lows[good], highs[good]]).T)
+        coeffs.append(fitted[good])
+        # Blocks still failing at max_depth are left out, e.g. gaps
+        middle = mid[~good]
+        lows = numpy.concatenate([lows[~good], middle])
+        highs = numpy.concatenate([middle, highs[~good]])
+    bounds = numpy.concatenate(bounds or [numpy.empty((0, 2))])
+    coeffs = numpy.concatenate(coeffs or [numpy.empty((0, degree + 1, 3))])
+    order = numpy.argsort(bounds[:, 0], kind='mergesort')
+    return bounds[order], coeffs[order]
+
+def compile_ephemeris(path, bodies, start, stop, observer='SUN',
+    frame='ECLIPJ2000', abcorr=None, tolerance=1e-3, degree=12,
+    block=Time.DAY, max_depth=8):
+    '''Fit the positions of several bodies and write them into one file.
+
+    Parameters
+    ----------
+    path: str
+        The output file.
+    bodies: iterable of (str or int or Body)
+        The bodies to include.
+    start, stop: float
+        UNIX timestamps of the covered span.
+    observer, frame, abcorr:
+        See `Body.position`.
+    tolerance: float, optional
+        Maximum deviation of the fits in km, checked at ``2 * (degree + 1)``
+        points per block.
+    degree: int, optional
+        Degree of the Chebyshev polynomials.
+    block: float, optional
+        Length of the largest fitted block in seconds.
+    max_depth: int, optional
+        How often a block is halved at most. Parts that still can't be
+        fitted, e.g. because of missing data, are left out.
+
+    Returns
+    -------
+    ephemeris: Ephemeris
+        The written file opened for evaluation.
+    '''
+    bodies = [Body(body) for body in bodies]
+    arrays, offsets = [], [0]
+    for body in bodies:
+        bounds, coeffs = _fit(body, float(start), float(stop), observer,
+            frame, abcorr, float(tolerance), int(degree), float(block),
+            int(max_depth))
+        arrays.append((bounds, coeffs))
+        offsets.append(offsets[-1] + len(bounds))
+    header = {
+        'version': FORMAT_VERSION,
+        'observer': str(getattr(observer, 'name', observer)),
+        'frame': str(getattr(frame, 'name', frame)),
+        'abcorr': abcorr or Body._ABCORR,
+        'tolerance': float(tolerance),
+        'ids': [body.id for body in bodies],
+        'names': [body.name for body in bodies]
+    }
+    header = numpy.frombuffer(json.dumps(header).encode('utf-8'),
+        dtype=numpy.uint8)
+    with open(path, 'wb') as f:
+        numpy.savez(f, header=header, offsets=numpy.array(offsets),
+            bounds=numpy.concatenate([item[0] for item in arrays]),
+            coeffs=numpy.concatenate([item[1] for item in arrays]))
+    return Ephemeris(path)
+
+
+### Evaluation ###
+class Ephemeris(object):
+    '''Evaluate a file written by `compile_ephemeris` with NumPy only.
+
+    Parameters
+    ----------
+    path: str
+        The file to read.
+
+    Attributes
+    ----------
+    observer, frame, abcorr: str
+        The parameters the fits were computed with.
+    tolerance: float
+        Maximum deviation of the positions in km.
+    bodies: dict of int: str
+        IDs and names of the included bodies.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with numpy.load(path) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            offsets = data['offsets']
+            bounds, coeffs = data['bounds'], data['coeffs']
+        if header['version'] != FORMAT_VERSION:
+            msg = 'Unsupported ephemeris version {}'
+            raise ValueError(msg.format(header['version']))
+        self.observer = header['observer']
+        self.frame = header['frame']
+        self.abcorr = header['abcorr']
+        self.tolerance = header['tolerance']
+        self.bodies = dict(zip(header['ids'], header['names']))
+        self._ids = {name.upper(): id_ for id_, name in self.bodies.items()}
+        self._blocks = {}
+        for i, id_ in enumerate(header['ids']):
+            first, last = offsets[i], offsets[i + 1]
+            self._blocks[id_] = bounds[first:last], coeffs[first:last]
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.path)
+
+    def _id(self, body):
+        try:
+            id_ = int(getattr(body, 'id', body))
+        except ValueError:
+            id_ = self._ids.get(body.strip().upper())
+        if id_ not in self._blocks:
+            raise ValueError("Body '{}' is not in the ephemeris".format(body))
+        return id_
+
+    def _evaluate(self, body, times):
+        bounds, coeffs = self._blocks[self._id(body)]
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        index = numpy.searchsorted(bounds[:, 0], times, side='right') - 1
+        valid = index >= 0
+        valid[valid] = times[valid] <= bounds[index[valid], 1]
+        index = index[valid]
+        start, stop = bounds[index, 0], bounds[index, 1]
+        x = (2 * times[valid] - start - stop) / (stop - start)
+        positions, derivatives = chebyshev(x, coeffs[index], derivative=True)
+        speeds = derivatives * (2 / (stop - start))[:, None]
+        return times[valid], positions, speeds
+
+    def position(self, body, times):
+        '''Like `Body.position`, times outside the fits are left out.
+
+        Parameters
+        ----------
+        body: str or int or Body
+            Name or ID of an included body.
+        times: float or iterable of float
+            UNIX timestamp(s) for which to get the position.
+
+        Returns
+        -------
+        position: ndarray of float
+            The 4xn array where the rows are time, position x, y, z.
+        '''
+        times, positions, _ = self._evaluate(body, times)
+        return numpy.vstack([times, positions.T])
+
+    def state(self, body, times):
+        '''Like `Body.state`, see `position`. The light time is the
+        geometric distance divided by the speed of light.
+
+        Returns
+        -------
+        state: ndarray of float
+            The 8xn array where the rows are time, position x, y, z, speed
+            x, y, z and one way light time.
+        '''
+        times, positions, speeds = self._evaluate(body, times)
+        light_times = numpy.sqrt((positions ** 2).sum(axis=1)) / CLIGHT
+        return numpy.vstack([times, positions.T, speeds.T, light_times])
@@ -0,0 +1,134 @@
+#-*- coding:utf-8 -*-
+
+import os
+import time
+import functools
+import threading
+import contextlib
+import collections
+
+__all__ = ['stats', 'reset_stats', 'profile']
+
+
+### State ###
+# Checked by every instrumented function, keep it a plain module global so
+# the disabled path costs a single attribute lookup.
+enabled = bool(os.getenv('SPICEMINER_PROFILE'))
+
+Stat = collections.namedtuple('Stat', ['calls', 'failures', 'seconds'])
+
+# name -> [calls, failures, seconds]
+_STATS = {}
+_LOCK = threading.Lock()
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def enable():
+    '''Start collecting statistics.'''
+    global enabled
+    enabled = True
+
+def disable():
+    '''Stop collecting statistics, collected values are kept.'''
+    global enabled
+    enabled = False
+
+def record(name, func, *args, **kwargs):
+    '''Call `func` and add the call to the statistics of `name`. Calls that
+    raise count as failures.'''
+    failed = True
+    start = _timer()
+    try:
+        result = func(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        seconds = _timer() - start
+        with _LOCK:
+            entry = _STATS.setdefault(name, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += failed
+            entry[2] += seconds
+
+def instrument(name):
+    '''Decorator counting calls, failures and wall time of a function while
+    profiling is enabled.'''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            return record(name, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+### Public API ###
+def stats():
+    '''Statistics collected so far.
+
+    Profiling is disabled by default, enable it with `profiling.enable()`,
+    the environment variable ``SPICEMINER_PROFILE=1`` or temporarily with
+    `profile`.
+
+    Returns
+    -------
+    stats: dict of str: Stat
+        Number of calls, failed calls and cumulative wall time in seconds
+        per C wrapper (``spice.<name>``) and high level method. Times of
+        nested calls are included in the outer ones.
+    '''
+    with _LOCK:
+        return {name: Stat(*values) for name, values in _STATS.items()}
+
+def reset_stats():
+    '''Discard all collected statistics.'''
+    with _LOCK:
+        _STATS.clear()
+
+
+class Report(object):
+    '''Statistics collected inside a `profile` block.
+
+    Attributes
+    ----------
+    stats: dict of str: Stat
+        See `stats`. Filled when the block is left.
+    '''
+
+    def __init__(self):
+        self.stats = {}
+
+    def __str__(self):
+        lines = ['{:<32} {:>9} {:>9} {:>12}'.format('name', 'calls',
+            'failures', 'seconds')]
+        for name, stat in sorted(self.stats.items(),
+            key=lambda item: -item[1].seconds):
+            lines.append('{:<32} {:>9} {:>9} {:>12.6f}'.format(name, *stat))
+        return '\n'.join(lines)
+
+@contextlib.contextmanager
+def profile():
+    '''Collect statistics for the enclosed block only.
+
+    Examples
+    --------
+    >>> with profile() as report:
+    ...     Body('EARTH').state(times)
+    >>> print(report)
+    '''
+    global enabled
+    before = stats()
+    previous, enabled = enabled, True
+    report = Report()
+    try:
+        yield report
+    finally:
+        enabled = previous
+        after = stats()
+        empty = Stat(0, 0, 0.0)
+        for name, stat in after.items():
+            old = before.get(name, empty)
+            diff = Stat(*[a - b for a, b in zip(stat, old)])
+            if diff.calls:
+                report.stats[name] = diff
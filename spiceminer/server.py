@@ -0,0 +1,304 @@
+#-*- coding:utf-8 -*-
+
+import io
+import json
+import socket
+import threading
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+import numpy
+import numpy.lib.format
+
+from . import kernel
+from .aio import Executor
+from .bodies import Body
+from .parallel import Pool
+from ._spicewrapper import SpiceError
+
+__all__ = ['Server', 'Client', 'serve']
+
+
+### Protocol ###
+# A message is a JSON header on a single line, followed by arrays in .npy
+# format with the byte sizes listed in `header['sizes']`. Requests carry the
+# method, the body and the keyword arguments in the header and the times as
+# array. Responses have a 'status' of 'ok' or 'error'. Arrays are restricted
+# to float and bool, anything else (in particular pickled objects) is
+# rejected.
+
+# Methods answered through the micro-batching executor
+BATCHED = {'state', 'position', 'speed', 'rotation'}
+# Methods evaluated directly for each request
+DIRECT = {'can_see', 'visibility_windows'}
+
+# Accepted numpy dtype kinds
+_KINDS = 'fb'
+
+_ERRORS = {
+    'SpiceError': SpiceError,
+    'ValueError': ValueError,
+    'TypeError': TypeError,
+    'KeyError': KeyError
+}
+
+def _send(stream, header, arrays=()):
+    blobs = []
+    for array in arrays:
+        buf = io.BytesIO()
+        numpy.lib.format.write_array(buf, numpy.ascontiguousarray(array))
+        blobs.append(buf.getvalue())
+    header = dict(header, sizes=[len(blob) for blob in blobs])
+    stream.write(json.dumps(header).encode('utf-8') + b'\n')
+    for blob in blobs:
+        stream.write(blob)
+    stream.flush()
+
+def _recv(stream):
+    '''Read a message, returns None if the connection was closed.'''
+    line = stream.readline()
+    if not line:
+        return None
+    header = json.loads(line.decode('utf-8'))
+    arrays = []
+    for size in header.pop('sizes'):
+        blob = stream.read(size)
+        if len(blob) != size:
+            raise ValueError('Incomplete message')
+        array = numpy.lib.format.read_array(io.BytesIO(blob),
+            allow_pickle=False)
+        if array.dtype.kind not in _KINDS:
+            raise ValueError('Unsupported dtype {}'.format(array.dtype))
+        arrays.append(array)
+    return header, arrays
+
+
+### Server ###
+class _LocalPool(object):
+    '''Evaluate batches in the server process with the kernels loaded
+    there.'''
+
+    workers = 1
+
+    def state(self, body, times, **kwargs):
+        return Body(body).state(times, **kwargs)
+
+    def position(self, body, times, **kwargs):
+        return Body(body).position(times, **kwargs)
+
+    def speed(self, body, times, **kwargs):
+        return Body(body).speed(times, **kwargs)
+
+    def rotation(self, body, times, **kwargs):
+        times, matrices = Body(body).rotation(times, **kwargs)
+        return times, numpy.array(matrices).reshape(-1, 3, 3)
+
+    def close(self):
+        pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = _recv(self.rfile)
+            except (ValueError, KeyError) as e:
+                _send(self.wfile, {'status': 'error', 'type': 'ValueError',
+                    'message': 'Malformed request: {}'.format(e)})
+                return
+            if message is None:
+                return
+            header, arrays = message
+            try:
+                result = self.server.answer(header, arrays)
+            except Exception as e:
+                _send(self.wfile, {'status': 'error',
+                    'type': e.__class__.__name__, 'message': str(e)})
+            else:
+                _send(self.wfile, {'status': 'ok'}, result)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class Server(object):
+    '''Answer queries over a local socket with the kernels loaded once.
+
+    Concurrent requests with the same method, body and options are merged
+    into a single batch (see `aio.Executor`), so many clients asking for
+    short time ranges share one CSPICE call.
+
+    Parameters
+    ----------
+    kernel_paths: list of str
+        Kernel files or directories to load.
+    address: str or tuple
+        Path of a unix socket or (host, port) for TCP. Only bind TCP to
+        localhost, there is no authentication.
+    workers: int, optional
+        Evaluate batches in that many worker processes, by default they
+        are evaluated in the server process.
+    executor: aio.Executor, optional
+        Evaluate batches with this executor instead of a new one, `workers`
+        is ignored then. It is closed on `shutdown`.
+    '''
+
+    def __init__(self, kernel_paths, address, workers=0, executor=None):
+        kernel_paths = list(kernel_paths)
+        for path in kernel_paths:
+            kernel.load(path)
+        if executor is None:
+            pool = Pool(kernel_paths, workers) if workers else _LocalPool()
+            executor = Executor(kernel_paths, pool=pool)
+        self._executor = executor
+        server_class = _TCPServer if isinstance(address, tuple) else \
+            _UnixServer
+        self._server = server_class(address, _Handler)
+        self._server.answer = self.answer
+        self.address = self._server.server_address
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        '''Stop serving, finish pending batches and release the socket.'''
+        self._server.shutdown()
+        self._server.server_close()
+        self._executor.close()
+
+    def answer(self, header, arrays):
+        '''Evaluate a request, returns a list of arrays.'''
+        method = header['method']
+        kwargs = header.get('kwargs', {})
+        if method not in BATCHED | DIRECT:
+            raise ValueError("Unknown method '{}'".format(method))
+        if method in BATCHED:
+            result = self._executor.submit(method, header['body'], arrays[0],
+                **kwargs).result()
+            return list(result) if method == 'rotation' else [result]
+        elif method == 'can_see':
+            result = Body(header['body']).can_see(arrays[0], **kwargs)
+            return [result.data, ~numpy.ma.getmaskarray(result)]
+        windows = Body(header['body']).visibility_windows(**kwargs)
+        return [numpy.array(list(windows), dtype=float).reshape(-1, 2)]
+
+
+def serve(kernel_paths, address, workers=0):
+    '''Run a `Server` until interrupted.'''
+    server = Server(kernel_paths, address, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+### Client ###
+class Client(object):
+    '''Thin client for a running `Server`.
+
+    Methods take the same arguments as the `Body` methods with the body as
+    first argument and return NumPy arrays. A client can be shared by
+    threads, each thread gets its own connection, so their requests are
+    answered concurrently and merged into batches by the server.
+
+    Parameters
+    ----------
+    address: str or tuple
+        Path of the unix socket or (host, port) of the server.
+    '''
+
+    def __init__(self, address):
+        self.address = address
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._stream()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            for sock, stream in self._connections:
+                stream.close()
+                sock.close()
+            del self._connections[:]
+
+    def _stream(self):
+        '''The connection of the calling thread, opened on first use.'''
+        try:
+            return self._local.stream
+        except AttributeError:
+            pass
+        family = socket.AF_INET if isinstance(self.address, tuple) else \
+            socket.AF_UNIX
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.connect(self.address)
+        stream = sock.makefile('rwb')
+        with self._lock:
+            self._connections.append((sock, stream))
+        self._local.stream = stream
+        return stream
+
+    def request(self, method, body, times=None, **kwargs):
+        '''Send a request and wait for the answer.
+
+        Raises
+        ------
+        SpiceError, ValueError, TypeError, KeyError
+            If the server raised it.
+        RuntimeError
+            For other errors on the server.
+        '''
+        header = {'method': method, 'body': body, 'kwargs': kwargs}
+        arrays = [] if times is None else [numpy.asarray(times,
+            dtype=float).reshape(-1)]
+        stream = self._stream()
+        _send(stream, header, arrays)
+        message = _recv(stream)
+        if message is None:
+            raise IOError('Connection closed by server')
+        header, arrays = message
+        if header['status'] != 'ok':
+            error = _ERRORS.get(header['type'], RuntimeError)
+            raise error(header['message'])
+        return arrays
+
+    def state(self, body, times, **kwargs):
+        return self.request('state', body, times, **kwargs)[0]
+
+    def position(self, body, times, **kwargs):
+        return self.request('position', body, times, **kwargs)[0]
+
+    def speed(self, body, times, **kwargs):
+        return self.request('speed', body, times, **kwargs)[0]
+
+    def rotation(self, body, times, **kwargs):
+        times, matrices = self.request('rotation', body, times, **kwargs)
+        return times, matrices
+
+    def can_see(self, instrument, times, body, abcorr=None):
+        '''Like `Instrument.can_see`, returns a masked array of times.'''
+        times, visible = self.request('can_see', instrument, times,
+            body=body, abcorr=abcorr)
+        return numpy.ma.array(times, mask=~visible)
+
+    def visibility_windows(self, instrument, body, start, stop, step,
+        abcorr=None):
+        '''Like `Instrument.visibility_windows`, returns an nx2 array of
+        start and stop times.'''
+        return self.request('visibility_windows', instrument, body=body,
+            start=start, stop=stop, step=step, abcorr=abcorr)[0]
@@ -8,7 +8,10 @@ import datetime
 
 from contextlib import contextmanager
 
+import numpy
+
 import spiceminer._spicewrapper as spice
+import spiceminer.profiling as profiling
 
 __all__ = ['Time']
 
@@ -26,6 +29,41 @@ def _no_argcheck():
         Time._ARGCHECKS = _tmpfuncs
 
 
+@profiling.instrument('time.posix2et')
+def posix2et(timestamps):
+    '''Vectorized equivalent of ``Time.fromposix(t).et()``.
+
+    Parameters
+    ----------
+    timestamps: array_like
+        POSIX timestamps.
+
+    Returns
+    -------
+    ndarray of float
+        Ephimeris times, one C call for all timestamps.
+    '''
+    timestamps = numpy.asarray(timestamps, dtype=float).reshape(-1)
+    return timestamps - 946728000 - spice.deltet_array(timestamps, 'UTC')
+
+@profiling.instrument('time.et2posix')
+def et2posix(ets):
+    '''Vectorized equivalent of ``float(Time.fromet(et))``.
+
+    Parameters
+    ----------
+    ets: array_like
+        Ephimeris times.
+
+    Returns
+    -------
+    ndarray of float
+        POSIX timestamps with the shape of `ets`.
+    '''
+    ets = numpy.asarray(ets, dtype=float)
+    return ets + 946728000 + spice.deltet_array(ets, 'UTC').reshape(ets.shape)
+
+
 ### Helpers for argument checking ###
 def _argcheck_basic(min_, max_, name, value):
     if not isinstance(value, numbers.Integral):
@@ -1,10 +1,20 @@
 #-*- coding:utf-8 -*-
 
 import os
+import math
+import itertools
+import threading
 
 import collections
 from contextlib import contextmanager
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import numpy
+
 
 ### Usefull functions ###
 @contextmanager
@@ -15,6 +25,17 @@ def ignored(*exceptions):
     except exceptions:
         pass
 
+def on_kernel_change(func):
+    '''Register `func` to be called without arguments whenever kernels are
+    loaded or unloaded. Used to invalidate data cached from the kernel pool.'''
+    _KERNEL_LISTENERS.append(func)
+    return func
+
+def kernel_changed():
+    '''Notify all listeners registered with `on_kernel_change`.'''
+    for func in _KERNEL_LISTENERS:
+        func()
+
 def cleanpath(path):
     '''Make any path absolute.'''
     return os.path.abspath(os.path.realpath(os.path.expanduser(os.path.expandvars(path))))
@@ -30,6 +51,89 @@ def iterable_path(path, recursive, followlinks):
         walker = [next(os.walk(path, followlinks=followlinks))]
     return walker
 
+def time_chunks(times, chunk_size):
+    '''Split times into arrays of `chunk_size` (the last one may be
+    shorter), consuming `times` lazily.
+
+    Parameters
+    ----------
+    times: iterable of float or slice
+        The times. A ``slice(start, stop, step)`` stands for the times of
+        ``numpy.arange(start, stop, step)`` without creating them at once.
+    chunk_size: int
+        Number of times per chunk.
+
+    Yields
+    ------
+    chunk: ndarray of float
+    '''
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive, got {}'.format(
+            chunk_size))
+    if isinstance(times, slice):
+        start, stop = float(times.start), float(times.stop)
+        step = 1.0 if times.step is None else float(times.step)
+        size = max(int(math.ceil((stop - start) / step)), 0)
+        for i in range(0, size, chunk_size):
+            yield start + step * numpy.arange(i, min(i + chunk_size, size))
+    elif isinstance(times, numpy.ndarray):
+        times = times.astype(float).reshape(-1)
+        for i in range(0, len(times), chunk_size):
+            yield times[i:i + chunk_size]
+    else:
+        iterator = (float(t) for t in times)
+        while True:
+            chunk = numpy.fromiter(itertools.islice(iterator, chunk_size),
+                dtype=float)
+            if not len(chunk):
+                break
+            yield chunk
+
+def prefetched(iterable):
+    '''Iterate over `iterable` while a background thread already produces
+    the next item.
+
+    Exceptions of `iterable` are raised in the consuming thread. The
+    thread stops when the returned generator is closed or collected.
+    '''
+    items = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        # Give up once the consumer is gone instead of blocking forever
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except Exception as e:
+            put((False, e))
+        else:
+            put((True, done))
+
+    worker = threading.Thread(target=produce)
+    worker.daemon = True
+    worker.start()
+    try:
+        while True:
+            ok, item = items.get()
+            if not ok:
+                raise item
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+
 
 class TimeWindows(collections.Sequence):
     '''A sorted, immutable list of start-end-tuples.
@@ -40,6 +144,24 @@ class TimeWindows(collections.Sequence):
         self._raw = list(intervals)
         self._merged = self._merge(self._raw)
 
+    @classmethod
+    def fromarray(cls, array, convert=float):
+        '''Create an instance from an nx2 array of start and stop times.
+
+        The intervals are merged with numpy before `convert` is applied to
+        the remaining bounds, so `raw` holds the merged intervals.
+        '''
+        array = numpy.asarray(array, dtype=float).reshape(-1, 2)
+        if not len(array):
+            return cls()
+        array = array[numpy.argsort(array[:, 0], kind='mergesort')]
+        stops = numpy.maximum.accumulate(array[:, 1])
+        # A new interval starts where the start exceeds all previous stops
+        new = numpy.append(True, array[1:, 0] > stops[:-1])
+        starts = array[new, 0]
+        stops = stops[numpy.append(numpy.flatnonzero(new)[1:], len(array)) - 1]
+        return cls(*[(convert(a), convert(b)) for a, b in zip(starts, stops)])
+
     @property
     def raw(self):
         '''A copy of the original data.'''
@@ -112,6 +234,9 @@ class TimeWindows(collections.Sequence):
 
 
 ### Shared variables for Body and Kernel ###
+# Callbacks invoked on kernel (un)load
+_KERNEL_LISTENERS = []
+
 # Mapping of Body -> TimeWindows
 TIMEWINDOWS_POS = collections.defaultdict(TimeWindows)
 TIMEWINDOWS_ROT = collections.defaultdict(TimeWindows)
@@ -3,10 +3,13 @@
 import pytest
 
 import os
+import struct
 import random
 import tempfile
 import collections
 
+import numpy as np
+
 import spiceminer._spicewrapper as spice
 import spiceminer.kernel as kernel
 
@@ -49,7 +52,44 @@ def pytest_namespace():
     return {}
 
 
+def _write_daf(path, idword, nd, ni, arrays):
+    '''Write a minimal little endian DAF file.
+
+    `arrays` is a sequence of (doubles, ints, data) tuples where `ints` lacks
+    the begin and end addresses, which are appended automatically.
+    '''
+    summary_size = nd + (ni + 1) // 2
+    address = 3 * 128 + 1
+    summaries, names, body = [], [], []
+    for doubles, ints, data in arrays:
+        data = np.asarray(data, dtype='<f8').ravel()
+        ints = list(ints) + [address, address + len(data) - 1]
+        raw = struct.pack('<{}d{}i'.format(nd, ni), *(list(doubles) + ints))
+        summaries.append(raw.ljust(summary_size * 8, b'\0'))
+        names.append(b'TEST'.ljust(summary_size * 8))
+        body.append(data.tobytes())
+        address += len(data)
+    file_record = struct.pack('<8sii60siii8s', idword.ljust(8).encode('ascii'),
+        nd, ni, b'TEST'.ljust(60), 2, 2, address, b'LTL-IEEE')
+    summary_record = struct.pack('<3d', 0, 0, len(arrays)) + b''.join(summaries)
+    with open(path, 'wb') as f:
+        f.write(file_record.ljust(1024, b'\0'))
+        f.write(summary_record.ljust(1024, b'\0'))
+        f.write(b''.join(names).ljust(1024, b' '))
+        data = b''.join(body)
+        f.write(data.ljust(-(-len(data) // 1024) * 1024, b'\0'))
+
+
 ### Argument fixtures ###
+@pytest.fixture(scope='function')
+def daf_writer(tmpdir):
+    '''Write DAF files into a temporary directory, see `_write_daf`.'''
+    def write(name, idword, nd, ni, arrays):
+        path = str(tmpdir.join(name))
+        _write_daf(path, idword, nd, ni, arrays)
+        return path
+    return write
+
 @pytest.yield_fixture(scope='function')
 def tempdir():
     path = tempfile.mkdtemp()
@@ -133,6 +173,13 @@ def with_spacecraftclock(datadir):
     for k in kernels:
         k._unload()
 
+@pytest.yield_fixture(scope='module')
+def with_kernels(datadir):
+    '''Run tests with all kernels in the data directory loaded.'''
+    kernel.load(datadir)
+    yield
+    kernel.unload(datadir)
+
 
 
 
@@ -0,0 +1,93 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+import spiceminer.kernel.ck as ck
+import spiceminer.kernel.spk as spk
+from spiceminer.extra import matrix2quaternion
+
+
+### Helpers ###
+OMEGA = 1e-3
+
+def zquat(angles):
+    '''C-matrix quaternions for a frame rotated by `angles` about z.'''
+    angles = np.asarray(angles, dtype=float)
+    zeros = np.zeros_like(angles)
+    return np.array([np.cos(angles / 2), zeros, zeros,
+        -np.sin(angles / 2)]).T
+
+def type2_data():
+    records = [[1, 0, 0, 0, 0, 0, 0.01, 1.0]]
+    return np.concatenate([np.ravel(records), [0.0], [100.0]])
+
+def type3_data():
+    quats = zquat([0, np.pi / 2, np.pi])
+    epochs = [0.0, 100.0, 200.0]
+    starts = [0.0, 200.0]
+    return np.concatenate([quats.ravel(), epochs, starts, [2, 3]])
+
+def type5_data(subtype):
+    epochs = np.arange(0, 201, 10, dtype=float)
+    quats = zquat(OMEGA * epochs)
+    if subtype == 0:
+        quats = np.hstack([quats, zquat_derivative(epochs)])
+    return np.concatenate([quats.ravel(), epochs, [0.0],
+        [1.0, subtype, 4, 1, len(epochs)]])
+
+def zquat_derivative(epochs):
+    angles = OMEGA * epochs
+    zeros = np.zeros_like(angles)
+    return OMEGA / 2 * np.array([-np.sin(angles / 2), zeros, zeros,
+        -np.cos(angles / 2)]).T
+
+@pytest.yield_fixture(scope='function')
+def ckfile(daf_writer):
+    path = daf_writer('test.bc', 'DAF/CK', 2, 6, [
+        ((0, 100), (-1000, 1, 2, 1), type2_data()),
+        ((0, 200), (-2000, 1, 3, 0), type3_data()),
+        ((0, 200), (-3000, 1, 5, 0), type5_data(1)),
+        ((0, 200), (-4000, 1, 5, 0), type5_data(0)),
+        ((0, 100), (-5000, 17, 2, 1), type2_data()),
+        ((0, 100), (-6000, 1, 4, 0), [0.0] * 10)
+    ])
+    ck.register(path)
+    yield path
+    ck.unregister(path)
+
+def assert_same_rotation(quats, expected, atol=1e-12):
+    signs = np.sign((quats * expected).sum(axis=1))[:, None]
+    assert np.allclose(quats * signs, expected, rtol=0, atol=atol)
+
+
+### Tests ###
+def test_type2(ckfile):
+    quats, found = ck.pointing(-1000, [0, 50, 100, 101])
+    assert found.tolist() == [True, True, True, False]
+    assert_same_rotation(quats[:3], zquat([0, 0.5, 1]))
+    assert np.isnan(quats[3]).all()
+
+def test_type3(ckfile):
+    quats, found = ck.pointing(-2000, [0, 50, 100, 150, 200, 210])
+    assert found.tolist() == [True, True, True, False, True, False]
+    expected = zquat([0, np.pi / 4, np.pi / 2, 0, np.pi, 0])
+    assert_same_rotation(quats[found], expected[found])
+
+@pytest.mark.parametrize('instrument,atol', [(-3000, 1e-8), (-4000, 1e-12)])
+def test_type5(ckfile, instrument, atol):
+    ticks = np.linspace(0, 200, 47)
+    quats, found = ck.pointing(instrument, ticks)
+    assert found.all()
+    assert_same_rotation(quats, zquat(OMEGA * ticks), atol)
+
+def test_inertial_frame(ckfile):
+    quats, found = ck.pointing(-5000, [0])
+    expected = matrix2quaternion(spk.INERTIAL_FRAMES['ECLIPJ2000'])
+    assert found.all()
+    assert_same_rotation(quats, expected[None])
+
+@pytest.mark.xfail(raises=ValueError)
+def test_unsupported(ckfile):
+    ck.pointing(-6000, [0])
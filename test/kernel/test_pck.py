@@ -0,0 +1,107 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+import numpy.polynomial.chebyshev as cheb
+
+import spiceminer.kernel.pck as pck
+import spiceminer.kernel.spk as spk
+
+
+### Helpers ###
+# Type 2, body 3000 (J2000) and 3001 (ECLIPJ2000): 2 records of 100 sec
+COEFFS = np.array([
+    [[0.1, 0.01, 0.001], [0.2, 0.02, 0.002], [0.3, 0.03, 0.003]],
+    [[0.4, 0.01, 0.001], [0.5, 0.02, 0.002], [0.6, 0.03, 0.003]]])
+
+def type2_data():
+    records = [np.concatenate([[50.0 + 100 * i, 50.0], COEFFS[i].ravel()])
+        for i in range(2)]
+    return np.concatenate(records + [[0.0, 100.0, 11, 2]])
+
+def expected_angles(ets):
+    index = np.clip((ets // 100).astype(int), 0, 1)
+    x = (ets - 50 - 100 * index) / 50.0
+    return np.array([[cheb.chebval(xi, c) for c in COEFFS[i]]
+        for xi, i in zip(x, index)])
+
+def rotate(angle, axis):
+    '''Frame rotation about the x (1) or z (3) axis.'''
+    c, s = np.cos(angle), np.sin(angle)
+    if axis == 1:
+        return np.array([[1, 0, 0], [0, c, s], [0, -s, c]])
+    return np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
+
+def euler313(w, delta, phi):
+    return rotate(w, 3).dot(rotate(delta, 1)).dot(rotate(phi, 3))
+
+@pytest.yield_fixture(scope='function')
+def pckfile(daf_writer):
+    path = daf_writer('test.bpc', 'DAF/PCK', 2, 5, [
+        ((0, 200), (3000, 1, 2), type2_data()),
+        ((0, 200), (3001, 17, 2), type2_data()),
+        ((0, 200), (3002, 1, 20), [0.0] * 10)
+    ])
+    pck.register(path)
+    yield path
+    pck.unregister(path)
+
+ETS = np.array([0, 10, 99.5, 100, 150, 200])
+
+
+### Tests ###
+def test_euler313():
+    angles = np.random.uniform(-np.pi, np.pi, (10, 3))
+    result = pck.euler313(*angles.T)
+    for matrix, (w, delta, phi) in zip(result, angles):
+        assert np.allclose(matrix, euler313(w, delta, phi))
+
+@pytest.mark.parametrize('body', [3000, 3001])
+def test_binary(pckfile, body):
+    matrices, found = pck.rotation(body, np.append(ETS, 201))
+    assert found.tolist() == [True] * len(ETS) + [False]
+    assert np.isnan(matrices[-1]).all()
+    expected = np.array([euler313(w, delta, phi)
+        for phi, delta, w in expected_angles(ETS)])
+    if body == 3001:
+        expected = expected.dot(spk.INERTIAL_FRAMES['ECLIPJ2000'])
+    assert np.allclose(matrices[:-1], expected)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_unsupported(pckfile):
+    pck.rotation(3002, ETS)
+
+def test_iau_angles():
+    # Simplified model with a single nutation/precession angle
+    model = pck.IAUModel(np.array([10, 1, 0]), np.array([80, -1, 0]),
+        np.array([30, 360, 0]), np.radians([[45, 36000]]), np.array([1.0]),
+        np.array([2.0]), np.array([3.0]), 1)
+    ets = np.array([0, pck.SECONDS_PER_CENTURY / 4])
+    centuries = ets / pck.SECONDS_PER_CENTURY
+    theta = np.radians(45 + 36000 * centuries)
+    ra = 10 + centuries + np.sin(theta)
+    dec = 80 - centuries + 2 * np.cos(theta)
+    w = (30 + 360 * ets / pck.SECONDS_PER_DAY + 3 * np.sin(theta)) % 360
+    expected = np.radians([ra + 90, 90 - dec, w]).T
+    assert np.allclose(pck._iau_angles(model, ets), expected)
+
+@pytest.mark.parametrize('pool,expected', [
+    ({'POLE_RA': [10, 1], 'POLE_DEC': [80], 'PM': [30, 360, 1e-9, 5]},
+        ([10, 1, 0], [80, 0, 0], [30, 360, 1e-9])),
+    ({'POLE_RA': [10, 1, 0], 'PM': [30, 360]}, None),
+    ({'POLE_RA': [10, 1, 0], 'POLE_DEC': [80, -1, 0]}, None)
+])
+def test_model(monkeypatch, pool, expected):
+    def gdpool(name):
+        body, _, item = name.partition('_')
+        values = pool.get(item) if body == 'BODY399' else None
+        return None if values is None else np.array(values, dtype=float)
+    monkeypatch.setattr(pck.spice, 'gdpool', gdpool)
+    monkeypatch.setattr(pck, '_MODELS', {})
+    model = pck._model(399)
+    if expected is None:
+        assert model is None
+    else:
+        assert [item.tolist() for item in model[:3]] == list(expected)
+        assert model.angles.shape == (0, 2)
@@ -0,0 +1,165 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+import numpy.polynomial.chebyshev as cheb
+
+import spiceminer.kernel.daf as daf
+import spiceminer.kernel.spk as spk
+import spiceminer._spicewrapper as spice
+
+
+### Helpers ###
+# Type 2, target 3 (center 0, J2000): 2 records of 100 sec
+T2_COEFFS = np.arange(2 * 3 * 4, dtype=float).reshape(2, 3, 4) / 10.0
+# Type 3, target 399 (center 3, ECLIPJ2000): 1 record of 200 sec
+T3_COEFFS = np.arange(6 * 3, dtype=float).reshape(6, 3) / 7.0
+# Discrete types: cubic motion in each coordinate
+EPOCHS = np.array([0, 15, 40, 70, 90, 120, 150, 160, 200], dtype=float)
+
+def cubic(times):
+    times = np.asarray(times, dtype=float)[:, None]
+    scale = np.array([1.0, 2.0, 3.0])
+    pos = (1e-6 * times ** 3 - 1e-3 * times ** 2 + times) * scale
+    vel = (3e-6 * times ** 2 - 2e-3 * times + 1) * scale
+    return np.hstack([pos, vel])
+
+def type2_data():
+    records = [np.concatenate([[50.0 + 100 * i, 50.0], T2_COEFFS[i].ravel()])
+        for i in range(2)]
+    return np.concatenate(records + [[0.0, 100.0, 14, 2]])
+
+def type3_data():
+    return np.concatenate([[100.0, 100.0], T3_COEFFS.ravel(), [0.0, 200.0, 20, 1]])
+
+def discrete_data(value):
+    states = cubic(EPOCHS)
+    return np.concatenate([states.ravel(), EPOCHS, [value, len(EPOCHS)]])
+
+@pytest.yield_fixture(scope='function')
+def spkfile(daf_writer):
+    path = daf_writer('test.bsp', 'DAF/SPK', 2, 6, [
+        ((0, 200), (3, 0, 1, 2), type2_data()),
+        ((0, 200), (399, 3, 17, 3), type3_data()),
+        ((0, 200), (301, 3, 1, 9), discrete_data(3)),
+        ((0, 200), (401, 0, 1, 13), discrete_data(1)),
+        ((0, 200), (402, 0, 1, 21), [0.0] * 10)
+    ])
+    spk.register(path)
+    yield path
+    spk.unregister(path)
+
+def expected_type2(ets):
+    index = np.clip((ets // 100).astype(int), 0, 1)
+    x = (ets - 50 - 100 * index) / 50.0
+    pos = np.array([[cheb.chebval(xi, c) for c in T2_COEFFS[i]]
+        for xi, i in zip(x, index)])
+    vel = np.array([[cheb.chebval(xi, cheb.chebder(c)) / 50.0
+        for c in T2_COEFFS[i]] for xi, i in zip(x, index)])
+    return np.hstack([pos, vel])
+
+def expected_type3(ets):
+    x = (ets - 100) / 100.0
+    return np.array([[cheb.chebval(xi, c) for c in T3_COEFFS] for xi in x])
+
+ETS = np.array([0, 10, 99.5, 100, 150, 200])
+
+
+### Tests ###
+def test_daf(spkfile):
+    f = daf.DAF(spkfile)
+    assert f.idword == 'DAF/SPK'
+    assert (f.nd, f.ni) == (2, 6)
+    doubles, ints = f.summaries()
+    assert doubles.shape == (5, 2)
+    assert ints[:, 0].tolist() == [3, 399, 301, 401, 402]
+    assert len(f.names()) == 5
+    coverage = f.coverage()
+    assert sorted(coverage) == [3, 301, 399, 401, 402]
+    assert coverage[3].tolist() == [[0, 200]]
+
+def test_daf_invalid(tmpdir):
+    path = str(tmpdir.join('invalid'))
+    with open(path, 'wb') as f:
+        f.write(b'KPL/LSK'.ljust(1024))
+    with pytest.raises(ValueError):
+        daf.DAF(path)
+
+def test_type2(spkfile):
+    states, light_times, found = spk.state(3, ETS, 'J2000', 0)
+    assert found.all()
+    assert np.allclose(states, expected_type2(ETS))
+    assert np.allclose(light_times,
+        np.sqrt((states[:, :3] ** 2).sum(axis=1)) / spk.CLIGHT)
+
+def test_type3_chain(spkfile):
+    states, _, found = spk.state(399, ETS, 'ECLIPJ2000', 3)
+    assert found.all()
+    assert np.allclose(states, expected_type3(ETS))
+    # 399 -> 3 -> 0
+    states, _, _ = spk.state(399, ETS, 'J2000', 0)
+    rotation = spk.INERTIAL_FRAMES['ECLIPJ2000']
+    relative = expected_type3(ETS)
+    expected = expected_type2(ETS) + np.hstack([relative[:, :3].dot(rotation),
+        relative[:, 3:].dot(rotation)])
+    assert np.allclose(states, expected)
+
+@pytest.mark.parametrize('target', [301, 401])
+def test_discrete(spkfile, target):
+    center = 3 if target == 301 else 0
+    states, _, found = spk.state(target, ETS, 'J2000', center)
+    assert found.all()
+    assert np.allclose(states, cubic(ETS))
+
+def test_coverage(spkfile):
+    _, _, found = spk.state(3, [-1, 0, 200, 201], 'J2000', 0)
+    assert found.tolist() == [False, True, True, False]
+    _, _, found = spk.state(499, [0], 'J2000', 0)
+    assert not found.any()
+
+@pytest.mark.xfail(raises=ValueError)
+@pytest.mark.parametrize('target,frame', [(402, 'J2000'), (3, 'IAU_EARTH')])
+def test_unsupported(spkfile, target, frame):
+    spk.state(target, ETS, frame, 0)
+
+@pytest.mark.parametrize('writer', [spice.spkw09, spice.spkw13])
+def test_writer(tmpdir, writer):
+    path = str(tmpdir.join('written.bsp'))
+    handle = spice.spkopn(path, 'TEST', 0)
+    writer(handle, 401, 0, 'J2000', EPOCHS[0], EPOCHS[-1], 'TEST', 3,
+        cubic(EPOCHS), EPOCHS)
+    spice.spkcls(handle)
+    spk.register(path)
+    try:
+        states, _, found = spk.state(401, ETS, 'J2000', 0)
+    finally:
+        spk.unregister(path)
+    assert found.all()
+    assert np.allclose(states, cubic(ETS))
+
+def test_batch_status(tmpdir):
+    path = str(tmpdir.join('written.bsp'))
+    handle = spice.spkopn(path, 'TEST', 0)
+    spice.spkw09(handle, 401, 0, 'J2000', EPOCHS[0], EPOCHS[-1], 'TEST', 3,
+        cubic(EPOCHS), EPOCHS)
+    spice.spkcls(handle)
+    spice.furnsh(path)
+    try:
+        ets = np.array([-10.0, 50.0, 300.0])
+        _, _, found = spice.spkezr_array('401', ets, 'J2000', 'NONE', '0')
+        assert found.tolist() == [False, True, False]
+        assert spice.batch_error() == 'SPICE(SPKINSUFFDATA)'
+        _, _, found = spice.spkezr_array('401', ets[1:2], 'J2000', 'NONE',
+            '0')
+        assert found.all()
+        assert spice.batch_error() is None
+        # Real errors raise instead of looking like missing data
+        with pytest.raises(spice.SpiceError) as error:
+            spice.spkezr_array('401', ets, 'NO SUCH FRAME', 'NONE', '0')
+        assert str(error.value) == spice.batch_error()
+        assert spice.batch_error() != 'SPICE(SPKINSUFFDATA)'
+        with pytest.raises(spice.SpiceError):
+            spice.pxform_array('J2000', 'NO SUCH FRAME', ets)
+    finally:
+        spice.unload(path)
@@ -0,0 +1,110 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import time
+
+import numpy as np
+
+pytest.importorskip('concurrent.futures')
+
+import spiceminer as sm
+import spiceminer.aio as aio
+import spiceminer.parallel as parallel
+
+
+### Fixtures ###
+TIMES = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR, dtype=float)
+
+class RecordingPool(parallel.Pool):
+    '''Records the times of all position batches.'''
+    def __init__(self, *args, **kwargs):
+        super(RecordingPool, self).__init__(*args, **kwargs)
+        self.batches = []
+
+    def position(self, body, times, **kwargs):
+        self.batches.append(times)
+        return super(RecordingPool, self).position(body, times, **kwargs)
+
+@pytest.yield_fixture(scope='function')
+def executor(datadir):
+    executor = aio.Executor([datadir], workers=2, max_batches=1)
+    yield executor
+    executor.close()
+
+
+### Tests ###
+def test_select():
+    result = np.array([[1., 2., 4.], [10., 20., 40.]])
+    data = aio._select('position', result, np.array([4., 3., 1., 1.]))
+    assert np.array_equal(data, [[4., 1., 1.], [40., 10., 10.]])
+    data = aio._select('position', np.empty((2, 0)), np.array([1.]))
+    assert data.shape == (2, 0)
+    matrices = np.arange(27.).reshape(3, 3, 3)
+    times, data = aio._select('rotation', (result[0], matrices),
+        np.array([2.]))
+    assert np.array_equal(times, [2.])
+    assert np.array_equal(data, matrices[1:2])
+
+@pytest.mark.xfail(raises=ValueError)
+def test_submit_invalid(executor):
+    executor.submit('distance', 399, TIMES)
+
+
+@pytest.mark.usefixtures('with_kernels')
+class TestExecutor(object):
+    def test_results(self, executor):
+        expected = sm.Body(399).state(TIMES)
+        pending = [executor.state(399, TIMES[i::3]) for i in range(3)]
+        for i, future in enumerate(pending):
+            assert np.allclose(future.result(), expected[:, i::3])
+        times, matrices = executor.rotation(399, TIMES).result()
+        assert np.allclose(matrices, sm.Body(399).rotation(TIMES)[1])
+
+    def test_coalesce_and_cancel(self, datadir):
+        pool = RecordingPool([datadir], workers=2)
+        with aio.Executor([datadir], pool=pool) as executor:
+            # Paused, all requests stay queued and are merged on resume
+            executor.pause()
+            pending = [executor.position(399, TIMES[i::2]) for i in range(2)]
+            cancelled = executor.position(399, TIMES + 0.5)
+            assert cancelled.cancel()
+            executor.resume()
+            expected = sm.Body(399).position(TIMES)
+            for i, future in enumerate(pending):
+                assert np.allclose(future.result(), expected[:, i::2])
+        assert cancelled.cancelled()
+        assert len(pool.batches) == 1
+        assert np.array_equal(pool.batches[0], TIMES)
+
+    def test_max_pending(self, datadir):
+        executor = aio.Executor([datadir], workers=2, max_pending=2)
+        try:
+            # The paused dispatcher holds the first request, the next two
+            # fill the queue
+            executor.pause()
+            pending = [executor.position(399, TIMES[i::3]) for i in range(3)]
+            with pytest.raises(aio.queue.Full):
+                executor.position(399, TIMES, block=False)
+            start = time.time()
+            with pytest.raises(aio.queue.Full):
+                executor.position(399, TIMES, timeout=0.2)
+            assert time.time() - start >= 0.2
+            executor.resume()
+            for future in pending:
+                assert future.result().shape[0] == 4
+        finally:
+            executor.close()
+
+    def test_asyncio(self, executor):
+        asyncio = pytest.importorskip('asyncio')
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        earth = executor.body(399)
+        try:
+            positions, states = loop.run_until_complete(asyncio.gather(
+                earth.aposition(TIMES), earth.astate(TIMES)))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        assert np.allclose(positions, states[:4])
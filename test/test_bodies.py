@@ -2,11 +2,13 @@
 
 import pytest
 
+import threading
 import collections
 
 import numpy as np
 
 import spiceminer as sm
+import spiceminer.util as util
 import spiceminer.bodies as bodies
 import spiceminer._spicewrapper as spice
 
@@ -37,6 +39,72 @@ def clear_bodies():
             if id_ != 0:
                 bodies.Body._delete(id_)
 
+# Field of view of 10 degrees half angle looking from the earth, aligned with
+# J2000. Its frame shares the name of the earth, because the visibility
+# functions use the frame name as observer.
+CAMERA = -99001
+CAMERA_KERNEL = '''KPL/IK
+
+\\begindata
+NAIF_BODY_NAME += ( 'TEST_CAMERA', 'TEST_CAMERA_FRAME' )
+NAIF_BODY_CODE += ( -99001, 399 )
+FRAME_TEST_CAMERA_FRAME = 1399001
+FRAME_1399001_NAME = 'TEST_CAMERA_FRAME'
+FRAME_1399001_CLASS = 4
+FRAME_1399001_CLASS_ID = 1399001
+FRAME_1399001_CENTER = 399
+TKFRAME_1399001_RELATIVE = 'J2000'
+TKFRAME_1399001_SPEC = 'MATRIX'
+TKFRAME_1399001_MATRIX = ( 1 0 0 0 1 0 0 0 1 )
+INS-99001_FOV_FRAME = 'TEST_CAMERA_FRAME'
+INS-99001_BORESIGHT = ( {boresight} )
+{fov}\\begintext
+'''
+CAMERA_FOV = {
+    'CIRCLE': '''INS-99001_FOV_SHAPE = 'CIRCLE'
+INS-99001_FOV_CLASS_SPEC = 'ANGLES'
+INS-99001_FOV_REF_VECTOR = ( {reference} )
+INS-99001_FOV_REF_ANGLE = 10
+INS-99001_FOV_ANGLE_UNITS = 'DEGREES'
+''',
+    # Hexagon, the first three corners alone don't contain the boresight
+    'POLYGON': '''INS-99001_FOV_SHAPE = 'POLYGON'
+INS-99001_FOV_CLASS_SPEC = 'CORNERS'
+INS-99001_FOV_BOUNDARY_CORNERS = ( {corners} )
+'''
+}
+
+@pytest.yield_fixture(scope='function')
+def camera(request, tmpdir):
+    '''Instrument pointing at the moon at the start of 2000, needs
+    `with_kernels`. Circular unless parametrized with another shape.'''
+    shape = getattr(request, 'param', 'CIRCLE')
+    moon = sm.Body('MOON').position(sm.Time(2000), observer='EARTH',
+        frame='J2000')[1:, 0]
+    boresight = moon / np.linalg.norm(moon)
+    reference = np.cross(boresight, [0, 0, 1])
+    reference /= np.linalg.norm(reference)
+    up = np.cross(boresight, reference)
+    angles = np.radians(np.arange(0, 360, 60))
+    corners = boresight + np.tan(np.radians(10)) * (
+        np.cos(angles)[:, None] * reference + np.sin(angles)[:, None] * up)
+    fmt = lambda vectors: ' '.join(repr(float(x)) for x in np.ravel(vectors))
+    fov = CAMERA_FOV[shape].format(reference=fmt(reference),
+        corners=fmt(corners))
+    path = str(tmpdir.join('camera.ti'))
+    with open(path, 'w') as f:
+        f.write(CAMERA_KERNEL.format(boresight=fmt(boresight), fov=fov))
+    sm.load(path)
+    bodies.Body._make(CAMERA)
+    yield sm.Body(CAMERA)
+    bodies.Body._delete(CAMERA)
+    sm.unload(path)
+
+def radial_speed(state):
+    '''Rate of change of the distance for an 8xn state.'''
+    return (state[1:4] * state[4:7]).sum(axis=0) / np.linalg.norm(
+        state[1:4], axis=0)
+
 ### Data ###
 VALID_PARAMETERS = [
     0,
@@ -74,7 +142,7 @@ TIMES = [
 ]
 
 ### No kernels needed ###
-# TODO: _iterbodies, _typecheck
+# TODO: _typecheck
 
 @pytest.mark.usefixtures('clear_bodies')
 def test_make():
@@ -108,12 +176,81 @@ def test_delete():
     with pytest.raises(ValueError):
         bodies.Body._delete(10)
 
+@pytest.mark.usefixtures('clear_bodies')
+def test_registry():
+    ids = range(2000001, 2001001)
+    for i in ids:
+        bodies.Body._make(i)
+    for i in ids[::2]:
+        bodies.Body._delete(i)
+    assert sorted(bodies.Asteroid.loaded_ids()) == list(ids[1::2])
+    assert len(bodies.Asteroid.LOADED) == 500
+    assert bodies._BodyMeta._ID_COUNTER[ids[1]] == 1
+    assert bodies._BodyMeta._ID_COUNTER[ids[0]] == 0
+    assert not hasattr(bodies.Body(ids[1]), '__dict__')
+
+@pytest.mark.usefixtures('clear_bodies')
+def test_hierarchy():
+    for i in [10, 399, 301, 499, -82, -82000, -82001, -82999, -83001]:
+        bodies.Body._make(i)
+    body = bodies.Body
+    assert body(-82001).parent is body(-82)
+    assert body(-82).children == [body(-82000), body(-82001), body(-82999)]
+    assert body(10).children == [body(399), body(499)]
+    assert body(399).children == [body(301)]
+    assert body(10).descendants() == [body(399), body(499), body(301)]
+    assert body(10).descendants(depth=1) == [body(399), body(499)]
+    bodies.Body._delete(301)
+    assert body(399).children == []
+    assert 399 not in bodies._BodyMeta._CHILDREN
+    with pytest.raises(ValueError):
+        body(-83001).parent
+
 @pytest.mark.usefixtures('make_bodies', 'clear_bodies')
 @pytest.mark.parametrize('arg', VALID_PARAMETERS + INVALID_PARAMETERS)
 def test_constructor(arg):
     body = bodies.Body(arg)
     assert body is bodies.Body(arg)
 
+@pytest.mark.parametrize('name,expected', [
+    ('Earth', 'EARTH'),
+    ('  solar   system barycenter ', 'SOLAR SYSTEM BARYCENTER'),
+    ('EA RTH', 'EA RTH')
+])
+def test_normalize(name, expected):
+    assert bodies._normalize(name) == expected
+
+@pytest.mark.usefixtures('make_bodies', 'clear_bodies')
+def test_name_cache():
+    earth = bodies.Body(' earth')
+    assert bodies._NAME_TO_ID['EARTH'] == 399
+    assert bodies.Body('Earth ') is earth
+    assert earth.name == 'EARTH'
+    assert bodies._ID_TO_NAME[399] == 'EARTH'
+    util.kernel_changed()
+    assert not bodies._NAME_TO_ID and not bodies._ID_TO_NAME
+
+
+FOV_DIRECTIONS = np.array([
+    [0, 0, 1],
+    [0.05, 0.05, 1],
+    [0.2, 0, 1],
+    [0, 0, -1],
+    [0.09, -0.09, 1]
+])
+
+@pytest.mark.parametrize('shape,bounds,expected', [
+    ('RECTANGLE', [[1, 1, 10], [-1, 1, 10], [-1, -1, 10], [1, -1, 10]],
+        [True, True, False, False, True]),
+    ('POLYGON', [[1.5, 0, 10], [0, 1.5, 10], [-1.5, 0, 10], [0, -1.5, 10]],
+        [True, True, False, False, False]),
+    ('CIRCLE', [[0.1, 0, 1]], [True, True, False, False, False]),
+    ('ELLIPSE', [[0.1, 0, 1], [0, 0.05, 1]], [True, False, False, False, False])
+])
+def test_fov_contains(shape, bounds, expected):
+    result = bodies._fov_contains(shape, [0, 0, 1], bounds, FOV_DIRECTIONS)
+    assert result.tolist() == expected
+
 
 ### Kernels needed ###
 def gen_data():
@@ -125,6 +262,17 @@ def gen_data():
         yield idcode, sm.Time()
         yield idcode, np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY, dtype=float)
 
+@pytest.mark.xfail(raises=ValueError)
+@pytest.mark.parametrize('primary,secondary,axes', [
+    (('position', 'SUN'), ('constant', (0, 0, 1)), ('X', 'Z')),
+    (('speed', 'SUN', 'EARTH'), ('constant', (0, 0, 1)), ('X', 'Z')),
+    (('position', 'SUN', 'EARTH'), ('constant', (0, 0, 1)), ('X', '-X')),
+    (('position', 'SUN', 'EARTH'), ('constant', (0, 0, 1)), ('X', 'W'))
+])
+def test_two_vector_frame_invalid(primary, secondary, axes):
+    bodies.TwoVectorFrame(primary, secondary, *axes)
+
+
 @pytest.mark.usefixtures('with_kernels')
 class TestBodyData:
     def _cols(self, times):
@@ -163,6 +311,28 @@ class TestBodyData:
         assert data.shape == (4, cols)
         assert data.dtype == float
 
+    @pytest.mark.parametrize('idcode', IDS)
+    @pytest.mark.parametrize('frame', ['ECLIPJ2000', 'J2000'])
+    def test_state_numpy_backend(self, idcode, frame):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR,
+            dtype=float)
+        body = sm.Body(idcode)
+        expected = body.state(times, frame=frame, backend='cspice')
+        data = body.state(times, frame=frame, backend='numpy')
+        assert data.shape == expected.shape
+        assert np.allclose(data[1:4], expected[1:4], rtol=0, atol=1e-3)
+        assert np.allclose(data[4:7], expected[4:7], rtol=0, atol=1e-9)
+
+    @pytest.mark.xfail(raises=ValueError)
+    @pytest.mark.parametrize('kwargs', [
+        {'abcorr': 'LT'},
+        {'frame': 'IAU_EARTH'},
+        {'backend': 'unknown'}
+    ])
+    def test_state_backend_invalid(self, kwargs):
+        kwargs.setdefault('backend', 'numpy')
+        sm.Body(399).state(sm.Time(2000), **kwargs)
+
     @pytest.mark.parametrize('idcode', IDS)
     @pytest.mark.parametrize('times', TIMES)
     def test_rotation(self, idcode, times):
@@ -175,3 +345,202 @@ class TestBodyData:
         for matrix in data[1]:
             assert matrix.shape == (3, 3)
             assert matrix.dtype == float
+
+    @pytest.mark.parametrize('frame', ['GSE', 'HEE', 'Carrington'])
+    def test_special_frames(self, frame):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        data = sm.Body('MOON').state(times, observer='EARTH', frame=frame)
+        assert data.shape == (8, len(times))
+        positions = sm.Body('MOON').position(times, observer='EARTH',
+            frame=frame)
+        assert np.allclose(positions, data[:4])
+        assert np.allclose(sm.Body('MOON').rotation(times, frame)[0], times)
+
+    def test_special_frames_gse(self):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        data = sm.Body('SUN').state(times, observer='EARTH', frame='GSE')
+        # The sun is fixed on the x axis, only its distance changes
+        assert np.allclose(data[2:4], 0, atol=1e-6)
+        assert (data[1] > 0).all()
+        assert np.allclose(data[5:7], 0, atol=1e-6)
+        assert np.allclose(data[4], radial_speed(sm.Body('SUN').state(times,
+            observer='EARTH', frame='ECLIPJ2000')), rtol=0, atol=1e-6)
+
+    def test_special_frames_rtn(self):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        name = bodies.rtn_frame('MOON')
+        try:
+            assert name == 'RTN MOON'
+            state = sm.Body('MOON').state(times, observer='SUN')
+            matrices, found = bodies.FrameDecorator.FRAMES[name].rotation(
+                sm.time_.posix2et(times))
+            assert found.all()
+            velocity = np.einsum('nij,jn->in', matrices, state[4:7])
+            assert (velocity[1] > 0).all()
+            assert np.allclose(velocity[2], 0, atol=1e-9)
+            # Seen from the sun, the body only moves along R
+            data = sm.Body('MOON').state(times, observer='SUN', frame=name)
+            assert np.allclose(data[1], np.linalg.norm(state[1:4], axis=0))
+            assert np.allclose(data[2:4], 0, atol=1e-3)
+            assert np.allclose(data[4], radial_speed(state), rtol=0,
+                atol=1e-6)
+            assert np.allclose(data[5:7], 0, atol=1e-6)
+        finally:
+            del bodies.FrameDecorator.FRAMES[name]
+
+    @pytest.mark.parametrize('axes', [('X', 'Z'), ('-Z', 'Y')])
+    def test_two_vector_frame(self, axes):
+        frame = bodies.TwoVectorFrame(('position', 'SUN', 'MOON'),
+            ('velocity', 'MOON', 'SUN'), *axes)
+        primary = {'X': 0, 'Y': 1, 'Z': 2}[axes[0][-1]]
+        secondary = {'X': 0, 'Y': 1, 'Z': 2}[axes[1]]
+        third = 3 - primary - secondary
+        sign = -1 if axes[0].startswith('-') else 1
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        matrices, found = frame.rotation(sm.time_.posix2et(times))
+        assert found.all()
+        state = sm.Body('MOON').state(times, observer='SUN')
+        sun = np.einsum('nij,jn->in', matrices, -state[1:4])
+        velocity = np.einsum('nij,jn->in', matrices, state[4:7])
+        assert (sign * sun[primary] > 0).all()
+        assert np.allclose(np.delete(sun, primary, axis=0), 0, atol=1e-3)
+        assert (velocity[secondary] > 0).all()
+        assert np.allclose(velocity[third], 0, atol=1e-9)
+
+    def test_special_frames_chain(self):
+        class Rotated(bodies.SpecialFrame):
+            def rotation(self, ets):
+                matrix = [[0, 1, 0], [-1, 0, 0], [0, 0, 1]]
+                return (np.repeat([matrix], len(ets), axis=0),
+                    np.ones(len(ets), dtype=bool))
+        bodies.FrameDecorator('GSE', 'TEST ROTATED')(Rotated)
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        try:
+            data = sm.Body('SUN').position(times, observer='EARTH',
+                frame='TEST ROTATED')
+            assert np.allclose(data[[1, 3]], 0, atol=1e-6)
+            assert (data[2] < 0).all()
+        finally:
+            del bodies.FrameDecorator.FRAMES['TEST ROTATED']
+
+    def test_threads(self):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR,
+            dtype=float)
+        expected = sm.Body('MOON').state(times, observer='EARTH')
+        results = [None] * 8
+        def work(i):
+            results[i] = sm.Body('MOON').state(times, observer='EARTH')
+        threads = [threading.Thread(target=work, args=(i,))
+            for i in range(len(results))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for data in results:
+            assert np.array_equal(data, expected)
+
+    @pytest.mark.parametrize('prefetch', [False, True])
+    def test_iter(self, prefetch):
+        body = sm.Body(399)
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        span = slice(times[0], times[-1] + sm.Time.DAY / 2, sm.Time.DAY)
+        chunks = list(body.iter_states(span, 7, prefetch=prefetch))
+        assert [chunk.shape[1] for chunk in chunks[:-1]] == [7] * (
+            len(chunks) - 1)
+        assert np.allclose(np.hstack(chunks), body.state(times))
+        chunks = list(body.iter_positions(iter(times), 7, prefetch=prefetch))
+        assert np.allclose(np.hstack(chunks), body.position(times))
+        chunks = list(body.iter_rotations(times, 7, prefetch=prefetch))
+        expected = body.rotation(times)
+        assert np.allclose(np.hstack([t for t, _ in chunks]), expected[0])
+        assert np.allclose(sum([m for _, m in chunks], []), expected[1])
+
+    @pytest.mark.parametrize('idcode', IDS)
+    def test_rotation_numpy_backend(self, idcode):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR,
+            dtype=float)
+        body = sm.Body(idcode)
+        expected = body.rotation(times, backend='cspice')
+        data = body.rotation(times, backend='numpy')
+        assert np.allclose(data[0], expected[0])
+        assert np.allclose(data[1], expected[1], rtol=0, atol=1e-12)
+
+    def test_rotation_numpy_backend_fallback(self, monkeypatch):
+        # Without an IAU model the numpy backend leaves IAU_EARTH to CSPICE
+        monkeypatch.setattr(bodies.frames.pck, '_model', lambda body: None)
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        body = sm.Body(399)
+        expected = body.rotation(times, backend='cspice')
+        data = body.rotation(times, backend='numpy')
+        assert np.array_equal(data[0], expected[0])
+        assert np.allclose(data[1], expected[1], rtol=0, atol=1e-12)
+
+    @pytest.mark.xfail(raises=ValueError)
+    def test_rotation_backend_invalid(self):
+        sm.Body(399).rotation(sm.Time(2000), backend='unknown')
+
+    @pytest.mark.parametrize('idcode', IDS)
+    @pytest.mark.parametrize('kind,shape', [
+        ('quat', (4,)),
+        ('matrix', (3, 3)),
+        ('state6x6', (6, 6)),
+        XFailValue(('euler', None))
+    ])
+    def test_attitude(self, idcode, kind, shape):
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        body = sm.Body(idcode)
+        valid_times, data, angular_velocity = body.attitude(times, kind=kind)
+        assert data.shape == (len(valid_times),) + shape
+        assert angular_velocity.shape == (len(valid_times), 3)
+        assert data.flags['C_CONTIGUOUS']
+        if kind == 'matrix':
+            assert np.allclose(data, body.rotation(valid_times)[1])
+
+
+@pytest.mark.usefixtures('with_kernels')
+class TestInstrument:
+    START, STOP = sm.Time(2000), sm.Time(2000, 3)
+
+    def test_visibility_windows(self, camera):
+        windows = camera.visibility_windows('MOON', self.START, self.STOP,
+            sm.Time.HOUR)
+        # The moon comes back once per month
+        assert len(windows) > 1
+        times = np.arange(self.START, self.STOP, sm.Time.HOUR / 4,
+            dtype=float)
+        seen = camera.can_see(times, 'MOON')
+        inside = np.zeros(len(seen), dtype=bool)
+        for start, stop in windows:
+            inside |= (seen.data >= start) & (seen.data <= stop)
+        assert np.array_equal(inside, ~np.ma.getmaskarray(seen))
+
+    def test_visibility_windows_grow(self, camera, monkeypatch):
+        expected = camera.visibility_windows('MOON', self.START, self.STOP,
+            sm.Time.HOUR)
+        monkeypatch.setattr(bodies.Instrument, '_WINDOW_CELL_SIZE', 1)
+        with sm.profile() as report:
+            windows = camera.visibility_windows('MOON', self.START,
+                self.STOP, sm.Time.HOUR)
+        assert windows == expected
+        assert report.stats['spice.gftfov'].calls > 1
+
+    @pytest.mark.parametrize('camera', ['POLYGON'], indirect=True)
+    def test_can_see_polygon(self, camera):
+        assert len(camera.fov().bounds.T) == 6
+        times = np.arange(self.START, self.START + 2 * sm.Time.DAY,
+            sm.Time.HOUR, dtype=float)
+        seen = camera.can_see(times, 'MOON')
+        visible = ~np.ma.getmaskarray(seen)
+        assert visible[0] and not visible.all()
+        expected = [spice.fovtrg(camera.name, 'MOON', 'POINT', '',
+            bodies.Body._ABCORR, 'TEST_CAMERA_FRAME', sm.Time.fromposix(t).et())
+            for t in seen.data]
+        assert np.array_equal(visible, expected)
@@ -0,0 +1,100 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+import spiceminer.util as util
+import spiceminer.cache as cache
+import spiceminer.extra as extra
+
+
+### Helpers ###
+class FakeBody(object):
+    '''Rotates around a fixed axis, has no data in (5e5, 6e5) and no
+    angular velocity, like CK frames without AV.'''
+    def __init__(self):
+        self.calls = 0
+
+    def quaternions(self, times):
+        times = np.asarray(times, dtype=float)
+        times = times[~((times > 5e5) & (times < 6e5))]
+        angles = 1e-4 * times + 0.3 * np.sin(times / 2e4)
+        quats = np.zeros((len(times), 4))
+        quats[:, 0] = np.cos(angles / 2)
+        quats[:, 2] = np.sin(angles / 2) * 0.6
+        quats[:, 3] = np.sin(angles / 2) * 0.8
+        return times, quats
+
+    def rotation(self, times, target):
+        self.calls += 1
+        times, quats = self.quaternions(times)
+        return times, list(extra.quaternion2matrix(quats))
+
+    def attitude(self, times, target, kind):
+        return np.empty(0), np.empty((0, 4)), np.empty((0, 3))
+
+@pytest.fixture(scope='function')
+def fake_body(monkeypatch):
+    monkeypatch.setattr(cache, 'Body', lambda body: body)
+    return FakeBody()
+
+
+### Tests ###
+def test_rotation_cache(fake_body):
+    rcache = cache.RotationCache(fake_body, tolerance=1e-7, max_segments=4)
+    times = np.linspace(0, 1e6, 20001)
+    valid_times, quats = rcache.quaternions(times)
+    expected_times, expected = fake_body.quaternions(valid_times)
+    assert np.all(valid_times == expected_times)
+    assert extra.quaternion_angle(quats, expected).max() < 1e-6
+    # Nothing is interpolated across the data gap
+    assert not ((valid_times > 5e5) & (valid_times < 6e5)).any()
+    assert len(rcache) == 4
+    _, matrices = rcache.rotation(valid_times[:10])
+    assert matrices.shape == (10, 3, 3)
+
+def test_rotation_cache_refine_limit(fake_body, monkeypatch):
+    # One refinement can't reach the tolerance, so nothing is interpolated
+    monkeypatch.setattr(cache.RotationCache, 'MAX_REFINE', 1)
+    rcache = cache.RotationCache(fake_body, tolerance=1e-9)
+    times = np.linspace(0, 1e6, 2001)
+    valid_times, quats = rcache.quaternions(times)
+    expected_times, expected = fake_body.quaternions(times)
+    assert np.all(valid_times == expected_times)
+    assert extra.quaternion_angle(quats, expected).max() < 1e-7
+
+def test_rotation_cache_reuse(fake_body):
+    rcache = cache.RotationCache(fake_body)
+    rcache.quaternions(np.linspace(0, 1000, 50))
+    calls = fake_body.calls
+    rcache.quaternions(np.linspace(0, 1000, 5000))
+    assert fake_body.calls == calls
+    util.kernel_changed()
+    assert len(rcache) == 0
+
+
+class FakeOrbit(object):
+    '''Circular orbit with a kink at 3e5, has no data in (5e5, 6e5).'''
+    def __init__(self):
+        self.samples = 0
+
+    def position(self, times, observer, frame, abcorr):
+        times = np.asarray(times, dtype=float)
+        times = times[~((times > 5e5) & (times < 6e5))]
+        self.samples += len(times)
+        angles = times / 1e5
+        x = 1e5 * np.cos(angles) + np.abs(times - 3e5)
+        return np.array([times, x, 1e5 * np.sin(angles), np.zeros_like(x)])
+
+def test_position_cache(fake_body):
+    orbit = FakeOrbit()
+    pcache = cache.PositionCache(block=1e5, tolerance=1e-3)
+    times = np.linspace(0, 1e6, 100001)
+    data = pcache.position(orbit, times, 'SUN', 'ECLIPJ2000')
+    expected = orbit.position(times, None, None, None)
+    assert data.shape == expected.shape
+    assert np.all(data[0] == expected[0])
+    assert np.abs(data[1:] - expected[1:]).max() < 1e-3
+    assert orbit.samples < 2 * len(times)
+    assert len(pcache) == 11
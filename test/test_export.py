@@ -0,0 +1,79 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import os
+import json
+
+import numpy as np
+
+import spiceminer as sm
+import spiceminer.export as export
+
+
+### Fixtures ###
+TIMES = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR, dtype=float)
+
+@pytest.fixture(scope='function')
+def written(tmpdir):
+    '''An export of body 399 with times 0 to 9, written by hand.'''
+    directory = str(tmpdir)
+    os.mkdir(os.path.join(directory, '399'))
+    for i, name in enumerate(export.COLUMNS):
+        writer = export._ColumnWriter(os.path.join(directory, '399',
+            name + '.npy'))
+        writer.append(np.arange(5, dtype=float) + i * 100)
+        writer.append(np.arange(5, 10, dtype=float) + i * 100)
+        writer.close()
+    index = {'version': export.FORMAT_VERSION, 'observer': 'SUN',
+        'frame': 'ECLIPJ2000', 'abcorr': 'NONE', 'columns': export.COLUMNS,
+        'bodies': {'399': {'name': 'EARTH', 'rows': 10}}}
+    with open(os.path.join(directory, export.INDEX), 'w') as f:
+        json.dump(index, f)
+    return directory
+
+
+### Tests ###
+def test_column_file(tmpdir):
+    path = str(tmpdir.join('column.npy'))
+    writer = export._ColumnWriter(path)
+    writer.append([1.0, 2.0])
+    writer.append(np.arange(3.0))
+    writer.close()
+    assert np.load(path).tolist() == [1, 2, 0, 1, 2]
+
+@pytest.mark.parametrize('start,stop,expected', [
+    (None, None, list(range(10))),
+    (2.5, 6, [3, 4, 5]),
+    (-5, 1, [0]),
+    (20, None, [])
+])
+def test_reader(written, start, stop, expected):
+    reader = export.Reader(written)
+    assert reader.bodies == {399: 'EARTH'}
+    assert isinstance(reader.columns(399)['time'], np.memmap)
+    columns = reader.columns('earth', start, stop)
+    assert columns['time'].tolist() == expected
+    assert reader.state(399, start, stop).shape == (8, len(expected))
+    assert np.array_equal(reader.position(399, start, stop)[3],
+        np.array(expected) + 300)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_reader_missing_body(written):
+    export.Reader(written).columns('MARS')
+
+@pytest.mark.usefixtures('with_kernels')
+class TestExport(object):
+    def test_roundtrip(self, tmpdir):
+        reader = export.export(str(tmpdir), ['EARTH', 301], TIMES,
+            chunk_size=100)
+        for idcode in [399, 301]:
+            expected = sm.Body(idcode).state(TIMES)
+            assert np.allclose(reader.state(idcode), expected)
+        start, stop = TIMES[10], TIMES[20]
+        assert np.allclose(reader.position(399, start, stop),
+            sm.Body(399).position(TIMES[10:20]))
+
+    @pytest.mark.xfail(raises=ValueError)
+    def test_unsorted(self, tmpdir):
+        export.export(str(tmpdir), ['EARTH'], TIMES[::-1], chunk_size=100)
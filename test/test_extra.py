@@ -87,3 +87,42 @@ def gen_dtrange():
 @pytest.mark.parametrize('args,expected', gen_dtrange())
 def test_dtrange(args, expected):
     assert list(extra.dtrange(*args)) == expected
+
+
+def gen_quaternions():
+    half = np.pi / 4
+    yield [1, 0, 0, 0], np.identity(3)
+    yield [np.cos(half), 0, 0, np.sin(half)], [[0, -1, 0], [1, 0, 0], [0, 0, 1]]
+    yield [np.cos(half), np.sin(half), 0, 0], [[1, 0, 0], [0, 0, -1], [0, 1, 0]]
+
+@pytest.mark.parametrize('quat,expected', gen_quaternions())
+def test_quaternion2matrix(quat, expected):
+    assert np.allclose(extra.quaternion2matrix(quat), expected)
+    assert np.allclose(extra.quaternion2matrix([quat] * 2), [expected] * 2)
+
+@pytest.mark.parametrize('quat,matrix', gen_quaternions())
+def test_matrix2quaternion(quat, matrix):
+    assert np.allclose(extra.matrix2quaternion(matrix), quat)
+    assert np.allclose(extra.matrix2quaternion([matrix] * 2), [quat] * 2)
+
+def test_quaternion_multiply():
+    quats = np.random.normal(size=(2, 10, 4))
+    quats /= np.sqrt((quats ** 2).sum(axis=-1))[..., None]
+    matrices = extra.quaternion2matrix(quats)
+    result = extra.quaternion_multiply(quats[0], quats[1])
+    assert np.allclose(extra.quaternion2matrix(result),
+        np.einsum('nij,njk->nik', matrices[0], matrices[1]))
+    assert np.allclose(np.abs(extra.matrix2quaternion(matrices[0])),
+        np.abs(quats[0]))
+
+def test_slerp():
+    half = np.pi / 4
+    q0 = np.array([[1., 0, 0, 0]] * 3)
+    q1 = np.array([[np.cos(half), 0, 0, np.sin(half)]] * 3)
+    fractions = [0, 0.5, 1]
+    result = extra.slerp(q0, q1, fractions)
+    assert np.allclose(result[0], q0[0])
+    assert np.allclose(result[2], q1[0])
+    assert np.allclose(extra.quaternion_angle(result, q0), [0, half, 2 * half])
+    # Both hemispheres represent the same rotation
+    assert np.allclose(extra.slerp(q0, -q1, fractions)[1], result[1])
@@ -0,0 +1,27 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+import spiceminer.frames as frames
+import spiceminer.kernel.spk as spk
+
+
+@pytest.mark.parametrize('frame', ['J2000', 'ECLIPJ2000'])
+def test_inertial(frame):
+    assert frames.is_inertial(frame)
+    assert np.allclose(frames.constant('J2000', frame),
+        spk.INERTIAL_FRAMES[frame])
+
+@pytest.mark.xfail(raises=ValueError)
+def test_constant_invalid():
+    frames.constant('J2000', 'IAU_EARTH')
+
+@pytest.mark.parametrize('backend', ['cspice', 'numpy'])
+def test_rotation_constant(backend):
+    matrices, found = frames.rotation('J2000', 'ECLIPJ2000', [0, 1, 2],
+        backend)
+    assert found.all()
+    assert matrices.shape == (3, 3, 3)
+    assert np.allclose(matrices, spk.INERTIAL_FRAMES['ECLIPJ2000'])
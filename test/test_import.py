@@ -0,0 +1,32 @@
+#-*- coding:utf-8 -*-
+
+import sys
+import subprocess
+
+import pytest
+
+
+CHECK = '''
+import sys
+import spiceminer
+import spiceminer._spicewrapper as spice
+import spiceminer.bodies as bodies
+print(spice.cspice._cdll is None)
+print('spiceminer.extensions' in sys.modules)
+print(0 not in bodies._ID_TO_NAME)
+'''
+
+
+def test_lazy():
+    output = subprocess.check_output([sys.executable, '-c', CHECK])
+    assert output.split() == [b'True', b'False', b'True']
+
+def test_lazy_attribute():
+    import spiceminer
+    import spiceminer.extensions.skymap as skymap
+    assert spiceminer.extensions.skymap is skymap
+
+@pytest.mark.xfail(raises=AttributeError)
+def test_missing_attribute():
+    import spiceminer
+    spiceminer.does_not_exist
@@ -0,0 +1,45 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+import spiceminer as sm
+import spiceminer.parallel as parallel
+
+
+### Fixtures ###
+TIMES = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR, dtype=float)
+
+@pytest.yield_fixture(scope='module')
+def pool(datadir):
+    pool = parallel.Pool([datadir], workers=2, chunk_size=100)
+    yield pool
+    pool.terminate()
+
+
+### Tests ###
+@pytest.mark.usefixtures('with_kernels')
+class TestPool(object):
+    @pytest.mark.parametrize('method', ['state', 'position', 'speed'])
+    def test_columns(self, pool, method):
+        expected = getattr(sm.Body(399), method)(TIMES)
+        data = getattr(pool, method)('EARTH', TIMES)
+        assert data.shape == expected.shape
+        assert np.allclose(data, expected)
+
+    def test_several_bodies(self, pool):
+        data = pool.position([sm.Body(399), 301], TIMES, observer=10)
+        assert len(data) == 2
+        for idcode, positions in zip([399, 301], data):
+            expected = sm.Body(idcode).position(TIMES, observer=10)
+            assert np.allclose(positions, expected)
+
+    def test_rotation(self, pool):
+        times, matrices = sm.Body(399).rotation(TIMES)
+        data = pool.rotation(399, TIMES)
+        assert np.array_equal(data[0], times)
+        assert np.allclose(data[1], matrices)
+
+    def test_empty(self, pool):
+        assert pool.position(399, []).shape == (4, 0)
@@ -0,0 +1,106 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import json
+
+import numpy as np
+
+import spiceminer as sm
+import spiceminer.portable as portable
+
+
+### Fixtures ###
+START, STOP = float(sm.Time(2000)), float(sm.Time(2000, 2))
+TIMES = np.arange(START, STOP, sm.Time.HOUR / 3)
+# Period and radius of the fake orbit and the gap without data
+PERIOD, RADIUS = 10 * sm.Time.DAY, 1e6
+GAP = START + 3 * sm.Time.DAY, START + 4 * sm.Time.DAY
+
+class FakeBody(object):
+    '''Circular orbit of "the earth" without kernels, no data inside `GAP`.
+    Stands in for `Body` in `compile_ephemeris`.'''
+    _ABCORR = 'NONE'
+    id, name = 399, 'EARTH'
+
+    def __init__(self, body=None):
+        pass
+
+    def position(self, times, observer, frame, abcorr):
+        times = np.asarray(times, dtype=float)
+        times = times[(times < GAP[0]) | (times > GAP[1])]
+        phase = 2 * np.pi * (times - START) / PERIOD
+        return np.array([times, RADIUS * np.cos(phase),
+            RADIUS * np.sin(phase), np.zeros_like(times)])
+
+@pytest.fixture(scope='function')
+def written(tmpdir, monkeypatch):
+    '''An ephemeris of the fake body, written by `compile_ephemeris`.'''
+    monkeypatch.setattr(portable, 'Body', FakeBody)
+    path = str(tmpdir.join('fake.npz'))
+    portable.compile_ephemeris(path, [399], START, STOP)
+    return path
+
+
+### Tests ###
+def test_fit():
+    bounds, coeffs = portable._fit(FakeBody(), START, STOP, 'SUN',
+        'ECLIPJ2000', None, 1e-3, 12, sm.Time.DAY, 8)
+    assert coeffs.shape == (len(bounds), 13, 3)
+    assert (np.diff(bounds[:, 0]) > 0).all()
+    assert (bounds[1:, 0] >= bounds[:-1, 1]).all()
+    assert bounds[0, 0] == START and bounds[-1, 1] == STOP
+    assert not ((bounds[:, 0] < GAP[1]) & (bounds[:, 1] > GAP[0])).any()
+
+def test_file_format(written):
+    with np.load(written) as data:
+        assert sorted(data.files) == ['bounds', 'coeffs', 'header', 'offsets']
+        header = json.loads(data['header'].tobytes().decode('utf-8'))
+        bounds, coeffs = data['bounds'], data['coeffs']
+        assert data['offsets'].tolist() == [0, len(bounds)]
+    assert header == {'version': portable.FORMAT_VERSION, 'observer': 'SUN',
+        'frame': 'ECLIPJ2000', 'abcorr': 'NONE', 'tolerance': 1e-3,
+        'ids': [399], 'names': ['EARTH']}
+    assert len(bounds) and bounds.shape[1:] == (2,)
+    assert coeffs.shape == (len(bounds), 13, 3)
+
+def test_ephemeris(written):
+    ephemeris = portable.Ephemeris(written)
+    assert ephemeris.bodies == {399: 'EARTH'}
+    expected = FakeBody().position(TIMES, 'SUN', 'ECLIPJ2000', None)
+    position = ephemeris.position('earth', TIMES)
+    inside = (position[0] < GAP[0]) | (position[0] > GAP[1])
+    # The gap itself isn't covered, only its edges may be
+    assert inside.sum() >= len(position[0]) - 2
+    position = position[:, inside]
+    assert np.array_equal(position[0], expected[0])
+    assert np.abs(position[1:] - expected[1:]).max() < 1e-3
+    state = ephemeris.state(399, position[0])
+    assert state.shape == (8, position.shape[1])
+    phase = 2 * np.pi * (state[0] - START) / PERIOD
+    speed = 2 * np.pi * RADIUS / PERIOD
+    assert np.allclose(state[4], -speed * np.sin(phase), atol=1e-6)
+    assert np.allclose(state[5], speed * np.cos(phase), atol=1e-6)
+    assert np.allclose(state[7], RADIUS / portable.CLIGHT)
+
+def test_ephemeris_uncovered(written):
+    ephemeris = portable.Ephemeris(written)
+    times = [START - 1, (GAP[0] + GAP[1]) / 2, STOP + 1]
+    assert ephemeris.state(399, times).shape == (8, 0)
+
+@pytest.mark.xfail(raises=ValueError)
+def test_ephemeris_missing_body(written):
+    portable.Ephemeris(written).position('MARS', START)
+
+@pytest.mark.usefixtures('with_kernels')
+class TestCompile(object):
+    def test_roundtrip(self, tmpdir):
+        path = str(tmpdir.join('ephemeris.npz'))
+        ephemeris = portable.compile_ephemeris(path, ['EARTH', 301], START,
+            STOP, tolerance=1e-2)
+        for idcode in [399, 301]:
+            expected = sm.Body(idcode).state(TIMES)
+            state = ephemeris.state(idcode, TIMES)
+            assert np.array_equal(state[0], expected[0])
+            assert np.abs(state[1:4] - expected[1:4]).max() < 1e-2
+            assert np.allclose(state[4:7], expected[4:7], rtol=1e-5)
@@ -0,0 +1,72 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+import spiceminer as sm
+import spiceminer.profiling as profiling
+
+
+### Fixtures ###
+@pytest.yield_fixture(scope='function')
+def clean():
+    enabled = profiling.enabled
+    profiling.disable()
+    profiling.reset_stats()
+    yield
+    profiling.enabled = enabled
+    profiling.reset_stats()
+
+@profiling.instrument('test.func')
+def func(fail=False):
+    if fail:
+        raise ValueError()
+    return 1
+
+
+### Tests ###
+@pytest.mark.usefixtures('clean')
+def test_disabled():
+    assert func() == 1
+    assert sm.stats() == {}
+
+@pytest.mark.usefixtures('clean')
+def test_enabled():
+    profiling.enable()
+    func()
+    with pytest.raises(ValueError):
+        func(fail=True)
+    stat = sm.stats()['test.func']
+    assert stat.calls == 2
+    assert stat.failures == 1
+    assert stat.seconds >= 0
+    sm.reset_stats()
+    assert sm.stats() == {}
+
+@pytest.mark.usefixtures('clean')
+def test_profile():
+    with sm.profile() as report:
+        func()
+        func()
+    assert not profiling.enabled
+    assert report.stats['test.func'].calls == 2
+    assert 'test.func' in str(report)
+    # Outside of the block nothing is recorded
+    func()
+    assert sm.stats()['test.func'].calls == 2
+
+@pytest.mark.usefixtures('clean')
+def test_profile_bodies(datadir):
+    sm.load(datadir)
+    try:
+        times = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.DAY,
+            dtype=float)
+        with sm.profile() as report:
+            sm.Body(399).state(times)
+    finally:
+        sm.unload(datadir)
+    assert report.stats['Body.state'].calls == 1
+    assert report.stats['spice.spkezr_array'].calls == 1
+    assert (report.stats['Body.state'].seconds >=
+        report.stats['spice.spkezr_array'].seconds)
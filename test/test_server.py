@@ -0,0 +1,164 @@
+#-*- coding:utf-8 -*-
+
+import pytest
+
+import io
+import os
+import time
+import socket
+import tempfile
+import threading
+
+import numpy as np
+
+pytest.importorskip('concurrent.futures')
+
+import spiceminer as sm
+import spiceminer.aio as aio
+import spiceminer.server as server
+
+
+### Fixtures ###
+TIMES = np.arange(sm.Time(2000), sm.Time(2000, 2), sm.Time.HOUR, dtype=float)
+
+@pytest.yield_fixture(scope='module')
+def instance(datadir):
+    path = os.path.join(tempfile.mkdtemp(), 'spiceminer.sock')
+    instance = server.Server([datadir], path)
+    thread = threading.Thread(target=instance.serve_forever)
+    thread.start()
+    yield instance
+    instance.shutdown()
+    thread.join()
+    sm.unload(datadir)
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+class CountingPool(object):
+    '''Evaluates batches in the test process and records their times.'''
+    workers = 1
+
+    def __init__(self):
+        self.batches = []
+
+    def position(self, body, times, **kwargs):
+        self.batches.append(times)
+        return sm.Body(body).position(times, **kwargs)
+
+    def close(self):
+        pass
+
+@pytest.yield_fixture(scope='function')
+def merging(instance, datadir):
+    '''A second server whose executor evaluates with a `CountingPool`.
+    Uses `instance` to keep the kernels loaded.'''
+    pool = CountingPool()
+    executor = aio.Executor([datadir], pool=pool)
+    path = os.path.join(tempfile.mkdtemp(), 'spiceminer.sock')
+    merging = server.Server([datadir], path, executor=executor)
+    thread = threading.Thread(target=merging.serve_forever)
+    thread.start()
+    yield merging, executor, pool
+    merging.shutdown()
+    thread.join()
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+@pytest.fixture(scope='module')
+def address(instance):
+    return instance.address
+
+@pytest.yield_fixture(scope='function')
+def client(address):
+    client = server.Client(address)
+    yield client
+    client.close()
+
+
+### Tests ###
+def test_protocol():
+    a, b = socket.socketpair()
+    try:
+        writer, reader = a.makefile('wb'), b.makefile('rb')
+        arrays = [np.arange(6.).reshape(2, 3), np.array([True, False])]
+        server._send(writer, {'method': 'state'}, arrays)
+        header, received = server._recv(reader)
+        assert header == {'method': 'state'}
+        for array, expected in zip(received, arrays):
+            assert np.array_equal(array, expected)
+            assert array.dtype == expected.dtype
+        writer.close()
+        a.close()
+        assert server._recv(reader) is None
+    finally:
+        a.close()
+        b.close()
+
+@pytest.mark.parametrize('array', [
+    np.array([1, 2]),
+    np.array([{'a': 1}], dtype=object)
+])
+def test_protocol_dtypes(array):
+    buf = io.BytesIO()
+    np.lib.format.write_array(buf, array)
+    blob = buf.getvalue()
+    message = '{{"sizes": [{}]}}\n'.format(len(blob)).encode('utf-8') + blob
+    with pytest.raises(ValueError):
+        server._recv(io.BytesIO(message))
+
+def test_client(client):
+    expected = sm.Body(399).state(TIMES, observer=10)
+    assert np.allclose(client.state(399, TIMES, observer=10), expected)
+    assert np.allclose(client.position('EARTH', TIMES, observer=10),
+        expected[:4])
+    times, matrices = client.rotation(399, TIMES)
+    assert np.allclose(matrices, sm.Body(399).rotation(TIMES)[1])
+
+def test_client_threads(client):
+    expected = sm.Body(399).position(TIMES)
+    results = [None] * 8
+    def work(i):
+        results[i] = client.position(399, TIMES[i::8])
+    threads = [threading.Thread(target=work, args=(i,))
+        for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, data in enumerate(results):
+        assert np.allclose(data, expected[:, i::8])
+
+def test_merge(merging):
+    instance, executor, pool = merging
+    clients = [server.Client(instance.address) for _ in range(2)]
+    requests = [TIMES[:10]] + [TIMES[i::4] for i in range(4)]
+    results = [None] * len(requests)
+    def work(i):
+        results[i] = clients[i % 2].position(399, requests[i])
+    threads = [threading.Thread(target=work, args=(i,))
+        for i in range(len(requests))]
+    # Hold everything back until all requests arrived, then they form one
+    # batch
+    executor.pause()
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 60
+        while executor.pending < len(requests) and time.time() < deadline:
+            time.sleep(0.01)
+        assert executor.pending == len(requests)
+    finally:
+        executor.resume()
+    for thread in threads:
+        thread.join()
+    for client in clients:
+        client.close()
+    for times, data in zip(requests, results):
+        assert np.allclose(data, sm.Body(399).position(times))
+    assert len(pool.batches) == 1
+    assert np.array_equal(pool.batches[0], np.unique(np.concatenate(
+        requests)))
+
+@pytest.mark.xfail(raises=ValueError)
+def test_client_invalid(client):
+    client.request('distance', 399, TIMES)
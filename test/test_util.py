@@ -20,6 +20,26 @@ def test_ignored(errors):
         with util.ignored(*errors):
             raise error()
 
+@pytest.mark.parametrize('times,expected', [
+    (slice(0, 10, 3), [[0, 3], [6, 9]]),
+    (slice(5, 0, 1), []),
+    (range(5), [[0, 1], [2, 3], [4]]),
+    (iter(['1', 2.5, 3]), [[1, 2.5], [3]])
+])
+def test_time_chunks(times, expected):
+    chunks = [chunk.tolist() for chunk in util.time_chunks(times, 2)]
+    assert chunks == expected
+
+def test_prefetched():
+    assert list(util.prefetched(iter(range(5)))) == list(range(5))
+
+@pytest.mark.xfail(raises=KeyError)
+def test_prefetched_error():
+    def failing():
+        yield 1
+        raise KeyError('failed')
+    list(util.prefetched(failing()))
+
 
 iterable_paths = ['.', '..', __file__]
 cleanable_paths = [
@@ -92,6 +112,12 @@ class TestTimeWindows:
         assert list(iter(instance)) == merged
         assert list(reversed(instance)) == merged[::-1]
 
+    @pytest.mark.parametrize('args,merged', list(gen_basics())[3:])
+    def test_fromarray(self, args, merged):
+        instance = util.TimeWindows.fromarray(args)
+        assert instance == util.TimeWindows(*args)
+        assert instance.raw == merged
+
     @pytest.mark.parametrize('args1,args2,equal,add,sub', gen_infix())
     def test_infix_methods(self, args1, args2, equal, add, sub):
         instance_0 = util.TimeWindows(*args1)